@@ -1,6 +1,7 @@
 # AnalyLit V4.0 - Configuration centrale (CORRIGÉ)
 
 import os
+import json
 from dataclasses import dataclass, field
 from pathlib import Path
 
@@ -23,6 +24,14 @@ class Config:
 
     # Configuration Ollama
     OLLAMA_BASE_URL: str = os.getenv('OLLAMA_BASE_URL', 'http://ollama:11434')
+    # Plusieurs instances possibles, séparées par des virgules (ex: 'http://gpu1:11434,http://gpu2:11434')
+    OLLAMA_BASE_URLS: list = field(default_factory=lambda: [
+        url.strip() for url in os.getenv('OLLAMA_BASE_URLS', os.getenv('OLLAMA_BASE_URL', 'http://ollama:11434')).split(',')
+        if url.strip()
+    ])
+    OLLAMA_HEALTH_INTERVAL: int = int(os.getenv('OLLAMA_HEALTH_INTERVAL', '15'))    # secondes entre deux sondes
+    OLLAMA_HEALTH_TIMEOUT: int = int(os.getenv('OLLAMA_HEALTH_TIMEOUT', '3'))
+    OLLAMA_HOST_MAX_FAILURES: int = int(os.getenv('OLLAMA_HOST_MAX_FAILURES', '3'))
 
     # Chemins des projets
     PROJECTS_DIR: Path = Path("/app/projects")
@@ -49,6 +58,72 @@ class Config:
         }
     })
 
+    # Configuration du client Ollama (pool de connexions, concurrence, keep-alive)
+    OLLAMA_POOL_SIZE: int = int(os.getenv('OLLAMA_POOL_SIZE', '4'))
+    OLLAMA_MAX_CONCURRENCY_PER_MODEL: int = int(os.getenv('OLLAMA_MAX_CONCURRENCY_PER_MODEL', '1'))
+    # Surcharges par modèle, ex: '{"gemma:2b": 4, "mixtral:8x7b": 1}'
+    OLLAMA_MODEL_CONCURRENCY: dict = field(default_factory=lambda: json.loads(os.getenv('OLLAMA_MODEL_CONCURRENCY', '{}')))
+    OLLAMA_SLOT_WAIT_TIMEOUT: int = int(os.getenv('OLLAMA_SLOT_WAIT_TIMEOUT', '1800'))
+    # Sortie structurée : schéma JSON passé dans `format` (Ollama >= 0.5), sinon simple mode "json"
+    OLLAMA_STRUCTURED_OUTPUT: bool = os.getenv('OLLAMA_STRUCTURED_OUTPUT', 'true').lower() == 'true'
+    OLLAMA_DEFAULT_KEEP_ALIVE: str = os.getenv('OLLAMA_DEFAULT_KEEP_ALIVE', '15m')
+    OLLAMA_KEEP_ALIVE: dict = field(default_factory=lambda: {
+        'fast': os.getenv('OLLAMA_KEEP_ALIVE_FAST', '30m'),
+        'standard': os.getenv('OLLAMA_KEEP_ALIVE_STANDARD', '30m'),
+        'deep': os.getenv('OLLAMA_KEEP_ALIVE_DEEP', '60m')
+    })
+
+    # Cache des réponses LLM (table llm_cache)
+    LLM_CACHE_ENABLED: bool = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_MAX_AGE_DAYS: int = int(os.getenv('LLM_CACHE_MAX_AGE_DAYS', '30'))
+    LLM_CACHE_MAX_SIZE_MB: int = int(os.getenv('LLM_CACHE_MAX_SIZE_MB', '512'))
+    LLM_CACHE_PRUNE_PROBABILITY: float = float(os.getenv('LLM_CACHE_PRUNE_PROBABILITY', '0.01'))
+
+    # Planificateur LLM par affinité de modèle
+    LLM_SCHEDULER_ENABLED: bool = os.getenv('LLM_SCHEDULER_ENABLED', 'true').lower() == 'true'
+    LLM_SCHEDULER_BATCH_SIZE: int = int(os.getenv('LLM_SCHEDULER_BATCH_SIZE', '50'))
+    LLM_SCHEDULER_MAX_WAIT: int = int(os.getenv('LLM_SCHEDULER_MAX_WAIT', '900'))             # secondes
+    LLM_SCHEDULER_INTERACTIVE_MAX_WAIT: int = int(os.getenv('LLM_SCHEDULER_INTERACTIVE_MAX_WAIT', '60'))
+    # Tâches libérées laissées en attente dans la file RQ (par worker), et passage du dispatch (secondes)
+    LLM_SCHEDULER_QUEUE_DEPTH: int = int(os.getenv('LLM_SCHEDULER_QUEUE_DEPTH', '2'))
+    LLM_SCHEDULER_DISPATCH_INTERVAL: int = int(os.getenv('LLM_SCHEDULER_DISPATCH_INTERVAL', '5'))
+    LLM_SCHEDULER_DISPATCH_TTL: int = int(os.getenv('LLM_SCHEDULER_DISPATCH_TTL', '60'))
+
+    # Cache mémoire des prompts, grilles et profils dans les workers (invalidé par pub/sub Redis ;
+    # durée de vie maximale d'une entrée en secondes, au cas où un message serait perdu)
+    CONFIG_CACHE_TTL: int = int(os.getenv('CONFIG_CACHE_TTL', '3600'))
+
+    # Articles traités par tâche RQ hors screening groupé (une lecture et une transaction par micro-lot)
+    ARTICLE_MICROBATCH_SIZE: int = int(os.getenv('ARTICLE_MICROBATCH_SIZE', '10'))
+    # Temps maximal par article dans un micro-lot, et délai de la tâche RQ du micro-lot (secondes) ;
+    # les articles qui ne tiennent plus dans ce délai sont confiés à une nouvelle tâche
+    ARTICLE_TIME_BUDGET: int = int(os.getenv('ARTICLE_TIME_BUDGET', '1800'))
+    ARTICLE_MICROBATCH_JOB_TIMEOUT: int = int(os.getenv('ARTICLE_MICROBATCH_JOB_TIMEOUT', '3600'))
+    # Screening groupé : nombre d'articles par prompt (1 = un article par appel)
+    SCREENING_BATCH_SIZE: int = int(os.getenv('SCREENING_BATCH_SIZE', '1'))
+
+    # Screening en cascade : un petit modèle évalue tout, la zone d'incertitude est réévaluée
+    # par le modèle de pré-traitement du profil
+    SCREENING_CASCADE_ENABLED: bool = os.getenv('SCREENING_CASCADE_ENABLED', 'false').lower() == 'true'
+    SCREENING_CASCADE_MODEL: str = os.getenv('SCREENING_CASCADE_MODEL', 'gemma:2b')
+    SCREENING_CASCADE_BAND: tuple = (
+        float(os.getenv('SCREENING_CASCADE_BAND_LOW', '4')),
+        float(os.getenv('SCREENING_CASCADE_BAND_HIGH', '7'))
+    )
+
+    # Disjoncteur par (hôte, modèle) et délais d'attente adaptatifs des appels LLM
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv('LLM_BREAKER_FAILURE_THRESHOLD', '3'))
+    LLM_BREAKER_COOLDOWN: int = int(os.getenv('LLM_BREAKER_COOLDOWN', '120'))
+    LLM_TIMEOUT_MIN: int = int(os.getenv('LLM_TIMEOUT_MIN', '60'))
+    LLM_TIMEOUT_PERCENTILE: int = int(os.getenv('LLM_TIMEOUT_PERCENTILE', '95'))
+    LLM_TIMEOUT_MARGIN: float = float(os.getenv('LLM_TIMEOUT_MARGIN', '3'))
+    LLM_LATENCY_SAMPLES: int = 200
+    LLM_LATENCY_MIN_SAMPLES: int = 10
+    # Remise en file des tâches d'articles quand le modèle est indisponible
+    LLM_REQUEUE_MAX_ATTEMPTS: int = int(os.getenv('LLM_REQUEUE_MAX_ATTEMPTS', '5'))
+    LLM_REQUEUE_BASE_DELAY: int = int(os.getenv('LLM_REQUEUE_BASE_DELAY', '30'))
+    LLM_REQUEUE_MAX_DELAY: int = int(os.getenv('LLM_REQUEUE_MAX_DELAY', '900'))
+
     # Configuration timeouts
     REQUEST_TIMEOUT: int = 900   # 15 minutes
     JOB_TIMEOUT: int = 3600      # 1 heure
@@ -70,21 +145,70 @@ class Config:
     EMBEDDING_MODEL: str = os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
     CHUNK_SIZE: int = int(os.getenv('CHUNK_SIZE', '1000'))
     CHUNK_OVERLAP: int = int(os.getenv('CHUNK_OVERLAP', '200'))
+
+    # Extraction : 'full_text' (texte complet dans le prompt) ou 'rag' (extraits ChromaDB par groupe de champs)
+    EXTRACTION_STRATEGY: str = os.getenv('EXTRACTION_STRATEGY', 'full_text')
+    RAG_EXTRACTION_TOP_K: int = int(os.getenv('RAG_EXTRACTION_TOP_K', '4'))
+    RAG_EXTRACTION_FIELDS_PER_GROUP: int = int(os.getenv('RAG_EXTRACTION_FIELDS_PER_GROUP', '6'))
     
+    # Délai maximal par source lors d'une recherche multi-bases (sources interrogées en parallèle)
+    SEARCH_SOURCE_TIMEOUT: int = int(os.getenv('SEARCH_SOURCE_TIMEOUT', '120'))
+    # Surcharges par source, ex: '{"pubmed": 600, "ieee": 60}'
+    SEARCH_SOURCE_TIMEOUTS: dict = field(default_factory=lambda: json.loads(os.getenv('SEARCH_SOURCE_TIMEOUTS', '{"pubmed": 1200, "crossref": 1200}')))
+    # Récolte incrémentale : pagination jusqu'au bout de la période, dans cette limite par source
+    SEARCH_INCREMENTAL_MAX_RESULTS: int = int(os.getenv('SEARCH_INCREMENTAL_MAX_RESULTS', '20000'))
+    # Dédoublonnage inter-sources : similarité minimale des titres (même premier auteur, année ±1)
+    DEDUP_TITLE_SIMILARITY: float = float(os.getenv('DEDUP_TITLE_SIMILARITY', '0.92'))
+
     # Configuration bases de données externes
+    # Clé NCBI facultative : 10 requêtes/s au lieu de 3 sur les E-utilities
+    NCBI_API_KEY: str = os.getenv('NCBI_API_KEY', '')
+    PUBMED_EFETCH_BATCH_SIZE: int = int(os.getenv('PUBMED_EFETCH_BATCH_SIZE', '200'))
+    # ESearch ne pagine pas au-delà de 10 000 notices : découpage en fenêtres de dates au-delà
+    PUBMED_MAX_RECORDS_PER_QUERY: int = 9999
+    PUBMED_MIN_YEAR: int = int(os.getenv('PUBMED_MIN_YEAR', '1800'))
+    PUBMED_HARVEST_WORKERS: int = int(os.getenv('PUBMED_HARVEST_WORKERS', '3'))
     IEEE_API_KEY: str = os.getenv('IEEE_API_KEY', '')
+    # Débit maximal par hôte d'API externe, partagé par tous les workers (requêtes/s,
+    # ou {"rate": r, "burst": n}). Surcharge complète possible via RATE_LIMITS (JSON).
+    RATE_LIMITS: dict = field(default_factory=lambda: json.loads(os.getenv('RATE_LIMITS', 'null')) or {
+        'eutils.ncbi.nlm.nih.gov': 10 if os.getenv('NCBI_API_KEY') else 3,
+        'www.ncbi.nlm.nih.gov': 3,          # PubTator
+        'api.unpaywall.org': 5,
+        'api.crossref.org': 10,
+        'api.zotero.org': 5,
+        'ieeexploreapi.ieee.org': 5,
+        'export.arxiv.org': 0.33
+    })
     CROSSREF_EMAIL: str = os.getenv('CROSSREF_EMAIL', 'researcher@analylit.com')
+    CROSSREF_PAGE_SIZE: int = int(os.getenv('CROSSREF_PAGE_SIZE', '500'))  # 1000 au maximum
+    # Métadonnées des identifiants saisis à la main, partagées entre projets (cache Redis)
+    ARTICLE_METADATA_CACHE_TTL: int = int(os.getenv('ARTICLE_METADATA_CACHE_TTL', str(30 * 24 * 3600)))
     MAX_PDF_SIZE: int = 50 * 1024 * 1024  # Exemple: 50MB
+    # Extraction du texte des PDF : moteurs essayés dans l'ordre (pymupdf, pypdf2)
+    PDF_TEXT_ENGINES: list = field(default_factory=lambda: os.getenv('PDF_TEXT_ENGINES', 'pymupdf,pypdf2').split(','))
+    # Au-delà de ce nombre de pages, les plages de pages sont réparties sur un pool de processus
+    PDF_PARALLEL_MIN_PAGES: int = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '60'))
+    PDF_PAGES_PER_TASK: int = int(os.getenv('PDF_PAGES_PER_TASK', '20'))
+    PDF_EXTRACTION_WORKERS: int = int(os.getenv('PDF_EXTRACTION_WORKERS', str(min(4, os.cpu_count() or 1))))
     
     def get_database_config(self) -> dict:
         """Configuration des bases de données externes"""
         return {
+            'pubmed': {
+                'api_key': self.NCBI_API_KEY,
+                'batch_size': self.PUBMED_EFETCH_BATCH_SIZE,
+                'max_records_per_query': self.PUBMED_MAX_RECORDS_PER_QUERY,
+                'min_year': self.PUBMED_MIN_YEAR,
+                'harvest_workers': self.PUBMED_HARVEST_WORKERS
+            },
             'ieee': {
                 'enabled': bool(self.IEEE_API_KEY),
                 'api_key': self.IEEE_API_KEY
             },
             'crossref': {
-                'email': self.CROSSREF_EMAIL
+                'email': self.CROSSREF_EMAIL,
+                'page_size': self.CROSSREF_PAGE_SIZE
             },
             'unpaywall': {
                 'email': self.UNPAYWALL_EMAIL
@@ -25,7 +25,7 @@ from sqlalchemy.exc import IntegrityError
 from config_v4 import get_config
 from tasks_v4_complete import (
     multi_database_search_task,
-    process_single_article_task,
+    enqueue_article_jobs,
     run_synthesis_task,
     run_discussion_generation_task,
     run_knowledge_graph_task,
@@ -39,10 +39,14 @@ from tasks_v4_complete import (
     answer_chat_question_task,
     fetch_online_pdf_task,
     db_manager,
-    fetch_article_details,
+    ollama_client,
+    add_manual_articles_task,
     sanitize_filename,
     import_from_zotero_file_task,
 )
+from utils.ollama_client import OllamaClient
+from utils.model_scheduler import ModelAffinityScheduler
+from utils.config_cache import publish_invalidation
 
 # Configuration
 config = get_config()
@@ -76,6 +80,8 @@ processing_queue = Queue('analylit_processing_v4', connection=redis_conn)
 synthesis_queue = Queue('analylit_synthesis_v4', connection=redis_conn)
 analysis_queue = Queue('analylit_analysis_v4', connection=redis_conn)
 background_queue = Queue('analylit_background_v4', connection=redis_conn)
+chat_queue = Queue('analylit_chat_v4', connection=redis_conn)
+model_scheduler = ModelAffinityScheduler(redis_conn)
 
 PROJECTS_DIR = config.PROJECTS_DIR
 
@@ -109,10 +115,20 @@ def init_db():
                     indexed_at TIMESTAMP,
                     search_query TEXT,
                     databases_used TEXT,
-                    inter_rater_reliability TEXT
+                    inter_rater_reliability TEXT,
+                    llm_cache_bypass BOOLEAN DEFAULT FALSE
                 )
             """))
 
+            conn.execute(text("""
+                ALTER TABLE projects ADD COLUMN IF NOT EXISTS llm_cache_bypass BOOLEAN DEFAULT FALSE
+            """))
+
+            # Date de dernière récolte par source ({"pubmed": "AAAA-MM-JJ", ...}) pour la recherche incrémentale
+            conn.execute(text("""
+                ALTER TABLE projects ADD COLUMN IF NOT EXISTS search_watermarks TEXT
+            """))
+
             conn.execute(text("""
                 CREATE TABLE IF NOT EXISTS search_results (
                     id TEXT PRIMARY KEY,
@@ -150,6 +166,11 @@ def init_db():
                 )
             """))
 
+            # Empreinte des entrées (texte source, prompt, grille, modèles) pour les reprises incrémentales
+            conn.execute(text("""
+                ALTER TABLE extractions ADD COLUMN IF NOT EXISTS input_fingerprint TEXT
+            """))
+
             conn.execute(text("""
                 CREATE TABLE IF NOT EXISTS processing_log (
                     id SERIAL PRIMARY KEY,
@@ -205,6 +226,67 @@ def init_db():
                 )
             """))
 
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size_bytes INTEGER DEFAULT 0,
+                    hits INTEGER DEFAULT 0,
+                    created_at TIMESTAMP,
+                    last_hit_at TIMESTAMP
+                )
+            """))
+
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit ON llm_cache (last_hit_at)
+            """))
+
+            # Texte extrait des PDF, adressé par le SHA-256 du fichier (partagé entre projets et tâches)
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS pdf_texts (
+                    sha256 TEXT PRIMARY KEY,
+                    extractor_version TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    page_offsets TEXT NOT NULL,
+                    page_count INTEGER DEFAULT 0,
+                    size_bytes INTEGER DEFAULT 0,
+                    created_at TIMESTAMP
+                )
+            """))
+
+            # Unicité (projet, article) requise par l'ingestion groupée (ON CONFLICT) ;
+            # les doublons d'anciennes bases sont supprimés avant la création de l'index.
+            has_unique_index = conn.execute(text("""
+                SELECT 1 FROM pg_indexes WHERE indexname = 'uq_search_results_project_article'
+            """)).fetchone()
+            if not has_unique_index:
+                conn.execute(text("""
+                    DELETE FROM search_results a USING search_results b
+                    WHERE a.project_id = b.project_id AND a.article_id = b.article_id AND a.ctid > b.ctid
+                """))
+                conn.execute(text("""
+                    CREATE UNIQUE INDEX uq_search_results_project_article ON search_results (project_id, article_id)
+                """))
+
+            # Doublons inter-sources écartés à l'ingestion, rattachés à leur notice canonique
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS search_result_duplicates (
+                    id TEXT PRIMARY KEY,
+                    project_id TEXT NOT NULL,
+                    article_id TEXT NOT NULL,
+                    canonical_article_id TEXT NOT NULL,
+                    database_source TEXT,
+                    title TEXT,
+                    doi TEXT,
+                    match_type TEXT NOT NULL,
+                    score REAL,
+                    created_at TIMESTAMP,
+                    FOREIGN KEY (project_id) REFERENCES projects(id),
+                    UNIQUE (project_id, article_id)
+                )
+            """))
+
             # Insérer les profils par défaut
             profiles_count = conn.execute(text("SELECT COUNT(*) FROM analysis_profiles")).scalar()
             if profiles_count == 0:
@@ -294,7 +376,35 @@ Réponds **UNIQUEMENT** avec un objet JSON valide contenant les clés suivantes
                     })
                 logger.info("✅ Prompts par défaut insérés.")
 
+            # Prompts ajoutés après la première version : insérés s'ils manquent
+            additional_prompts = [
+                ('batch_screening_prompt', 'Prompt pour la pré-sélection groupée de plusieurs articles.',
+                 """En tant qu'assistant de recherche spécialisé, évaluez la pertinence de chacun des {count} articles ci-dessous pour une revue systématique.
+
+{articles}
+
+Pour CHAQUE article, évaluez sa pertinence sur une échelle de 0 à 10 et fournissez une justification concise.
+
+Répondez UNIQUEMENT avec un objet JSON contenant une clé "results" : une liste avec un objet par article, chacun contenant :
+- "article_id": l'identifiant exact indiqué entre crochets
+- "relevance_score": score numérique de 0 à 10
+- "decision": "À inclure" si score >= 7, sinon "À exclure"
+- "justification": phrase courte (max 30 mots) expliquant le score""")
+            ]
+
+            for prompt in additional_prompts:
+                conn.execute(text("""
+                    INSERT INTO prompts (name, description, template) VALUES (:name, :description, :template)
+                    ON CONFLICT (name) DO NOTHING
+                """), {
+                    'name': prompt[0],
+                    'description': prompt[1],
+                    'template': prompt[2]
+                })
+
             conn.commit()
+            # Les workers déjà démarrés ont pu mettre en cache l'absence des prompts ajoutés ici
+            publish_invalidation(redis_conn, 'prompt')
             logger.info("✅ Base de données PostgreSQL initialisée avec succès.")
 
     except Exception as e:
@@ -332,6 +442,31 @@ def update_project_status(project_id: str, status: str):
     finally:
         Session.remove()
 
+def enqueue_llm_job(queue, func, model: str, job_timeout=1800, interactive: bool = False,
+                    keep_alive: str = None, **kwargs) -> str:
+    """
+    Confie une tâche LLM au planificateur par modèle, ou l'envoie directement dans RQ s'il est désactivé.
+    Retourne l'identifiant de la tâche RQ (celle qui sera créée à la libération, avec le planificateur).
+    """
+    if config.LLM_SCHEDULER_ENABLED and model:
+        return model_scheduler.submit(queue.name, func, model, kwargs, job_timeout=job_timeout,
+                                      interactive=interactive, keep_alive=keep_alive)
+    return queue.enqueue(func, job_timeout=job_timeout, **kwargs).id
+
+def get_project_model(project_id: str, role: str) -> str:
+    """Modèle utilisé par une tâche d'un projet selon son profil (role: preprocess, extract ou synthesis)."""
+    column = {'preprocess': 'preprocess_model', 'extract': 'extract_model', 'synthesis': 'synthesis_model'}[role]
+    session = Session()
+    try:
+        row = session.execute(text(f"""
+            SELECT ap.{column} AS model FROM projects p
+            JOIN analysis_profiles ap ON ap.id = COALESCE(p.profile_used, 'standard')
+            WHERE p.id = :id
+        """), {'id': project_id}).fetchone()
+        return row.model if row else 'llama3.1:8b'
+    finally:
+        Session.remove()
+
 # --- API ENDPOINTS ---
 
 @api_bp.route('/health', methods=['GET'])
@@ -347,6 +482,13 @@ def health_check():
         db_status = "error"
         redis_status = "error"
 
+    try:
+        hosts = ollama_client.pool.snapshot()
+        ollama_status = f"{sum(1 for h in hosts if h['healthy'])}/{len(hosts)} hôte(s) disponible(s)"
+    except Exception as e:
+        logger.error(f"Erreur état Ollama: {e}")
+        ollama_status = "unknown"
+
     return jsonify({
         "status": "ok",
         "version": config.ANALYLIT_VERSION,
@@ -354,7 +496,7 @@ def health_check():
         "services": {
             "database": db_status,
             "redis": redis_status,
-            "ollama": "unknown"
+            "ollama": ollama_status
         }
     })
 
@@ -414,6 +556,74 @@ def search_multiple_databases():
         'databases': databases
     }), 202
 
+@api_bp.route('/projects/<project_id>/refresh-search', methods=['POST'])
+def refresh_project_search(project_id):
+    """
+    Relance la recherche enregistrée du projet sur les seules notices ajoutées depuis la
+    dernière récolte de chaque source, et met en file de screening les seules notices nouvelles.
+    """
+    data = request.get_json(silent=True) or {}
+    max_results_per_db = data.get('max_results_per_db', 1000)
+    screen_new = data.get('screen_new', True)
+
+    session = Session()
+    try:
+        project = session.execute(text("""
+            SELECT search_query, databases_used, search_watermarks, profile_used, llm_cache_bypass
+            FROM projects WHERE id = :id
+        """), {'id': project_id}).fetchone()
+
+        if not project or not project.search_query:
+            return jsonify({'error': 'Aucune recherche enregistrée pour ce projet.'}), 400
+
+        screening = None
+        if screen_new:
+            profile_id = data.get('profile') or project.profile_used or 'standard'
+            profile_row = session.execute(text("""
+                SELECT * FROM analysis_profiles WHERE id = :id
+            """), {'id': profile_id}).fetchone()
+            if not profile_row:
+                return jsonify({'error': f"Profil invalide: '{profile_id}'"}), 400
+            screening = {
+                'profile': dict(profile_row._mapping),
+                'queue_name': processing_queue.name,
+                'use_llm_cache': not project.llm_cache_bypass,
+                'screening_batch_size': int(data.get('screening_batch_size') or config.SCREENING_BATCH_SIZE),
+                'screening_cascade': data.get('screening_cascade')
+            }
+
+        databases = json.loads(project.databases_used or '["pubmed"]')
+        since = json.loads(project.search_watermarks or '{}')
+
+        session.execute(text("""
+            UPDATE projects SET status = 'searching', updated_at = :updated_at WHERE id = :id
+        """), {'updated_at': datetime.now(), 'id': project_id})
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Erreur préparation recherche incrémentale: {e}")
+        return jsonify({'error': 'Erreur interne du serveur'}), 500
+    finally:
+        Session.remove()
+
+    job = background_queue.enqueue(
+        multi_database_search_task,
+        project_id=project_id,
+        query=project.search_query,
+        databases=databases,
+        max_results_per_db=max_results_per_db,
+        since=since,
+        screening=screening,
+        job_timeout='30m'
+    )
+
+    return jsonify({
+        'message': f'Recherche incrémentale lancée dans {len(databases)} base(s) de données',
+        'job_id': job.id,
+        'databases': databases,
+        'since': since
+    }), 202
+
 @api_bp.route('/projects/<project_id>/search-results', methods=['GET'])
 def get_project_search_results(project_id):
     """Récupère les résultats de recherche d'un projet."""
@@ -455,6 +665,37 @@ def get_project_search_results(project_id):
     finally:
         Session.remove()
 
+@api_bp.route('/projects/<project_id>/duplicates', methods=['GET'])
+def get_project_duplicates(project_id):
+    """Récupère les clusters de doublons inter-sources d'un projet (notice canonique + doublons écartés)."""
+    session = Session()
+    try:
+        rows = session.execute(text("""
+            SELECT d.canonical_article_id, s.title AS canonical_title, s.database_source AS canonical_source,
+                   d.article_id, d.database_source, d.title, d.doi, d.match_type, d.score
+            FROM search_result_duplicates d
+            LEFT JOIN search_results s ON s.project_id = d.project_id AND s.article_id = d.canonical_article_id
+            WHERE d.project_id = :project_id
+            ORDER BY d.canonical_article_id, d.created_at
+        """), {'project_id': project_id}).mappings().all()
+
+        clusters = {}
+        for row in rows:
+            cluster = clusters.setdefault(row['canonical_article_id'], {
+                'canonical_article_id': row['canonical_article_id'],
+                'title': row['canonical_title'],
+                'database_source': row['canonical_source'],
+                'duplicates': []
+            })
+            cluster['duplicates'].append({k: row[k] for k in ('article_id', 'database_source', 'title', 'doi', 'match_type', 'score')})
+
+        return jsonify({'clusters': list(clusters.values()), 'total_duplicates': len(rows)})
+    except Exception as e:
+        logger.error(f"Erreur récupération doublons: {e}")
+        return jsonify({"error": "Erreur interne du serveur"}), 500
+    finally:
+        Session.remove()
+
 @api_bp.route('/projects/<project_id>/search-stats', methods=['GET'])
 def get_project_search_stats(project_id):
     """Récupère les statistiques de recherche d'un projet."""
@@ -490,9 +731,14 @@ def get_queue_status():
         'Traitement': processing_queue,
         'Synthèse': synthesis_queue,
         'Analyse': analysis_queue,
-        'Tâches de fond': background_queue
+        'Tâches de fond': background_queue,
+        'Chat': chat_queue
     }
     status = {name: {'count': q.count} for name, q in queues.items()}
+    status['Planificateur LLM'] = {
+        'count': sum(model_scheduler.pending_counts().values()),
+        'by_model': model_scheduler.pending_counts()
+    }
     return jsonify(status)
 
 @api_bp.route('/queues/clear', methods=['POST'])
@@ -505,7 +751,8 @@ def clear_queues():
         'Traitement': processing_queue,
         'Synthèse': synthesis_queue,
         'Analyse': analysis_queue,
-        'Tâches de fond': background_queue
+        'Tâches de fond': background_queue,
+        'Chat': chat_queue
     }
 
     if queue_name in queues_map:
@@ -519,6 +766,10 @@ def clear_queues():
 
         return jsonify({'message': f'La file "{queue_name}" a été vidée.'}), 200
 
+    if queue_name == 'Planificateur LLM':
+        model_scheduler.clear()
+        return jsonify({'message': f'La file "{queue_name}" a été vidée.'}), 200
+
     return jsonify({'error': 'Nom de file invalide'}), 400
 
 # Paramètres Zotero
@@ -563,22 +814,28 @@ def import_from_zotero(project_id):
     except FileNotFoundError:
         return jsonify({'error': 'Veuillez configurer vos identifiants Zotero dans les paramètres.'}), 400
 
-    # Ajoute les nouveaux articles à la base de données
-    article_ids_to_process = add_manual_articles_to_project(project_id, manual_ids)
-
-    if not article_ids_to_process:
+    manual_ids = [a for a in manual_ids if a and isinstance(a, str) and a.strip()]
+    if not manual_ids:
         return jsonify({'error': 'Aucun article valide à importer pour ce projet.'}), 400
 
+    # Les articles sont résolus et ajoutés en tâche de fond, puis l'import Zotero est lancé sur ceux retenus
     job = background_queue.enqueue(
-        import_pdfs_from_zotero_task,
+        add_manual_articles_task,
         project_id=project_id,
-        pmids=article_ids_to_process,
-        zotero_user_id=zotero_config.get('user_id'),
-        zotero_api_key=zotero_config.get('api_key'),
+        article_ids=manual_ids,
+        follow_up={
+            'func': import_pdfs_from_zotero_task,
+            'ids_kwarg': 'pmids',
+            'kwargs': {
+                'project_id': project_id,
+                'zotero_user_id': zotero_config.get('user_id'),
+                'zotero_api_key': zotero_config.get('api_key')
+            }
+        },
         job_timeout='1h'
     )
 
-    return jsonify({'message': f'Import depuis Zotero lancé pour {len(article_ids_to_process)} articles.'}), 202
+    return jsonify({'message': f'Import depuis Zotero lancé pour {len(manual_ids)} articles.', 'job_id': job.id}), 202
 
 @api_bp.route('/projects/<project_id>/zotero-import-status', methods=['GET'])
 def get_zotero_import_status(project_id):
@@ -628,66 +885,6 @@ def import_zotero_file(project_id):
         return jsonify({"error": "Erreur interne du serveur lors de l'import."}), 500
         
 # Upload PDF en lot
-def add_manual_articles_to_project(project_id, article_ids):
-    """Ajoute une liste d'articles (PMID/DOI) à la base de données d'un projet."""
-    processed_ids = []
-    session = Session()
-    
-    try:
-        for article_id in article_ids:
-            if not article_id or not isinstance(article_id, str):
-                continue
-
-            exists = session.execute(text("""
-                SELECT 1 FROM search_results WHERE project_id = :project_id AND article_id = :article_id
-            """), {'project_id': project_id, 'article_id': article_id}).fetchone()
-
-            if exists:
-                processed_ids.append(article_id)
-                continue
-
-            details = fetch_article_details(article_id)
-            if details and details.get('title') != 'Erreur de récupération':
-                session.execute(text("""
-                    INSERT INTO search_results (id, project_id, article_id, title, abstract, database_source, created_at, url, doi, authors, journal, publication_date)
-                    VALUES (:id, :project_id, :article_id, :title, :abstract, :database_source, :created_at, :url, :doi, :authors, :journal, :publication_date)
-                """), {
-                    'id': str(uuid.uuid4()),
-                    'project_id': project_id,
-                    'article_id': article_id,
-                    'title': details.get('title', 'Titre non trouvé'),
-                    'abstract': details.get('abstract', ''),
-                    'database_source': details.get('database_source', 'manual'),
-                    'created_at': datetime.now(),
-                    'url': details.get('url'),
-                    'doi': details.get('doi'),
-                    'authors': details.get('authors'),
-                    'journal': details.get('journal'),
-                    'publication_date': details.get('publication_date')
-                })
-                processed_ids.append(article_id)
-
-        session.commit()
-
-        # Mettre à jour le compteur total
-        total_articles = session.execute(text("""
-            SELECT COUNT(*) FROM search_results WHERE project_id = :project_id
-        """), {'project_id': project_id}).scalar()
-
-        session.execute(text("""
-            UPDATE projects SET pmids_count = :count WHERE id = :project_id
-        """), {'count': total_articles, 'project_id': project_id})
-
-        session.commit()
-        return processed_ids
-
-    except Exception as e:
-        session.rollback()
-        logger.error(f"Erreur ajout articles manuels: {e}")
-        return []
-    finally:
-        Session.remove()
-
 @api_bp.route('/projects/<project_id>/upload-pdfs-bulk', methods=['POST'])
 def upload_pdfs_bulk(project_id):
     if 'files' not in request.files:
@@ -725,19 +922,24 @@ def fetch_online_pdfs(project_id):
     data = request.get_json()
     manual_ids = data.get('articles', [])
 
-    article_ids_to_process = add_manual_articles_to_project(project_id, manual_ids)
-
-    if not article_ids_to_process:
+    manual_ids = [a for a in manual_ids if a and isinstance(a, str) and a.strip()]
+    if not manual_ids:
         return jsonify({'error': 'Aucun article valide à traiter pour ce projet.'}), 400
 
+    # Les articles sont résolus et ajoutés en tâche de fond, puis la recherche de PDF est lancée sur ceux retenus
     job = background_queue.enqueue(
-        fetch_online_pdf_task,
+        add_manual_articles_task,
         project_id=project_id,
-        article_ids=article_ids_to_process,
+        article_ids=manual_ids,
+        follow_up={
+            'func': fetch_online_pdf_task,
+            'ids_kwarg': 'article_ids',
+            'kwargs': {'project_id': project_id}
+        },
         job_timeout='1h'
     )
 
-    return jsonify({'message': f'La recherche de PDF en ligne a été lancée pour {len(article_ids_to_process)} articles.'}), 202
+    return jsonify({'message': f'La recherche de PDF en ligne a été lancée pour {len(manual_ids)} articles.', 'job_id': job.id}), 202
 
 @api_bp.route('/projects/<project_id>/fetch-online-status', methods=['GET'])
 def get_fetch_online_status(project_id):
@@ -775,11 +977,14 @@ def run_indexing(project_id):
 # Chat
 @api_bp.route('/projects/<project_id>/chat', methods=['POST'])
 def handle_chat_message(project_id):
-    """Traite un message de chat."""
+    """Met en file une question de chat ; la réponse est diffusée via WebSocket."""
     data = request.get_json()
     question = data.get('question')
     profile_id = data.get('profile', 'standard')
 
+    if not question or not question.strip():
+        return jsonify({'error': 'La question est requise.'}), 400
+
     session = Session()
     try:
         profile_row = session.execute(text("""
@@ -791,13 +996,31 @@ def handle_chat_message(project_id):
 
         profile = dict(profile_row._mapping)
 
+        # L'identifiant peut venir du client, qui affiche la bulle de réponse avant l'envoi
         try:
-            result = answer_chat_question_task(project_id, question, profile)
-            return jsonify(result)
+            message_id = str(uuid.UUID(str(data.get('message_id'))))
+        except ValueError:
+            message_id = str(uuid.uuid4())
+
+        try:
+            job = chat_queue.enqueue(
+                answer_chat_question_task,
+                project_id=project_id,
+                question=question,
+                profile=profile,
+                message_id=message_id,
+                job_timeout=config.REQUEST_TIMEOUT + 60
+            )
         except Exception as e:
             logger.error(f"Erreur lors du chat pour le projet {project_id}: {e}")
             return jsonify({'error': 'Erreur lors de la génération de la réponse.'}), 500
 
+        return jsonify({
+            'status': 'queued',
+            'message_id': message_id,
+            'job_id': job.id
+        }), 202
+
     finally:
         Session.remove()
 
@@ -828,6 +1051,16 @@ def get_ollama_local_models():
         logger.error(f"Erreur de communication avec Ollama: {e}")
         return jsonify({'error': 'Impossible de contacter le service Ollama.'}), 503
 
+@api_bp.route('/ollama/hosts', methods=['GET'])
+def get_ollama_hosts():
+    """Récupère l'état des instances Ollama (santé, modèles chargés, requêtes en cours)."""
+    return jsonify(ollama_client.pool.snapshot())
+
+@api_bp.route('/ollama/breakers', methods=['GET'])
+def get_ollama_breakers():
+    """Récupère l'état des disjoncteurs par hôte et modèle (avec le délai adaptatif courant)."""
+    return jsonify(ollama_client.breakers_snapshot())
+
 @api_bp.route('/ollama/pull', methods=['POST'])
 def pull_ollama_model():
     """Lance le téléchargement d'un modèle Ollama."""
@@ -874,6 +1107,7 @@ def update_prompt(prompt_id):
             UPDATE prompts SET template = :template WHERE id = :id
         """), {'template': template, 'id': prompt_id})
         session.commit()
+        publish_invalidation(redis_conn, 'prompt')
 
         return jsonify({'message': 'Prompt mis à jour.'})
     except Exception as e:
@@ -965,6 +1199,7 @@ def update_analysis_profile(profile_id):
             return jsonify({'error': 'Profil non trouvé ou non modifiable'}), 404
 
         session.commit()
+        publish_invalidation(redis_conn, 'profile', profile_id)
         return jsonify({'message': 'Profil mis à jour avec succès'})
 
     except IntegrityError:
@@ -990,6 +1225,7 @@ def delete_analysis_profile(profile_id):
             return jsonify({'error': 'Profil non trouvé ou non modifiable'}), 404
 
         session.commit()
+        publish_invalidation(redis_conn, 'profile', profile_id)
         return jsonify({'message': 'Profil supprimé avec succès'})
 
     except Exception as e:
@@ -1068,12 +1304,14 @@ def delete_project(project_id):
     try:
         # Supprimer dans l'ordre à cause des clés étrangères
         session.execute(text("DELETE FROM search_results WHERE project_id = :id"), {'id': project_id})
+        session.execute(text("DELETE FROM search_result_duplicates WHERE project_id = :id"), {'id': project_id})
         session.execute(text("DELETE FROM extractions WHERE project_id = :id"), {'id': project_id})
         session.execute(text("DELETE FROM processing_log WHERE project_id = :id"), {'id': project_id})
         session.execute(text("DELETE FROM extraction_grids WHERE project_id = :id"), {'id': project_id})
         session.execute(text("DELETE FROM chat_messages WHERE project_id = :id"), {'id': project_id})
         session.execute(text("DELETE FROM projects WHERE id = :id"), {'id': project_id})
         session.commit()
+        publish_invalidation(redis_conn, 'grid')
 
         return jsonify({'message': 'Projet supprimé'}), 200
 
@@ -1182,6 +1420,7 @@ def update_extraction_grid(project_id, grid_id):
             return jsonify({'error': 'Grille non trouvée ou n\'appartient pas à ce projet.'}), 404
 
         session.commit()
+        publish_invalidation(redis_conn, 'grid', grid_id)
         return jsonify({'message': 'Grille mise à jour avec succès.'})
 
     except Exception as e:
@@ -1205,6 +1444,7 @@ def delete_extraction_grid(project_id, grid_id):
             return jsonify({'error': 'Grille non trouvée ou n\'appartient pas à ce projet.'}), 404
 
         session.commit()
+        publish_invalidation(redis_conn, 'grid', grid_id)
         return jsonify({'message': 'Grille supprimée avec succès.'})
 
     except Exception as e:
@@ -1272,6 +1512,12 @@ def run_project_pipeline(project_id):
     profile_id = data.get('profile', 'standard')
     custom_grid_id = data.get('custom_grid_id')
     analysis_mode = data.get('analysis_mode', 'screening')
+    bypass_cache = data.get('bypass_cache')
+    screening_batch_size = int(data.get('screening_batch_size') or config.SCREENING_BATCH_SIZE)
+    screening_cascade = data.get('screening_cascade')
+    extraction_strategy = data.get('extraction_strategy')
+    microbatch_size = int(data.get('microbatch_size') or config.ARTICLE_MICROBATCH_SIZE)
+    incremental = bool(data.get('incremental', False))
 
     if not selected_articles:
         return jsonify({'error': 'La liste d\'articles est requise.'}), 400
@@ -1288,14 +1534,25 @@ def run_project_pipeline(project_id):
         profile = dict(profile_row._mapping)
 
         project = session.execute(text("""
-            SELECT analysis_mode FROM projects WHERE id = :id
+            SELECT analysis_mode, llm_cache_bypass FROM projects WHERE id = :id
         """), {'id': project_id}).fetchone()
 
         analysis_mode = project.analysis_mode if project else 'screening'
 
-        # Nettoyage et mise à jour du projet
-        session.execute(text("DELETE FROM extractions WHERE project_id = :id"), {'id': project_id})
-        session.execute(text("DELETE FROM processing_log WHERE project_id = :id"), {'id': project_id})
+        # Le drapeau de contournement du cache est mémorisé par projet
+        if bypass_cache is None:
+            bypass_cache = bool(project.llm_cache_bypass) if project else False
+        else:
+            session.execute(text("""
+                UPDATE projects SET llm_cache_bypass = :bypass WHERE id = :id
+            """), {'bypass': bool(bypass_cache), 'id': project_id})
+
+        # Nettoyage et mise à jour du projet. En mode incrémental, les extractions existantes
+        # sont conservées : les workers ignorent celles dont l'empreinte est inchangée, ce qui
+        # permet aussi de reprendre un traitement interrompu en le relançant.
+        if not incremental:
+            session.execute(text("DELETE FROM extractions WHERE project_id = :id"), {'id': project_id})
+            session.execute(text("DELETE FROM processing_log WHERE project_id = :id"), {'id': project_id})
 
         session.execute(text("""
             UPDATE projects SET
@@ -1315,19 +1572,18 @@ def run_project_pipeline(project_id):
 
         session.commit()
 
-        # Lancer les tâches
-        for article_id in selected_articles:
-            processing_queue.enqueue(
-                process_single_article_task,
-                project_id=project_id,
-                article_id=article_id,
-                profile=profile,
-                analysis_mode=analysis_mode,
-                custom_grid_id=custom_grid_id,
-                job_timeout=1800
-            )
+        enqueue_article_jobs(
+            project_id, selected_articles, profile, analysis_mode, processing_queue.name,
+            custom_grid_id=custom_grid_id,
+            use_llm_cache=not bypass_cache,
+            screening_batch_size=screening_batch_size,
+            screening_cascade=screening_cascade,
+            extraction_strategy=extraction_strategy,
+            microbatch_size=microbatch_size,
+            incremental=incremental
+        )
 
-        return jsonify({"status": "processing"}), 202
+        return jsonify({"status": "processing", "incremental": incremental}), 202
 
     except Exception as e:
         session.rollback()
@@ -1353,21 +1609,26 @@ def run_synthesis_endpoint(project_id):
 
         profile_to_use = dict(profile_row._mapping)
 
-        job = synthesis_queue.enqueue(
+        job_id = enqueue_llm_job(
+            synthesis_queue,
             run_synthesis_task,
+            profile_to_use['synthesis_model'],
+            job_timeout=3600,
+            interactive=True,
+            keep_alive=OllamaClient.keep_alive_for(profile_id),
             project_id=project_id,
-            profile=profile_to_use,
-            job_timeout=3600
+            profile=profile_to_use
         )
 
         session.execute(text("""
             UPDATE projects SET status = 'synthesizing', job_id = :job_id WHERE id = :id
-        """), {'job_id': job.id, 'id': project_id})
+        """), {'job_id': job_id, 'id': project_id})
         session.commit()
 
         return jsonify({
             "status": "synthesizing",
-            "message": "La synthèse des résultats a été lancée."
+            "message": "La synthèse des résultats a été lancée.",
+            "job_id": job_id
         }), 202
 
     except Exception as e:
@@ -1649,13 +1910,15 @@ def export_extractions_csv(project_id):
 @api_bp.route('/projects/<project_id>/generate-discussion', methods=['POST'])
 def generate_discussion_endpoint(project_id):
     """Lance la génération de la discussion."""
-    analysis_queue.enqueue(run_discussion_generation_task, project_id=project_id, job_timeout=1800)
+    enqueue_llm_job(analysis_queue, run_discussion_generation_task, get_project_model(project_id, 'synthesis'),
+                    job_timeout=1800, interactive=True, project_id=project_id)
     return jsonify({"message": "Génération de la discussion lancée."}), 202
 
 @api_bp.route('/projects/<project_id>/generate-knowledge-graph', methods=['POST'])
 def generate_knowledge_graph_endpoint(project_id):
     """Lance la génération du graphe de connaissances."""
-    analysis_queue.enqueue(run_knowledge_graph_task, project_id=project_id, job_timeout=1800)
+    enqueue_llm_job(analysis_queue, run_knowledge_graph_task, get_project_model(project_id, 'extract'),
+                    job_timeout=1800, interactive=True, project_id=project_id)
     return jsonify({"message": "Génération du graphe de connaissances lancée."}), 202
 
 @api_bp.route('/projects/<project_id>/generate-prisma-flow', methods=['POST'])
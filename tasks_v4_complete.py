@@ -7,10 +7,10 @@ import re
 import subprocess
 import uuid
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from urllib.parse import urljoin, quote
 import bs4
-from rq import Queue
+from rq import Queue, get_current_job
 import redis
 import matplotlib
 matplotlib.use('Agg')
@@ -19,7 +19,6 @@ from scipy import stats
 import numpy as np
 import pandas as pd
 import matplotlib.ticker as mticker
-import PyPDF2
 from pyzotero import zotero
 from config_v4 import get_config
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -28,13 +27,35 @@ import chromadb
 from chromadb.utils import embedding_functions
 from socketio import RedisManager
 import random
+import asyncio
 import hashlib
+import bisect
+import functools
+import contextlib
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import xml.etree.ElementTree as ET
 import arxiv
 import crossref_commons.retrieval as cr
 import os
+import io
+import csv
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+from utils.ollama_client import OllamaClient
+from utils.circuit_breaker import CircuitOpenError
+from utils.llm_cache import LLMResponseCache, make_cache_key
+from utils.model_scheduler import ModelAffinityScheduler
+from utils.search_connectors import SearchConnector, run_search_connectors
+from utils.rate_limiter import RateLimiter
+from utils.deduplication import Deduplicator
+from utils.config_cache import ConfigCache
+from utils.text_store import PdfTextStore, join_pages, split_pages
+from utils.pdf_extraction import accepted_extractor_versions, extract_pdf_pages, extractor_version
+from utils.structured_output import (
+    SCREENING_SCHEMA, BATCH_SCREENING_SCHEMA, schema_for_fields, fill_missing_fields, repair_json, matches_schema
+)
 
 # Configuration
 config = get_config()
@@ -49,19 +70,43 @@ Session = sessionmaker(bind=engine)
 sio_redis_manager = RedisManager(config.REDIS_URL, write_only=True)
 
 
+# Client Ollama partagé (session keep-alive, concurrence par modèle via Redis)
+ollama_client = OllamaClient(config.OLLAMA_BASE_URLS, redis_conn)
+llm_cache = LLMResponseCache(Session)
+pdf_text_store = PdfTextStore(Session)
+model_scheduler = ModelAffinityScheduler(redis_conn)
+rate_limiter = RateLimiter(redis_conn)
+# Prompts, grilles et profils lus à chaque article, invalidés par le serveur via pub/sub
+config_cache = ConfigCache(redis_conn)
+
 # Models
 embedding_model = SentenceTransformer(config.EMBEDDING_MODEL)
 
+@functools.lru_cache(maxsize=64)
+def get_chroma_client(path: str):
+    """Client ChromaDB d'un projet, créé au premier accès puis partagé par les tâches du worker."""
+    return chromadb.PersistentClient(path=path)
+
 # Variables d'environnement pour la robustesse API
 UNPAYWALL_EMAIL = config.UNPAYWALL_EMAIL
 HTTP_MAX_RETRIES = config.MAX_RETRIES
 HTTP_BACKOFF_BASE = 1.6
 MIN_CHUNK_LEN = 250
 NORMALIZE_LOWER = False
+# Moteurs d'extraction PDF (et format du texte) dont les entrées du stock pdf_texts sont réutilisées
+PDF_TEXT_EXTRACTOR_VERSIONS = accepted_extractor_versions()
 EMBED_BATCH = 32
 USE_QUERY_EMBED = True
+CHAT_STREAM_FLUSH_INTERVAL = 0.1  # secondes entre deux envois groupés de tokens
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://ollama:11434")
 
+class RateLimitedArxivClient(arxiv.Client):
+    """Client arXiv dont chaque page de résultats (une requête à l'API) attend son créneau auprès du limiteur partagé."""
+
+    def _parse_feed(self, url, *args, **kwargs):
+        rate_limiter.wait_for_url(url)
+        return super()._parse_feed(url, *args, **kwargs)
+
 class DatabaseManager:
     """Gestionnaire centralisé pour les requêtes multi-bases de données."""
 
@@ -111,192 +156,464 @@ class DatabaseManager:
 
         return databases
 
-    def search_pubmed(self, query, max_results=50):
-        """Recherche dans PubMed."""
-        results = []
-        try:
-            # Recherche avec E-utilities
-            search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-            search_params = {
-                'db': 'pubmed',
-                'term': query,
-                'retmax': max_results,
-                'retmode': 'json'
-            }
+    def get_connectors(self, databases: list, on_progress=None, on_records=None, since: dict = None) -> list:
+        """
+        Connecteurs de recherche pour les bases demandées (les bases inconnues sont ignorées).
+        Pour les sources paginées, `on_progress(db_name, fetched, total)` est appelée après chaque lot
+        et `on_records(db_name, records)` reçoit les notices lot par lot (elles ne sont alors pas
+        renvoyées en fin de recherche).
+        `since` ({base: date}) limite PubMed, CrossRef et arXiv aux notices ajoutées depuis cette date ;
+        ces récoltes incrémentales paginent jusqu'au bout de la période (`SEARCH_INCREMENTAL_MAX_RESULTS`
+        au plus). Les autres sources sont interrogées en entier (les notices déjà connues sont écartées
+        à l'ingestion). `connector.drained` indique en fin de recherche si la source a tout remis.
+        """
+        since = since or {}
+
+        # Fabriques recevant les rappels (progress, records, drained) déjà liés à la base et au connecteur
+        search_funcs = {
+            'pubmed': lambda progress, records, drained: functools.partial(
+                self.search_pubmed, on_progress=progress, on_records=records, on_drained=drained,
+                since=since.get('pubmed')),
+            'arxiv': lambda progress, records, drained: functools.partial(
+                self.search_arxiv, on_drained=drained, since=since.get('arxiv')),
+            'crossref': lambda progress, records, drained: functools.partial(
+                self.search_crossref, on_progress=progress, on_records=records, on_drained=drained,
+                since=since.get('crossref')),
+            'ieee': lambda progress, records, drained: self.search_ieee
+        }
+        connectors = []
+        for db_name in databases:
+            if db_name not in search_funcs:
+                print(f"⚠️ Base de données inconnue: {db_name}")
+                continue
+            connector = SearchConnector(db_name)
+            # Les rappels d'une source hors délai n'écrivent plus rien (voir SearchConnector.cancel)
+            search_func = search_funcs[db_name](
+                connector.guard(functools.partial(on_progress, db_name) if on_progress else None),
+                connector.guard(functools.partial(on_records, db_name) if on_records else None),
+                connector.guard(connector.mark_drained))
+            if since.get(db_name):
+                search_func = functools.partial(self._search_incremental, search_func)
+            connector.search_func = search_func
+            connectors.append(connector)
+        return connectors
+
+    @staticmethod
+    def _search_incremental(search_func, query, max_results):
+        """Récolte incrémentale : `max_results` ne doit pas laisser de notices entre deux récoltes."""
+        return search_func(query, max(max_results, config.SEARCH_INCREMENTAL_MAX_RESULTS))
+
+    def _eutils_params(self, **params) -> dict:
+        """Paramètres communs des E-utilities (clé API NCBI si configurée)."""
+        if self.config['pubmed']['api_key']:
+            params['api_key'] = self.config['pubmed']['api_key']
+        return params
+
+    def _pubmed_esearch(self, query, mindate=None, maxdate=None, usehistory=False, datetype='pdat') -> dict:
+        params = {'db': 'pubmed', 'term': query, 'retmax': 0, 'retmode': 'json'}
+        if usehistory:
+            params['usehistory'] = 'y'
+        if mindate:
+            params.update(datetype=datetype, mindate=mindate.strftime('%Y/%m/%d'), maxdate=maxdate.strftime('%Y/%m/%d'))
+        response = http_get_with_retries("https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi",
+                                         timeout=30, params=self._eutils_params(**params))
+        return response.json().get('esearchresult', {})
+
+    def _plan_pubmed_windows(self, query, start: date, end: date, search_data: dict = None, datetype='pdat',
+                             needed: int = None) -> list:
+        """
+        Découpe la requête en fenêtres de dates (de publication, ou d'entrée avec `edat`) contenant
+        chacune au plus `PUBMED_MAX_RECORDS_PER_QUERY` notices (limite de pagination d'ESearch).
+        Retourne [(début, fin, nombre, résultat ESearch)], les plus récentes d'abord ; le résultat
+        ESearch (WebEnv/query_key) de chaque fenêtre est repris tel quel par la récolte. Une journée
+        au-delà de la limite est gardée telle quelle. Avec `needed`, le découpage s'arrête dès que les
+        fenêtres planifiées contiennent ce nombre de notices (les périodes plus anciennes ne sont pas interrogées).
+        """
+        if search_data is None:
+            search_data = self._pubmed_esearch(query, start, end, usehistory=True, datetype=datetype)
+        count = int(search_data.get('count', 0))
+        if count == 0:
+            return []
+        if count <= self.config['pubmed']['max_records_per_query'] or start >= end:
+            return [(start, end, count, search_data)]
+        middle = start + (end - start) / 2
+        newer = self._plan_pubmed_windows(query, middle + timedelta(days=1), end, datetype=datetype, needed=needed)
+        held = sum(window[2] for window in newer)
+        if needed is not None and held >= needed:
+            return newer
+        return newer + self._plan_pubmed_windows(query, start, middle, datetype=datetype,
+                                                 needed=None if needed is None else needed - held)
+
+    def _harvest_pubmed_window(self, query, limit, on_batch, mindate=None, maxdate=None, datetype='pdat',
+                               search_data: dict = None):
+        """
+        Récupère au plus `limit` notices d'une requête (ou d'une fenêtre de dates) par lots efetch,
+        à partir du résultat ESearch (usehistory=y) déjà obtenu, ou d'un nouvel ESearch à défaut.
+        """
+        if search_data is None:
+            search_data = self._pubmed_esearch(query, mindate, maxdate, usehistory=True, datetype=datetype)
+        total = min(int(search_data.get('count', 0)), limit, self.config['pubmed']['max_records_per_query'])
+        webenv, query_key = search_data.get('webenv'), search_data.get('querykey')
+        if not total or not webenv:
+            return
 
-            response = requests.get(search_url, params=search_params, timeout=30)
-            response.raise_for_status()
-            search_data = response.json()
+        fetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+        batch_size = self.config['pubmed']['batch_size']
+        for retstart in range(0, total, batch_size):
+            response = http_get_with_retries(fetch_url, timeout=120, stream=True, params=self._eutils_params(
+                db='pubmed', WebEnv=webenv, query_key=query_key, retstart=retstart,
+                retmax=min(batch_size, total - retstart), retmode='xml'
+            ))
+            response.raw.decode_content = True
+            try:
+                batch = list(self._iter_pubmed_articles(response.raw))
+            except ET.ParseError as e:
+                print(f"⚠️ Lot PubMed {retstart}-{retstart + batch_size} illisible: {e}")
+                batch = []
+            finally:
+                response.close()
+            on_batch(batch)
+
+    def search_pubmed(self, query, max_results=50, on_progress=None, on_records=None, on_drained=None,
+                      since: date = None):
+        """
+        Recherche dans PubMed via le serveur d'historique des E-utilities :
+        un esearch (usehistory=y) puis des efetch par lots de `PUBMED_EFETCH_BATCH_SIZE`
+        à partir du WebEnv/query_key, sans jamais transmettre la liste des PMID.
+
+        Au-delà de la limite de pagination d'ESearch, la requête est découpée en fenêtres
+        de dates de publication (les plus récentes d'abord), récoltées en parallèle au débit
+        NCBI autorisé (limiteur partagé) puis fusionnées sans doublons.
+        Avec `on_records`, chaque lot lui est remis dès sa lecture et n'est pas conservé.
+
+        Avec `since` (récolte incrémentale), seules les notices entrées dans PubMed depuis cette
+        date sont demandées (`datetype=edat`) ; une erreur est alors propagée plutôt qu'ignorée.
+        `on_drained()` est appelée si toutes les notices annoncées par ESearch ont été récoltées.
+        """
+        results = []
+        seen_pmids = set()
+        progress = {'fetched': 0}
+        lock = threading.Lock()
+        datetype = 'edat' if since else 'pdat'
+        bounds = (since, date.today()) if since else (None, None)
 
-            pmids = search_data.get('esearchresult', {}).get('idlist', [])
-            if not pmids:
+        try:
+            search_data = self._pubmed_esearch(query, *bounds, usehistory=True, datetype=datetype)
+            count = int(search_data.get('count', 0))
+            total = min(count, max_results)
+            if not total:
+                if on_drained:
+                    on_drained()
                 return results
 
-            # Récupérer les détails
-            fetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-            fetch_params = {
-                'db': 'pubmed',
-                'id': ','.join(pmids),
-                'retmode': 'xml'
-            }
-
-            response = requests.get(fetch_url, params=fetch_params, timeout=30)
-            response.raise_for_status()
-
-            # Parser le XML
-            root = ET.fromstring(response.text)
-            for article in root.iter('PubmedArticle'):
-                try:
-                    # PMID
-                    pmid_elem = article.find('.//PMID')
-                    pmid = pmid_elem.text if pmid_elem is not None else ''
-
-                    # Titre
-                    title_elem = article.find('.//ArticleTitle')
-                    title = title_elem.text if title_elem is not None else ''
-
-                    # Abstract
-                    abstract_elem = article.find('.//AbstractText')
-                    abstract = abstract_elem.text if abstract_elem is not None else ''
-
-                    # Auteurs
-                    authors = []
-                    for author in article.iter('Author'):
-                        lastname = author.find('LastName')
-                        forename = author.find('ForeName')
-                        if lastname is not None and forename is not None:
-                            authors.append(f"{forename.text} {lastname.text}")
-
-                    # Journal
-                    journal_elem = article.find('.//Journal/Title')
-                    journal = journal_elem.text if journal_elem is not None else ''
-
-                    # Date de publication
-                    pub_date = article.find('.//PubDate/Year')
-                    publication_date = pub_date.text if pub_date is not None else ''
-
-                    # DOI
-                    doi = ''
-                    for article_id in article.iter('ArticleId'):
-                        if article_id.get('IdType') == 'doi':
-                            doi = article_id.text
-                            break
-
-                    results.append({
-                        'id': pmid,
-                        'title': title,
-                        'abstract': abstract,
-                        'authors': '; '.join(authors),
-                        'publication_date': publication_date,
-                        'journal': journal,
-                        'doi': doi,
-                        'url': f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
-                        'database_source': 'pubmed'
-                    })
-
-                except Exception as e:
-                    print(f"Erreur parsing article PubMed: {e}")
-                    continue
+            # Une seule requête suffit tant que le nombre de notices demandées tient dans la pagination
+            if total <= self.config['pubmed']['max_records_per_query']:
+                windows = [(*bounds, total, search_data)]
+            else:
+                start = since or date(self.config['pubmed']['min_year'], 1, 1)
+                end = date.today() if since else date(date.today().year + 1, 12, 31)  # publications datées de l'année suivante
+                planned = self._plan_pubmed_windows(query, start, end, search_data=search_data, datetype=datetype,
+                                                    needed=total)
+                windows, remaining = [], total
+                for window_start, window_end, window_count, window_search in planned:
+                    if remaining <= 0:
+                        break
+                    windows.append((window_start, window_end, min(window_count, remaining), window_search))
+                    remaining -= window_count
+                print(f"📅 PubMed: {count} notices, récolte en {len(windows)} fenêtre(s) de dates")
+
+            def on_batch(batch):
+                with lock:
+                    new_records = [r for r in batch if r['id'] not in seen_pmids]
+                    seen_pmids.update(r['id'] for r in new_records)
+                    progress['fetched'] += len(new_records)
+                    if on_records:
+                        on_records(new_records)
+                    else:
+                        results.extend(new_records)
+                    if on_progress:
+                        on_progress(progress['fetched'], total)
+
+            failed = False
+            with ThreadPoolExecutor(max_workers=self.config['pubmed']['harvest_workers']) as executor:
+                futures = [executor.submit(self._harvest_pubmed_window, query, limit, on_batch,
+                                           window_start, window_end, datetype, window_search)
+                           for window_start, window_end, limit, window_search in windows]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed = True
+                        print(f"Erreur récolte d'une fenêtre PubMed: {e}")
+                        if since:
+                            raise
+            if on_drained and not failed and progress['fetched'] >= count:
+                on_drained()
 
         except Exception as e:
             print(f"Erreur recherche PubMed: {e}")
+            if since:
+                raise
 
         return results
 
-    def search_arxiv(self, query, max_results=50):
-        """Recherche dans arXiv."""
+    @staticmethod
+    def _pubmed_article_to_dict(article) -> dict:
+        """Convertit un élément <PubmedArticle> en article (toutes les sections du résumé)."""
+        def text_of(elem):
+            return ''.join(elem.itertext()).strip() if elem is not None else ''
+
+        pmid = text_of(article.find('.//PMID'))
+
+        abstract_parts = []
+        for section in article.iterfind('.//Abstract/AbstractText'):
+            section_text = text_of(section)
+            label = section.get('Label')
+            if section_text:
+                abstract_parts.append(f"{label}: {section_text}" if label else section_text)
+
+        authors = []
+        for author in article.iterfind('.//AuthorList/Author'):
+            lastname = author.find('LastName')
+            forename = author.find('ForeName')
+            if lastname is not None and forename is not None:
+                authors.append(f"{forename.text} {lastname.text}")
+
+        # DOI de l'article lui-même (et non ceux de la liste de références)
+        doi = ''
+        for article_id in article.iterfind('PubmedData/ArticleIdList/ArticleId'):
+            if article_id.get('IdType') == 'doi':
+                doi = text_of(article_id)
+                break
+
+        return {
+            'id': pmid,
+            'title': text_of(article.find('.//ArticleTitle')),
+            'abstract': '\n'.join(abstract_parts),
+            'authors': '; '.join(authors),
+            'publication_date': text_of(article.find('.//PubDate/Year')),
+            'journal': text_of(article.find('.//Journal/Title')),
+            'doi': doi,
+            'url': f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+            'database_source': 'pubmed'
+        }
+
+    def _iter_pubmed_articles(self, source):
+        """
+        Lit une réponse efetch (XML PubMed) au fil de l'eau avec iterparse et produit les articles
+        un par un ; chaque élément est libéré après conversion pour garder une mémoire constante.
+        """
+        root = None
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            if root is None:
+                root = elem
+            if event != 'end' or elem.tag != 'PubmedArticle':
+                continue
+            try:
+                yield self._pubmed_article_to_dict(elem)
+            except Exception as e:
+                print(f"Erreur parsing article PubMed: {e}")
+            root.clear()
+
+    def search_arxiv(self, query, max_results=50, on_drained=None, since: date = None):
+        """
+        Recherche dans arXiv. Avec `since`, les prépublications sont parcourues de la plus
+        récemment soumise à la plus ancienne et la lecture s'arrête à cette date.
+        `on_drained()` est appelée si la lecture s'est arrêtée avant `max_results` (tout est lu).
+        """
         results = []
         try:
-            client = arxiv.Client()
+            client = RateLimitedArxivClient()
             search = arxiv.Search(
                 query=query,
-                max_results=max_results,
-                sort_by=arxiv.SortCriterion.Relevance
+                max_results=max_results + 1,  # une notice de plus : indique si la récolte est tronquée
+                sort_by=arxiv.SortCriterion.SubmittedDate if since else arxiv.SortCriterion.Relevance,
+                sort_order=arxiv.SortOrder.Descending
             )
 
+            drained = True
             for paper in client.results(search):
-                results.append({
-                    'id': paper.entry_id.split('/')[-1],
-                    'title': paper.title,
-                    'abstract': paper.summary,
-                    'authors': '; '.join([str(author) for author in paper.authors]),
-                    'publication_date': paper.published.strftime('%Y-%m-%d') if paper.published else '',
-                    'journal': ', '.join(paper.categories),
-                    'doi': paper.doi or '',
-                    'url': paper.entry_id,
-                    'database_source': 'arxiv'
-                })
+                if since and paper.published and paper.published.date() < since:
+                    break
+                if len(results) >= max_results:
+                    drained = False
+                    break
+                results.append(self._arxiv_paper_to_dict(paper))
+            if on_drained and drained:
+                on_drained()
 
         except Exception as e:
             print(f"Erreur recherche arXiv: {e}")
+            if since:
+                raise
 
         return results
 
-    def search_crossref(self, query, max_results=50):
-        """Recherche dans CrossRef."""
+    @staticmethod
+    def _arxiv_paper_to_dict(paper) -> dict:
+        """Convertit un résultat de la bibliothèque arxiv en article."""
+        return {
+            'id': paper.entry_id.split('/')[-1],
+            'title': paper.title,
+            'abstract': paper.summary,
+            'authors': '; '.join([str(author) for author in paper.authors]),
+            'publication_date': paper.published.strftime('%Y-%m-%d') if paper.published else '',
+            'journal': ', '.join(paper.categories),
+            'doi': paper.doi or '',
+            'url': paper.entry_id,
+            'database_source': 'arxiv'
+        }
+
+    def fetch_pubmed_records(self, pmids: list) -> dict:
+        """Notices complètes (DOI compris) d'une liste de PMID, en un efetch par lot de `PUBMED_EFETCH_BATCH_SIZE`."""
+        records = {}
+        batch_size = self.config['pubmed']['batch_size']
+        for i in range(0, len(pmids), batch_size):
+            response = http_get_with_retries("https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi",
+                                             timeout=120, stream=True, params=self._eutils_params(
+                                                 db='pubmed', id=','.join(pmids[i:i + batch_size]), retmode='xml'))
+            response.raw.decode_content = True
+            try:
+                records.update((r['id'], r) for r in self._iter_pubmed_articles(response.raw))
+            finally:
+                response.close()
+        return records
+
+    def fetch_crossref_records(self, dois: list, batch_size: int = 50) -> dict:
+        """Notices CrossRef d'une liste de DOI, par requêtes `filter=doi:…,doi:…` ; clés en minuscules."""
+        records = {}
+        for i in range(0, len(dois), batch_size):
+            batch = dois[i:i + batch_size]
+            response = http_get_with_retries("https://api.crossref.org/works", timeout=60, params={
+                'filter': ','.join(f"doi:{doi}" for doi in batch),
+                'rows': len(batch),
+                'select': self.CROSSREF_SELECT,
+                'mailto': self.config['crossref']['email']
+            })
+            for item in response.json().get('message', {}).get('items', []):
+                record = self._crossref_item_to_dict(item)
+                records[record['doi'].lower()] = record
+        return records
+
+    def fetch_arxiv_records(self, arxiv_ids: list, batch_size: int = 100) -> dict:
+        """Notices arXiv d'une liste d'identifiants (`id_list`), indexées par identifiant sans version."""
+        records = {}
+        client = RateLimitedArxivClient()
+        for i in range(0, len(arxiv_ids), batch_size):
+            batch = arxiv_ids[i:i + batch_size]
+            for paper in client.results(arxiv.Search(id_list=batch, max_results=len(batch))):
+                record = self._arxiv_paper_to_dict(paper)
+                records[re.sub(r'v\d+$', '', record['id'])] = record
+        return records
+
+    CROSSREF_SELECT = 'DOI,URL,title,author,container-title,published-print,issued,abstract'
+
+    @staticmethod
+    def _crossref_item_to_dict(item: dict) -> dict:
+        """Convertit une notice CrossRef (/works) en article."""
+        # Titre
+        title = ''
+        if 'title' in item and item['title']:
+            title = item['title'][0]
+
+        # Auteurs
+        authors = []
+        if 'author' in item:
+            for author in item['author']:
+                given = author.get('given', '')
+                family = author.get('family', '')
+                if given and family:
+                    authors.append(f"{given} {family}")
+
+        # Journal
+        journal = ''
+        if 'container-title' in item and item['container-title']:
+            journal = item['container-title'][0]
+
+        # Date de publication (version imprimée, sinon date d'émission)
+        publication_date = ''
+        date_field = item.get('published-print') or item.get('issued') or {}
+        date_parts = (date_field.get('date-parts') or [[]])[0]
+        if date_parts and date_parts[0]:
+            publication_date = f"{date_parts[0]}"
+            if len(date_parts) > 1:
+                publication_date += f"-{date_parts[1]:02d}"
+            if len(date_parts) > 2:
+                publication_date += f"-{date_parts[2]:02d}"
+
+        # DOI et URL
+        doi = item.get('DOI', '')
+        url = f"https://doi.org/{doi}" if doi else item.get('URL', '')
+
+        return {
+            'id': doi or item.get('URL', '').split('/')[-1],
+            'title': title,
+            'abstract': item.get('abstract', ''),
+            'authors': '; '.join(authors),
+            'publication_date': publication_date,
+            'journal': journal,
+            'doi': doi,
+            'url': url,
+            'database_source': 'crossref'
+        }
+
+    def search_crossref(self, query, max_results=50, on_progress=None, on_records=None, on_drained=None,
+                        since: date = None):
+        """
+        Recherche dans CrossRef avec pagination profonde par curseur (`cursor=*`) et projection
+        `select=` limitée aux champs utilisés. Avec `on_records`, chaque page lui est remise
+        dès sa réception et n'est pas conservée. Avec `since`, seules les notices indexées
+        depuis cette date sont demandées (`from-index-date`). `on_drained()` est appelée
+        si toutes les notices annoncées (`total-results`) ont été lues.
+        """
         results = []
+        fetched = 0
+        available = None
         try:
             url = "https://api.crossref.org/works"
-            params = {
-                'query': query,
-                'rows': max_results,
-                'mailto': self.config['crossref']['email']
-            }
-
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+            page_size = self.config['crossref']['page_size']
+            cursor = '*'
+            total = max_results
+            while fetched < max_results:
+                params = {
+                    'query': query,
+                    'rows': min(page_size, max_results - fetched),
+                    'cursor': cursor,
+                    'select': self.CROSSREF_SELECT,
+                    'mailto': self.config['crossref']['email']
+                }
+                if since:
+                    params['filter'] = f"from-index-date:{since.isoformat()}"
+                response = http_get_with_retries(url, timeout=60, params=params)
+                message = response.json().get('message', {})
+                items = message.get('items', [])
+                if not items:
+                    available = fetched
+                    break
 
-            items = data.get('message', {}).get('items', [])
-            for item in items:
-                # Titre
-                title = ''
-                if 'title' in item and item['title']:
-                    title = item['title'][0]
+                available = message.get('total-results', available)
+                total = min(message.get('total-results', max_results), max_results)
+                page = [self._crossref_item_to_dict(item) for item in items]
+                fetched += len(page)
+                if on_records:
+                    on_records(page)
+                else:
+                    results.extend(page)
+                if on_progress:
+                    on_progress(fetched, total)
 
-                # Auteurs
-                authors = []
-                if 'author' in item:
-                    for author in item['author']:
-                        given = author.get('given', '')
-                        family = author.get('family', '')
-                        if given and family:
-                            authors.append(f"{given} {family}")
-
-                # Journal
-                journal = ''
-                if 'container-title' in item and item['container-title']:
-                    journal = item['container-title'][0]
-
-                # Date de publication
-                publication_date = ''
-                if 'published-print' in item:
-                    date_parts = item['published-print'].get('date-parts', [[]])[0]
-                    if date_parts:
-                        publication_date = f"{date_parts[0]}"
-                        if len(date_parts) > 1:
-                            publication_date += f"-{date_parts[1]:02d}"
-                        if len(date_parts) > 2:
-                            publication_date += f"-{date_parts[2]:02d}"
-
-                # DOI et URL
-                doi = item.get('DOI', '')
-                url = f"https://doi.org/{doi}" if doi else item.get('URL', '')
+                cursor = message.get('next-cursor')
+                if not cursor or len(items) < params['rows']:
+                    available = fetched
+                    break
 
-                results.append({
-                    'id': doi or item.get('URL', '').split('/')[-1],
-                    'title': title,
-                    'abstract': item.get('abstract', ''),
-                    'authors': '; '.join(authors),
-                    'publication_date': publication_date,
-                    'journal': journal,
-                    'doi': doi,
-                    'url': url,
-                    'database_source': 'crossref'
-                })
+            if on_drained and available is not None and fetched >= available:
+                on_drained()
 
         except Exception as e:
             print(f"Erreur recherche CrossRef: {e}")
+            if since:
+                raise
 
         return results
 
@@ -317,8 +634,7 @@ class DatabaseManager:
                 'sort_order': 'desc'
             }
 
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
+            response = http_get_with_retries(url, timeout=30, params=params)
             data = response.json()
 
             articles = data.get('articles', [])
@@ -359,14 +675,33 @@ def sanitize_filename(article_id: str) -> str:
     # Remplace les caractères non alphanumériques (sauf le point) par un underscore
     return re.sub(r'[^a-zA-Z0-9.-]', '_', article_id)
 
+@functools.lru_cache(maxsize=4096)
+def _file_sha256(path: str, mtime_ns: int, size: int) -> str:
+    # La date et la taille font partie de la clé : un fichier réécrit est relu
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_sha256(path) -> str:
+    """Empreinte SHA-256 du contenu d'un fichier, lu par blocs (mémorisée tant que taille et date sont inchangées)."""
+    stat = os.stat(path)
+    return _file_sha256(str(path), stat.st_mtime_ns, stat.st_size)
+
 # Fonctions utilitaires
 def http_get_with_retries(url, headers=None, timeout=15, max_retries=HTTP_MAX_RETRIES,
-                         backoff_base=HTTP_BACKOFF_BASE, jitter=True, ok_statuses=(200,)):
-    """Effectue une requête GET avec retry automatique et backoff exponentiel."""
+                         backoff_base=HTTP_BACKOFF_BASE, jitter=True, ok_statuses=(200,), params=None,
+                         stream=False):
+    """
+    Effectue une requête GET avec retry automatique et backoff exponentiel.
+    Chaque tentative attend son créneau auprès du limiteur de débit partagé de l'hôte.
+    """
     last_exc = None
     for attempt in range(max_retries):
         try:
-            r = requests.get(url, headers=headers or {}, timeout=timeout)
+            rate_limiter.wait_for_url(url)
+            r = requests.get(url, headers=headers or {}, timeout=timeout, params=params, stream=stream)
             if r.status_code in ok_statuses:
                 return r
             if r.status_code in (429, 500, 502, 503, 504):
@@ -388,31 +723,36 @@ def http_get_with_retries(url, headers=None, timeout=15, max_retries=HTTP_MAX_RE
 
     raise last_exc if last_exc else RuntimeError("HTTP retries exhausted")
 
-def parse_doi_from_pubmed_xml(xml_text: str) -> str | None:
-    """Extrait un DOI depuis du XML PubMed."""
+def parse_doi_from_pubmed_xml(xml_source) -> str | None:
+    """
+    Extrait un DOI depuis du XML PubMed (texte ou flux), lu au fil de l'eau :
+    ELocationID en priorité, sinon le premier ArticleId de type doi.
+    """
+    source = io.BytesIO(xml_source.encode('utf-8')) if isinstance(xml_source, str) else xml_source
+    fallback = None
     try:
-        root = ET.fromstring(xml_text)
-        for el in root.iter():
-            if el.tag.endswith("ELocationID") and el.attrib.get("EIdType") == "doi":
-                v = (el.text or "").strip()
-                if v.startswith("10."):
-                    return v
-        for el in root.iter():
-            if el.tag.endswith("ArticleId") and el.attrib.get("IdType") == "doi":
-                v = (el.text or "").strip()
-                if v.startswith("10."):
-                    return v
+        for _, el in ET.iterparse(source, events=('end',)):
+            v = (el.text or "").strip()
+            if el.tag.endswith("ELocationID") and el.attrib.get("EIdType") == "doi" and v.startswith("10."):
+                return v
+            if fallback is None and el.tag.endswith("ArticleId") and el.attrib.get("IdType") == "doi" and v.startswith("10."):
+                fallback = v
+            if el.tag.endswith("PubmedArticle"):
+                el.clear()
     except ET.ParseError:
         pass
-    return None
+    return fallback
 
 def get_doi_from_pmid(pmid: str) -> str | None:
     """Récupère le DOI d'un article via E-utilities NCBI."""
     efetch = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?db=pubmed&id={quote(str(pmid))}&retmode=xml"
     try:
-        r = http_get_with_retries(efetch, timeout=20)
-        doi = parse_doi_from_pubmed_xml(r.text)
-        return doi
+        r = http_get_with_retries(efetch, timeout=20, stream=True)
+        r.raw.decode_content = True
+        try:
+            return parse_doi_from_pubmed_xml(r.raw)
+        finally:
+            r.close()
     except Exception as e:
         print(f"⚠️ DOI introuvable via E-utilities pour PMID {pmid}: {e}")
         return None
@@ -430,8 +770,8 @@ def fetch_unpaywall_pdf_url(doi: str) -> str | None:
         print(f"⚠️ Unpaywall erreur pour DOI {doi}: {e}")
         return None
 
-def normalize_text(s: str) -> str:
-    """Normalise le texte pour réduire le bruit avant indexation."""
+def clean_text(s: str) -> str:
+    """Supprime les caractères parasites et normalise les espaces (sans changer la casse)."""
     if not s:
         return ""
 
@@ -443,7 +783,11 @@ def normalize_text(s: str) -> str:
     s = re.sub(r"[ \t]+", " ", s)
     s = re.sub(r"\s*\n\s*", "\n", s)
     s = re.sub(r"\n{3,}", "\n\n", s)
-    s = s.strip()
+    return s.strip()
+
+def normalize_text(s: str) -> str:
+    """Normalise le texte pour réduire le bruit avant indexation."""
+    s = clean_text(s)
 
     if NORMALIZE_LOWER:
         s = s.lower()
@@ -467,34 +811,60 @@ def send_project_notification(project_id: str, event_type: str, message: str, da
     except Exception as e:
         print(f"❌ Erreur lors de l'envoi de la notification WebSocket via Redis: {e}")
 
-def extract_text_from_pdf(pdf_path):
-    """Extrait le texte d'un fichier PDF."""
-    text = ""
+def emit_project_event(project_id: str, event: str, data: dict):
+    """Émet un événement Socket.IO (hors notifications) dans la room d'un projet via Redis."""
+    try:
+        sio_redis_manager.emit(event, data, room=project_id)
+    except Exception as e:
+        print(f"❌ Erreur lors de l'émission de l'événement {event} via Redis: {e}")
+
+def load_pdf_text(pdf_path) -> dict | None:
+    """
+    Texte normalisé d'un PDF (`text`, et `pages` : liste du texte de chaque page, avec leurs
+    positions `page_offsets`), lu dans le stock pdf_texts (adressé par le SHA-256 du fichier)
+    ou extrait puis enregistré lors de la première lecture.
+    """
     try:
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() or ""
+        sha256 = file_sha256(pdf_path)
+        stored = pdf_text_store.get(sha256, PDF_TEXT_EXTRACTOR_VERSIONS)
+        if stored:
+            stored['pages'] = split_pages(stored['text'], stored['page_offsets'])
+            return stored
+        raw_pages, engine = extract_pdf_pages(pdf_path)
+        pages = [clean_text(page) for page in raw_pages]
+        full_text, offsets = join_pages(pages)
     except Exception as e:
         print(f"Erreur de lecture du PDF {pdf_path}: {e}")
         return None
-    return text
+    version = extractor_version(engine)
+    pdf_text_store.put(sha256, full_text, offsets, version)
+    return {'sha256': sha256, 'text': full_text, 'pages': pages, 'page_offsets': offsets,
+            'extractor_version': version, 'engine': engine}
 
-def get_prompt_from_db(prompt_name: str) -> str:
-    """Récupère un template de prompt depuis la base de données."""
+def extract_text_from_pdf(pdf_path):
+    """Extrait le texte d'un fichier PDF (via le stock de textes partagé)."""
+    pdf_text = load_pdf_text(pdf_path)
+    return pdf_text['text'] if pdf_text else None
+
+def _load_prompt_template(prompt_name: str):
     session = Session()
     try:
         result = session.execute(text("""
             SELECT template FROM prompts WHERE name = :name
         """), {'name': prompt_name}).fetchone()
-        
-        if result:
-            return result.template
-    except Exception as e:
-        print(f"Erreur récupération prompt {prompt_name}: {e}")
+        return result.template if result else None
     finally:
         session.close()
 
+def get_prompt_from_db(prompt_name: str) -> str:
+    """Récupère un template de prompt depuis la base de données (via le cache du worker)."""
+    try:
+        template = config_cache.get('prompt', prompt_name, lambda: _load_prompt_template(prompt_name))
+        if template:
+            return template
+    except Exception as e:
+        print(f"Erreur récupération prompt {prompt_name}: {e}")
+
     # Fallback si la BDD est inaccessible
     if prompt_name == 'screening_prompt':
         return """En tant qu'assistant de recherche spécialisé, analysez cet article et déterminez sa pertinence pour une revue systématique.
@@ -508,6 +878,19 @@ Veuillez évaluer la pertinence de cet article sur une échelle de 1 à 10 et fo
 Répondez UNIQUEMENT avec un objet JSON contenant :
 - "relevance_score": score numérique de 0 à 10
 - "decision": "À inclure" si score >= 7, sinon "À exclure"
+- "justification": phrase courte (max 30 mots) expliquant le score"""
+
+    elif prompt_name == 'batch_screening_prompt':
+        return """En tant qu'assistant de recherche spécialisé, évaluez la pertinence de chacun des {count} articles ci-dessous pour une revue systématique.
+
+{articles}
+
+Pour CHAQUE article, évaluez sa pertinence sur une échelle de 0 à 10 et fournissez une justification concise.
+
+Répondez UNIQUEMENT avec un objet JSON contenant une clé "results" : une liste avec un objet par article, chacun contenant :
+- "article_id": l'identifiant exact indiqué entre crochets
+- "relevance_score": score numérique de 0 à 10
+- "decision": "À inclure" si score >= 7, sinon "À exclure"
 - "justification": phrase courte (max 30 mots) expliquant le score"""
 
     elif prompt_name == 'full_extraction_prompt':
@@ -534,9 +917,21 @@ def get_screening_prompt(title, abstract, database_source="unknown"):
     template = get_prompt_from_db('screening_prompt')
     return template.format(title=title, abstract=abstract, database_source=database_source)
 
+def get_batch_screening_prompt(articles: list) -> str:
+    """Génère un prompt de screening regroupant plusieurs articles (titre et résumé)."""
+    template = get_prompt_from_db('batch_screening_prompt')
+    blocks = "\n\n".join(
+        f"[{a['article_id']}]\nTitre: {a.get('title') or ''}\nRésumé: {a.get('abstract') or ''}\n"
+        f"Source: {a.get('database_source') or 'unknown'}"
+        for a in articles
+    )
+    return template.format(count=len(articles), articles=blocks)
+
+EXTRACTION_PROMPT_INTRO = "ROLE: Vous êtes un assistant expert en analyse de littérature scientifique, spécialisé dans l'extraction de données structurées.\n\nTÂCHE: Analysez le texte fourni et extrayez les informations demandées en respectant SCRUPULEUSEMENT le format JSON.\n\nINSTRUCTIONS IMPORTANTES:\n1. Répondez **UNIQUEMENT** avec un objet JSON valide. N'ajoutez aucun texte, commentaire ou explication avant ou après le JSON.\n2. Assurez-vous que chaque paire clé-valeur est séparée par une virgule, sauf la dernière.\n3. Échappez correctement les guillemets doubles (\") à l'intérieur des chaînes de caractères avec un antislash (\\).\n4. Si une information n'est pas présente dans le texte, utilisez une chaîne de caractères vide (\"\") comme valeur. Ne laissez pas de champ vide ou avec \"...\"."
+
 def get_full_extraction_prompt(text, database_source="unknown", custom_grid_id=None):
     """Génère le prompt d'extraction avec grille personnalisée optionnelle."""
-    intro = "ROLE: Vous êtes un assistant expert en analyse de littérature scientifique, spécialisé dans l'extraction de données structurées.\n\nTÂCHE: Analysez le texte fourni et extrayez les informations demandées en respectant SCRUPULEUSEMENT le format JSON.\n\nINSTRUCTIONS IMPORTANTES:\n1. Répondez **UNIQUEMENT** avec un objet JSON valide. N'ajoutez aucun texte, commentaire ou explication avant ou après le JSON.\n2. Assurez-vous que chaque paire clé-valeur est séparée par une virgule, sauf la dernière.\n3. Échappez correctement les guillemets doubles (\") à l'intérieur des chaînes de caractères avec un antislash (\\).\n4. Si une information n'est pas présente dans le texte, utilisez une chaîne de caractères vide (\"\") comme valeur. Ne laissez pas de champ vide ou avec \"...\"."
+    intro = EXTRACTION_PROMPT_INTRO
 
     text_to_analyze = f'TEXTE À ANALYSER:\n---\n{text}\n---'
     source_info = f'SOURCE: {database_source}'
@@ -544,21 +939,10 @@ def get_full_extraction_prompt(text, database_source="unknown", custom_grid_id=N
 
     json_structure = ""
 
-    if custom_grid_id:
-        session = Session()
-        try:
-            result = session.execute(text("""
-                SELECT fields FROM extraction_grids WHERE id = :id
-            """), {'id': custom_grid_id}).fetchone()
-            
-            if result:
-                custom_fields = json.loads(result.fields)
-                json_fields = ",\n".join([f' "{field}": "..."' for field in custom_fields])
-                json_structure = f"{{\n{json_fields}\n}}"
-        except Exception as e:
-            print(f"Erreur lors du chargement de la grille personnalisée: {e}")
-        finally:
-            session.close()
+    custom_fields = get_grid_fields(custom_grid_id)
+    if custom_fields:
+        json_fields = ",\n".join([f' "{field}": "..."' for field in custom_fields])
+        json_structure = f"{{\n{json_fields}\n}}"
 
     if not json_structure:
         default_prompt_template = get_prompt_from_db('full_extraction_prompt')
@@ -569,6 +953,104 @@ def get_full_extraction_prompt(text, database_source="unknown", custom_grid_id=N
     final_prompt = f"{intro}\n\n{text_to_analyze}\n{source_info}\n\n{instruction}\n{json_structure}"
     return final_prompt
 
+def _load_grid_fields(custom_grid_id: str):
+    session = Session()
+    try:
+        result = session.execute(text("""
+            SELECT fields FROM extraction_grids WHERE id = :id
+        """), {'id': custom_grid_id}).fetchone()
+        return json.loads(result.fields) if result else None
+    finally:
+        session.close()
+
+def get_grid_fields(custom_grid_id=None):
+    """Champs d'une grille personnalisée (via le cache du worker), ou None si elle est introuvable."""
+    if not custom_grid_id:
+        return None
+    try:
+        return config_cache.get('grid', custom_grid_id, lambda: _load_grid_fields(custom_grid_id))
+    except Exception as e:
+        print(f"Erreur lors du chargement de la grille personnalisée: {e}")
+        return None
+
+def _load_analysis_profile(profile_id: str):
+    session = Session()
+    try:
+        result = session.execute(text("""
+            SELECT * FROM analysis_profiles WHERE id = :id
+        """), {'id': profile_id}).fetchone()
+        return dict(result._mapping) if result else None
+    finally:
+        session.close()
+
+def get_analysis_profile(profile_id: str):
+    """Profil d'analyse (via le cache du worker), ou None s'il est introuvable."""
+    try:
+        return config_cache.get('profile', profile_id, lambda: _load_analysis_profile(profile_id))
+    except Exception as e:
+        print(f"Erreur lors du chargement du profil {profile_id}: {e}")
+        return None
+
+def get_extraction_fields(custom_grid_id=None) -> list:
+    """Retourne la liste des champs de la grille personnalisée, ou ceux de la grille par défaut."""
+    custom_fields = get_grid_fields(custom_grid_id)
+    if custom_fields:
+        return custom_fields
+
+    default_prompt_template = get_prompt_from_db('full_extraction_prompt')
+    json_start = default_prompt_template.find('{')
+    return re.findall(r'"([^"]+)"\s*:', default_prompt_template[json_start:]) if json_start != -1 else []
+
+def get_field_group_extraction_prompt(context: str, fields: list, database_source="unknown") -> str:
+    """Génère un prompt d'extraction limité à un groupe de champs et aux extraits pertinents."""
+    json_fields = ",\n".join([f' "{field}": "..."' for field in fields])
+    return (f"{EXTRACTION_PROMPT_INTRO}\n\nEXTRAITS PERTINENTS DE L'ARTICLE:\n---\n{context}\n---\n"
+            f"SOURCE: {database_source}\n\nGRILLE D'EXTRACTION JSON (remplissez les valeurs):\n{{\n{json_fields}\n}}")
+
+def extract_fields_with_rag(project_id: str, article_id: str, fields: list, model: str, database_source="unknown",
+                            keep_alive: str = None, use_cache: bool = True) -> dict | None:
+    """
+    Extraction par groupes de champs à partir des extraits ChromaDB les plus proches de chaque groupe.
+    Retourne None si l'article n'est pas indexé (l'appelant repasse alors au texte complet).
+    """
+    chroma_path = PROJECTS_DIR / project_id / "chroma_db"
+    if not fields or not chroma_path.exists():
+        return None
+    try:
+        collection = get_chroma_client(str(chroma_path)).get_collection(f"project_{project_id}")
+    except Exception:
+        return None
+
+    indexed_id = sanitize_filename(article_id)
+    group_size = max(1, config.RAG_EXTRACTION_FIELDS_PER_GROUP)
+    groups = [fields[i:i + group_size] for i in range(0, len(fields), group_size)]
+    queries = [" ; ".join(field.replace('_', ' ') for field in group) for group in groups]
+    query_embeddings = embedding_model.encode(queries).tolist()
+
+    extracted = {}
+    for group, query_embedding in zip(groups, query_embeddings):
+        results = collection.query(
+            query_embeddings=[query_embedding],
+            n_results=config.RAG_EXTRACTION_TOP_K,
+            where={"article_id": indexed_id},
+            include=["documents", "metadatas"]
+        )
+        if not results['documents'] or not results['documents'][0]:
+            return None
+
+        # Extraits remis dans l'ordre du document pour garder le fil du texte
+        chunks = sorted(zip(results['metadatas'][0], results['documents'][0]), key=lambda c: c[0].get('chunk_index', 0))
+        context = "\n\n".join(doc for _, doc in chunks)
+        prompt = get_field_group_extraction_prompt(context, group, database_source)
+        api_result = call_ollama_api(prompt, model, output_format="json", keep_alive=keep_alive, use_cache=use_cache,
+                                     schema=schema_for_fields(group))
+        if not isinstance(api_result, dict):
+            api_result = {}
+        for field in group:
+            extracted[field] = api_result.get(field, "")
+
+    return extracted
+
 def update_project_status(project_id: str, status: str, result: dict = None, discussion: str = None,
                          graph: dict = None, prisma_path: str = None, analysis_result: dict = None,
                          analysis_plot_path: str = None):
@@ -668,27 +1150,66 @@ def increment_processed_count(session, project_id: str):
         WHERE id = :id
     """), {'id': project_id})
 
-def call_ollama_api(prompt: str, model: str, output_format: str = "", retries: int = 3) -> any:
-    """Appelle l'API Ollama avec gestion des erreurs et retry."""
-    payload = {"model": model, "prompt": prompt, "stream": False}
+def _parse_ollama_response(response_text: str, output_format: str) -> tuple:
+    """
+    Convertit le texte renvoyé par Ollama selon le format attendu (JSON réparé si besoin).
+    Retourne (valeur, strict) : `strict` est faux quand le JSON a dû être réparé.
+    """
     if output_format == "json":
-        payload["format"] = "json"
+        stripped = response_text.strip().replace("```json", "").replace("```", "")
+        try:
+            return json.loads(stripped), True
+        except json.JSONDecodeError:
+            parsed = repair_json(response_text)
+            print("🩹 Réponse JSON mal formée récupérée sans nouvel appel.")
+            return parsed, False
+    return response_text, True
+
+def _is_complete_response(parsed, strict: bool, schema: dict = None, validate=None) -> bool:
+    """Réponse lue sans réparation, conforme au schéma (avant complétion) et acceptée par `validate`."""
+    return strict and matches_schema(parsed, schema) and (validate is None or bool(validate(parsed)))
+
+def call_ollama_api(prompt: str, model: str, output_format: str = "", retries: int = 3,
+                    keep_alive: str = None, options: dict = None, use_cache: bool = True,
+                    schema: dict = None, validate=None) -> any:
+    """
+    Appelle l'API Ollama avec gestion des erreurs et retry.
+    Avec `schema`, la sortie est contrainte par ce schéma JSON (sortie structurée d'Ollama).
+    Seules les réponses complètes sont mises en cache (et servies depuis le cache) : JSON lu sans
+    réparation, conforme au schéma et, si fourni, accepté par `validate(réponse)`.
+    CircuitOpenError n'est pas interceptée : le modèle est indisponible, inutile de réessayer ici.
+    """
+    request_format = output_format
+    if output_format == "json" and schema and config.OLLAMA_STRUCTURED_OUTPUT:
+        request_format = schema
+
+    cache_key = None
+    if use_cache and config.LLM_CACHE_ENABLED:
+        cache_key = make_cache_key(model, prompt, request_format, options)
+        cached_text = llm_cache.get(cache_key)
+        if cached_text is not None:
+            try:
+                parsed, strict = _parse_ollama_response(cached_text, output_format)
+                if _is_complete_response(parsed, strict, schema, validate):
+                    print(f"♻️ Réponse Ollama servie depuis le cache ({model}).")
+                    return parsed
+            except json.JSONDecodeError:
+                pass  # Entrée inexploitable ou incomplète : on régénère et on l'écrase
 
     last_exception = None
     for attempt in range(retries):
         try:
             print(f"🤖 Appel Ollama avec le modèle : {model} (Essai {attempt + 1}/{retries})...")
-            response = requests.post(f"{config.OLLAMA_BASE_URL}/api/generate", json=payload, timeout=900)
-            response.raise_for_status()
-            result = response.json()
+            result = ollama_client.generate(model, prompt, output_format=request_format,
+                                            keep_alive=keep_alive, options=options)
 
             response_text = result.get('response', '')
-            if output_format == "json":
-                response_text = response_text.strip().replace("```json", "").replace("```", "")
-                return json.loads(response_text)
-            return response_text
+            parsed, strict = _parse_ollama_response(response_text, output_format)
+            if cache_key and response_text and _is_complete_response(parsed, strict, schema, validate):
+                llm_cache.set(cache_key, model, response_text)
+            return fill_missing_fields(parsed, schema)
 
-        except (requests.RequestException, json.JSONDecodeError) as e:
+        except (requests.RequestException, json.JSONDecodeError, TimeoutError) as e:
             last_exception = e
             print(f"⚠️ Erreur Ollama (essai {attempt + 1}): {e}. Nouvel essai...")
             time.sleep(5)
@@ -696,21 +1217,33 @@ def call_ollama_api(prompt: str, model: str, output_format: str = "", retries: i
     print(f"❌ Échec de l'appel API Ollama après {retries} essais. Erreur: {last_exception}")
     return {} if output_format == "json" else ""
 
+def classify_article_id(article_id: str) -> str:
+    """Type probable d'un identifiant d'article : 'doi', 'pmid', 'arxiv' ou 'unknown'."""
+    article_id = article_id.strip()
+    if article_id.startswith("10.") and "/" in article_id:
+        return 'doi'
+    if article_id.isdigit() and len(article_id) >= 7:
+        return 'pmid'
+    if "arxiv" in article_id.lower() or article_id.count('.') == 1:
+        return 'arxiv'
+    return 'unknown'
+
 def fetch_article_details(article_id: str, database_source: str = None) -> dict:
     """Récupère les détails d'un article selon son identifiant."""
     # Nettoyer l'identifiant
     article_id = article_id.strip()
 
     # Détection automatique du type d'identifiant
-    if article_id.startswith("10.") and "/" in article_id:
+    id_type = classify_article_id(article_id)
+    if id_type == 'doi':
         # C'est un DOI
         print(f"📖 Détecté comme DOI : {article_id}")
         return fetch_crossref_details(article_id)
-    elif article_id.isdigit() and len(article_id) >= 7:
+    elif id_type == 'pmid':
         # C'est probablement un PMID
         print(f"📖 Détecté comme PMID : {article_id}")
         return fetch_pubtator_abstract(article_id)
-    elif "arxiv" in article_id.lower() or article_id.count('.') == 1:
+    elif id_type == 'arxiv':
         # C'est probablement un ID arXiv
         print(f"📖 Détecté comme arXiv ID : {article_id}")
         return fetch_arxiv_details(article_id)
@@ -739,7 +1272,6 @@ def fetch_pubtator_abstract(pmid: str) -> dict:
 
         details['doi'] = get_doi_from_pmid(pmid)
 
-        time.sleep(0.2)
         # CORRECTION : S'assurer de retourner le dictionnaire complet 'details'
         return details
 
@@ -750,7 +1282,7 @@ def fetch_pubtator_abstract(pmid: str) -> dict:
 def fetch_arxiv_details(arxiv_id: str) -> dict:
     """Récupère les détails d'un article arXiv."""
     try:
-        client = arxiv.Client()
+        client = RateLimitedArxivClient()
         search = arxiv.Search(id_list=[arxiv_id])
         for paper in client.results(search):
             return {
@@ -766,6 +1298,7 @@ def fetch_arxiv_details(arxiv_id: str) -> dict:
 def fetch_crossref_details(doi: str) -> dict:
     """Récupère les détails d'un article CrossRef."""
     try:
+        rate_limiter.wait('api.crossref.org')
         work = cr.get_publication_as_json(doi)
         title = ''
         if 'title' in work and work['title']:
@@ -781,6 +1314,72 @@ def fetch_crossref_details(doi: str) -> dict:
         print(f"❌ CrossRef erreur pour DOI {doi}: {e}")
     return {'id': doi, 'title': 'Erreur de récupération', 'abstract': ''}
 
+ARTICLE_METADATA_CACHE_PREFIX = 'article_meta'
+
+def _arxiv_lookup_key(article_id: str) -> str:
+    return re.sub(r'v\d+$', '', re.sub(r'^arxiv:', '', article_id.strip(), flags=re.IGNORECASE))
+
+def resolve_articles_metadata(article_ids: list, on_progress=None) -> dict:
+    """
+    Résout les métadonnées d'une liste d'identifiants saisis à la main, par lots :
+    cache Redis partagé entre projets, puis PMID par efetch groupés, DOI par filtres CrossRef
+    multi-DOI et identifiants arXiv par `id_list`. Les identifiants non résolus par lot
+    (lot en erreur ou type inconnu) passent par `fetch_article_details`, un par un.
+    `on_progress(resolus, total)` est appelée après chaque étape. Retourne {identifiant: notice}.
+    """
+    article_ids = list(dict.fromkeys(a.strip() for a in article_ids if a and a.strip()))
+    total = len(article_ids)
+    resolved = {}
+
+    def cache_key(article_id):
+        return f"{ARTICLE_METADATA_CACHE_PREFIX}:{article_id}"
+
+    def store(found: dict):
+        if found:
+            pipe = redis_conn.pipeline()
+            for article_id, record in found.items():
+                pipe.setex(cache_key(article_id), config.ARTICLE_METADATA_CACHE_TTL, json.dumps(record))
+            pipe.execute()
+        resolved.update(found)
+        if on_progress:
+            on_progress(len(resolved), total)
+
+    if article_ids:
+        cached = redis_conn.mget([cache_key(a) for a in article_ids])
+        resolved.update({a: json.loads(raw) for a, raw in zip(article_ids, cached) if raw})
+        if on_progress:
+            on_progress(len(resolved), total)
+
+    groups = {}
+    for article_id in article_ids:
+        if article_id not in resolved:
+            groups.setdefault(classify_article_id(article_id), []).append(article_id)
+
+    batch_resolvers = {
+        'pmid': (db_manager.fetch_pubmed_records, lambda a: a),
+        'doi': (db_manager.fetch_crossref_records, lambda a: a.lower()),
+        'arxiv': (db_manager.fetch_arxiv_records, _arxiv_lookup_key)
+    }
+    fallback_ids = groups.get('unknown', [])
+    for id_type, (fetch_records, lookup_key) in batch_resolvers.items():
+        ids = groups.get(id_type, [])
+        if not ids:
+            continue
+        try:
+            records = fetch_records([lookup_key(a) for a in ids])
+        except Exception as e:
+            print(f"⚠️ Résolution groupée {id_type} échouée ({len(ids)} identifiants): {e}")
+            fallback_ids += ids
+            records = {}
+        store({a: records[lookup_key(a)] for a in ids if lookup_key(a) in records})
+
+    for article_id in fallback_ids:
+        details = fetch_article_details(article_id)
+        if details and details.get('title') != 'Erreur de récupération':
+            store({article_id: details})
+
+    return resolved
+
 def fetch_ieee_details(article_id: str) -> dict:
     """Récupère les détails d'un article IEEE."""
     # Cette fonction nécessiterait l'API IEEE pour récupérer les détails
@@ -789,90 +1388,226 @@ def fetch_ieee_details(article_id: str) -> dict:
 
 # --- TÂCHES PRINCIPALES ---
 
-def multi_database_search_task(project_id: str, query: str, databases: list, max_results_per_db: int = 50):
-    """Effectue une recherche dans plusieurs bases de données."""
-    print(f"🔍 Recherche multi-bases pour le projet {project_id}: {query}")
-    all_results = []
-    total_found = 0
+SEARCH_RESULT_COLUMNS = ('id', 'project_id', 'article_id', 'title', 'abstract', 'authors',
+                         'publication_date', 'journal', 'doi', 'url', 'database_source', 'created_at')
+COPY_NULL = '\\N'
 
+def bulk_insert_search_results(session, project_id: str, records: list, default_source: str = 'manual') -> list:
+    """
+    Insère un lot de notices dans search_results en un seul aller-retour : COPY vers une table
+    temporaire puis INSERT ... ON CONFLICT (project_id, article_id) DO NOTHING.
+    S'exécute dans la transaction de `session` (sans commit) ; retourne les article_id insérés.
+    """
+    created_at = datetime.now().isoformat()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        article_id = record.get('article_id') or record.get('id')
+        if not article_id:
+            continue
+        row = [str(uuid.uuid4()), project_id, str(article_id), record.get('title'), record.get('abstract'),
+               record.get('authors'), record.get('publication_date'), record.get('journal'), record.get('doi'),
+               record.get('url'), record.get('database_source') or default_source, created_at]
+        writer.writerow([COPY_NULL if value is None else value for value in row])
+    if not buffer.tell():
+        return []
+    buffer.seek(0)
+
+    columns = ', '.join(SEARCH_RESULT_COLUMNS)
+    cursor = session.connection().connection.cursor()
     try:
-        for db_name in databases:
-            print(f"📚 Recherche dans {db_name}...")
-            try:
-                if db_name == 'pubmed':
-                    results = db_manager.search_pubmed(query, max_results_per_db)
-                elif db_name == 'arxiv':
-                    results = db_manager.search_arxiv(query, max_results_per_db)
-                elif db_name == 'crossref':
-                    results = db_manager.search_crossref(query, max_results_per_db)
-                elif db_name == 'ieee':
-                    results = db_manager.search_ieee(query, max_results_per_db)
-                else:
-                    print(f"⚠️ Base de données inconnue: {db_name}")
-                    continue
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS search_results_staging
+            (LIKE search_results INCLUDING DEFAULTS) ON COMMIT DROP
+        """)
+        cursor.execute("TRUNCATE search_results_staging")
+        cursor.copy_expert(f"COPY search_results_staging ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer)
+        cursor.execute(f"""
+            INSERT INTO search_results ({columns})
+            SELECT {columns} FROM search_results_staging
+            ON CONFLICT (project_id, article_id) DO NOTHING
+            RETURNING article_id
+        """)
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def load_project_deduplicator(session, project_id: str) -> Deduplicator:
+    """Index de dédoublonnage initialisé avec les notices et doublons déjà enregistrés du projet."""
+    deduplicator = Deduplicator()
+    rows = session.execute(text("""
+        SELECT article_id, title, authors, publication_date, doi, database_source
+        FROM search_results WHERE project_id = :project_id ORDER BY created_at
+    """), {'project_id': project_id}).mappings()
+    for row in rows:
+        deduplicator.add(dict(row))
+    rows = session.execute(text("""
+        SELECT article_id FROM search_result_duplicates WHERE project_id = :project_id
+    """), {'project_id': project_id})
+    for row in rows:
+        deduplicator.add({'article_id': row.article_id}, canonical=False)
+    return deduplicator
+
+def ingest_search_results(session, project_id: str, records: list, deduplicator: Deduplicator,
+                          default_source: str = 'manual', journal: list = None):
+    """
+    Dédoublonne un lot puis enregistre les notices nouvelles dans search_results et les
+    doublons (avec leur notice canonique) dans search_result_duplicates, sans commit.
+    Les entrées ajoutées à l'index de dédoublonnage sont notées dans `journal` (voir Deduplicator.undo).
+    Retourne (article_id insérés, doublons [(notice, article_id canonique, type, score)]).
+    """
+    unique, duplicates = deduplicator.split(records, journal=journal)
+    inserted = bulk_insert_search_results(session, project_id, unique, default_source=default_source)
+    if duplicates:
+        created_at = datetime.now()
+        session.execute(text("""
+            INSERT INTO search_result_duplicates (
+                id, project_id, article_id, canonical_article_id, database_source,
+                title, doi, match_type, score, created_at
+            ) VALUES (:id, :project_id, :article_id, :canonical_article_id, :database_source,
+                      :title, :doi, :match_type, :score, :created_at)
+            ON CONFLICT (project_id, article_id) DO NOTHING
+        """), [{
+            'id': str(uuid.uuid4()),
+            'project_id': project_id,
+            'article_id': str(record.get('article_id') or record.get('id')),
+            'canonical_article_id': canonical_id,
+            'database_source': record.get('database_source') or default_source,
+            'title': record.get('title'),
+            'doi': record.get('doi'),
+            'match_type': match_type,
+            'score': score,
+            'created_at': created_at
+        } for record, canonical_id, match_type, score in duplicates])
+    return inserted, duplicates
+
+def save_search_results(project_id: str, db_name: str, results: list, deduplicator: Deduplicator = None):
+    """
+    Enregistre les résultats d'une source après dédoublonnage inter-sources.
+    Retourne (article_id des notices nouvelles, nombre de doublons écartés).
+    """
+    session = Session()
+    journal = []
+    try:
+        if deduplicator is None:
+            deduplicator = load_project_deduplicator(session, project_id)
+        inserted, duplicates = ingest_search_results(session, project_id, results, deduplicator,
+                                                     default_source=db_name, journal=journal)
+        session.commit()
+        return inserted, len(duplicates)
+    except Exception as e:
+        session.rollback()
+        # Le lot n'est pas enregistré : ses notices ne doivent pas servir de référence aux suivants
+        if deduplicator is not None:
+            deduplicator.undo(journal)
+        print(f"❌ Erreur sauvegarde résultats pour {db_name}: {e}")
+        return [], 0
+    finally:
+        session.close()
 
-                print(f"✅ {db_name}: {len(results)} résultats trouvés")
+def multi_database_search_task(project_id: str, query: str, databases: list, max_results_per_db: int = 50,
+                               since: dict = None, screening: dict = None):
+    """
+    Effectue une recherche dans plusieurs bases de données, interrogées en parallèle.
+
+    Chaque source lue jusqu'au bout enregistre sa date de récolte dans `projects.search_watermarks` ;
+    une source tronquée par `max_results_per_db` garde sa date précédente, pour que la prochaine
+    récolte reprenne les notices qu'elle n'a pas remises.
+    Avec `since` ({base: 'AAAA-MM-JJ'}), la recherche est incrémentale : seules les notices
+    ajoutées depuis la dernière récolte sont demandées. Avec `screening` (arguments de
+    `enqueue_article_jobs`), les seules notices nouvelles sont mises en file de screening.
+    """
+    print(f"🔍 Recherche multi-bases pour le projet {project_id}: {query}")
+    harvest_date = date.today().isoformat()
+    since_dates = {db_name: date.fromisoformat(value) for db_name, value in (since or {}).items() if value}
+    streamed_counts = {}
+    duplicate_counts = {}
+    new_article_ids = []
+    watermarks = {}
+    connectors_by_name = {}
+    deduplicator = None
+
+    def store(db_name, records):
+        inserted, duplicates = save_search_results(project_id, db_name, records, deduplicator)
+        new_article_ids.extend(inserted)
+        streamed_counts[db_name] = streamed_counts.get(db_name, 0) + len(inserted)
+        duplicate_counts[db_name] = duplicate_counts.get(db_name, 0) + duplicates
+
+    def on_source_records(db_name, records):
+        # Sources paginées : chaque lot est enregistré dès sa lecture
+        store(db_name, records)
+
+    def on_source_done(db_name, results, error, duration):
+        # Chaque source est enregistrée et notifiée dès qu'elle termine, sans attendre les autres
+        if error:
+            print(f"❌ Erreur lors de la recherche dans {db_name}: {error}")
+            send_project_notification(
+                project_id,
+                'search_progress',
+                f'Échec de la recherche dans {db_name}: {error}',
+                {'database': db_name, 'count': 0, 'error': error}
+            )
+            return
 
-                # Sauvegarder les résultats dans la base de données
-                session = Session()
-                try:
-                    for result in results:
-                        search_result_id = str(uuid.uuid4())
-                        session.execute(text("""
-                            INSERT INTO search_results (
-                                id, project_id, article_id, title, abstract, authors,
-                                publication_date, journal, doi, url, database_source, created_at
-                            ) VALUES (:id, :project_id, :article_id, :title, :abstract, :authors,
-                                     :publication_date, :journal, :doi, :url, :database_source, :created_at)
-                        """), {
-                            'id': search_result_id,
-                            'project_id': project_id,
-                            'article_id': result['id'],
-                            'title': result['title'],
-                            'abstract': result['abstract'],
-                            'authors': result['authors'],
-                            'publication_date': result['publication_date'],
-                            'journal': result['journal'],
-                            'doi': result['doi'],
-                            'url': result['url'],
-                            'database_source': result['database_source'],
-                            'created_at': datetime.now()
-                        })
-                    session.commit()
-                except Exception as e:
-                    session.rollback()
-                    print(f"❌ Erreur sauvegarde résultats pour {db_name}: {e}")
-                finally:
-                    session.close()
-
-                all_results.extend(results)
-                total_found += len(results)
-
-                # Notification de progression
-                send_project_notification(
-                    project_id,
-                    'search_progress',
-                    f'Recherche terminée dans {db_name}: {len(results)} résultats',
-                    {'database': db_name, 'count': len(results)}
-                )
-
-                time.sleep(1)  # Politesse entre les APIs
+        if results:
+            store(db_name, results)
+        count = streamed_counts.get(db_name, 0)
+        duplicates = duplicate_counts.get(db_name, 0)
+        print(f"✅ {db_name}: {count} nouveaux résultats enregistrés, {duplicates} doublons écartés en {duration:.1f}s")
+        if connectors_by_name[db_name].drained.is_set():
+            watermarks[db_name] = harvest_date
+        else:
+            print(f"⚠️ {db_name}: récolte tronquée par la limite de résultats, date de récolte inchangée")
 
-            except Exception as e:
-                print(f"❌ Erreur lors de la recherche dans {db_name}: {e}")
-                continue
+        # Notification de progression
+        send_project_notification(
+            project_id,
+            'search_progress',
+            f'Recherche terminée dans {db_name}: {count} résultats ({duplicates} doublons écartés)',
+            {'database': db_name, 'count': count, 'duplicates': duplicates}
+        )
+
+    def on_source_progress(db_name, fetched, total):
+        send_project_notification(
+            project_id,
+            'search_progress',
+            f'{db_name}: {fetched}/{total} notices récupérées',
+            {'database': db_name, 'fetched': fetched, 'total': total, 'partial': True}
+        )
+
+    try:
+        # Un seul index de dédoublonnage pour toutes les sources, partagé entre leurs threads
+        session = Session()
+        try:
+            deduplicator = load_project_deduplicator(session, project_id)
+        finally:
+            session.close()
+
+        connectors = db_manager.get_connectors(databases, on_progress=on_source_progress, on_records=on_source_records,
+                                               since=since_dates)
+        connectors_by_name.update((c.name, c) for c in connectors)
+        mode = f" (incrémentale depuis {', '.join(f'{k}: {v}' for k, v in since_dates.items())})" if since_dates else ""
+        print(f"📚 Recherche dans {', '.join(c.name for c in connectors)}{mode}...")
+        asyncio.run(run_search_connectors(connectors, query, max_results_per_db, on_source_done))
+        total_found = sum(streamed_counts.values())
+        total_duplicates = sum(duplicate_counts.values())
 
-        # Mettre à jour le statut du projet
+        # Mettre à jour le statut du projet et les dates de récolte des sources réussies
         session = Session()
         try:
+            current = session.execute(text("""
+                SELECT search_watermarks FROM projects WHERE id = :id FOR UPDATE
+            """), {'id': project_id}).scalar()
+            merged_watermarks = {**json.loads(current or '{}'), **watermarks}
             session.execute(text("""
                 UPDATE projects SET
                 status = 'search_completed',
-                pmids_count = :pmids_count,
+                pmids_count = (SELECT COUNT(*) FROM search_results WHERE project_id = :id),
+                search_watermarks = :search_watermarks,
                 updated_at = :updated_at
                 WHERE id = :id
             """), {
-                'pmids_count': total_found,
+                'search_watermarks': json.dumps(merged_watermarks),
                 'updated_at': datetime.now(),
                 'id': project_id
             })
@@ -887,12 +1622,18 @@ def multi_database_search_task(project_id: str, query: str, databases: list, max
         send_project_notification(
             project_id,
             'search_completed',
-            f'Recherche terminée: {total_found} articles trouvés dans {len(databases)} base(s) de données',
-            {'total_results': total_found, 'databases': databases}
+            f'Recherche terminée: {total_found} articles trouvés dans {len(databases)} base(s) de données'
+            f' ({total_duplicates} doublons écartés)',
+            {'total_results': total_found, 'duplicates': total_duplicates, 'databases': databases}
         )
 
-        print(f"✅ Recherche multi-bases terminée: {total_found} articles trouvés")
-        return {'total_results': total_found, 'databases': databases}
+        print(f"✅ Recherche multi-bases terminée: {total_found} articles trouvés, {total_duplicates} doublons écartés")
+
+        if screening and new_article_ids:
+            enqueue_article_jobs(project_id, new_article_ids, analysis_mode='screening', **screening)
+            print(f"🧪 {len(new_article_ids)} nouveaux articles mis en file de screening")
+
+        return {'total_results': total_found, 'duplicates': total_duplicates, 'databases': databases}
 
     except Exception as e:
         print(f"❌ Erreur critique lors de la recherche multi-bases: {e}")
@@ -917,6 +1658,72 @@ def multi_database_search_task(project_id: str, query: str, databases: list, max
         )
         return {'error': str(e)}
 
+def add_manual_articles_task(project_id: str, article_ids: list, follow_up: dict = None):
+    """
+    Ajoute au projet une liste d'identifiants saisis à la main (PMID/DOI/arXiv), résolus par lots
+    avec notifications de progression. `follow_up` ({'func', 'ids_kwarg', 'kwargs', 'job_timeout'})
+    décrit la tâche à lancer ensuite sur les articles retenus (import Zotero, recherche de PDF...).
+    """
+    article_ids = list(dict.fromkeys(a.strip() for a in article_ids if a and isinstance(a, str) and a.strip()))
+    print(f"📥 Ajout manuel de {len(article_ids)} articles au projet {project_id}")
+    session = Session()
+
+    try:
+        existing = {row.article_id for row in session.execute(text("""
+            SELECT article_id FROM search_results WHERE project_id = :project_id AND article_id = ANY(:article_ids)
+        """), {'project_id': project_id, 'article_ids': article_ids})}
+        missing = [a for a in article_ids if a not in existing]
+
+        def on_progress(resolved, total):
+            send_project_notification(
+                project_id,
+                'manual_import_progress',
+                f'Métadonnées résolues: {resolved}/{total}',
+                {'resolved': resolved, 'total': total}
+            )
+
+        resolved = resolve_articles_metadata(missing, on_progress=on_progress)
+        new_records = [dict(details, article_id=article_id, title=details.get('title') or 'Titre non trouvé',
+                            abstract=details.get('abstract') or '')
+                       for article_id, details in resolved.items()]
+
+        inserted, duplicates = ingest_search_results(session, project_id, new_records,
+                                                     load_project_deduplicator(session, project_id))
+        # Un doublon d'une notice déjà présente est traité sous l'identifiant de celle-ci
+        processed_ids = list(dict.fromkeys([a for a in article_ids if a in existing] + inserted +
+                                           [canonical_id for _, canonical_id, _, _ in duplicates]))
+
+        session.execute(text("""
+            UPDATE projects SET pmids_count = (SELECT COUNT(*) FROM search_results WHERE project_id = :project_id)
+            WHERE id = :project_id
+        """), {'project_id': project_id})
+        session.commit()
+
+        unresolved = [a for a in missing if a not in resolved]
+        send_project_notification(
+            project_id,
+            'manual_import_completed',
+            f'{len(inserted)} articles ajoutés, {len(unresolved)} identifiants non résolus',
+            {'added': len(inserted), 'processed_ids': processed_ids, 'unresolved': unresolved}
+        )
+        print(f"✅ Ajout manuel terminé: {len(inserted)} ajoutés, {len(unresolved)} non résolus")
+
+        if follow_up and processed_ids:
+            Queue(get_current_job().origin, connection=redis_conn).enqueue(
+                follow_up['func'],
+                job_timeout=follow_up.get('job_timeout', '1h'),
+                **{**follow_up.get('kwargs', {}), follow_up['ids_kwarg']: processed_ids}
+            )
+        return processed_ids
+
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Erreur ajout articles manuels: {e}")
+        send_project_notification(project_id, 'manual_import_failed', f"Erreur lors de l'ajout des articles: {e}")
+        return []
+    finally:
+        session.close()
+
 def pull_ollama_model_task(model_name: str):
     """Tâche de téléchargement d'un modèle Ollama."""
     print(f"📥 Lancement du téléchargement pour le modèle : {model_name}...")
@@ -934,10 +1741,193 @@ def pull_ollama_model_task(model_name: str):
         print(f"❌ Erreur lors du téléchargement du modèle '{model_name}': {e}")
         return f"Erreur: {e}"
 
-def process_single_article_task(project_id: str, article_id: str, profile: dict, analysis_mode: str, custom_grid_id: str = None):
+def warm_up_ollama_models_task(models: list, keep_alive: str = None):
+    """Précharge les modèles d'un pipeline dans Ollama avant le traitement des articles."""
+    for model in dict.fromkeys(m for m in models if m):
+        print(f"🔥 Préchargement du modèle {model} (keep_alive={keep_alive})...")
+        if ollama_client.warm_up(model, keep_alive):
+            print(f"✅ Modèle {model} prêt.")
+
+def submit_llm_job(queue_name: str, func, model: str, kwargs: dict, job_timeout=1800, keep_alive: str = None) -> str:
+    """
+    Confie une tâche LLM au planificateur par modèle, ou la met directement en file s'il est désactivé.
+    Retourne l'identifiant de la tâche RQ (future, avec le planificateur).
+    """
+    if config.LLM_SCHEDULER_ENABLED and model:
+        return model_scheduler.submit(queue_name, func, model, kwargs, job_timeout=job_timeout, keep_alive=keep_alive)
+    return Queue(queue_name, connection=redis_conn).enqueue(func, kwargs=kwargs, job_timeout=job_timeout).id
+
+def submit_llm_jobs_task(model: str, specs: list):
+    """Remet au planificateur des tâches LLM décrites par `make_spec` (soumission différée)."""
+    model_scheduler.submit_many(model, specs)
+
+def get_task_model(profile: dict, analysis_mode: str, screening_cascade: bool = None) -> str:
+    """Modèle sous lequel les tâches d'analyse sont regroupées (premier niveau de la cascade en screening)."""
+    if analysis_mode == 'screening':
+        return get_screening_models(profile, screening_cascade)[0]
+    return profile['extract_model']
+
+def requeue_with_backoff(func, kwargs: dict, reason: str, model: str = None) -> bool:
+    """
+    Remet la tâche RQ courante en file après un délai exponentiel (tentatives comptées dans job.meta).
+    Avec `model`, la tâche repasse par le planificateur pour rester groupée avec ce modèle.
+    Retourne False hors d'un worker ou quand le nombre maximal de tentatives est atteint.
+    """
+    job = get_current_job()
+    if job is None:
+        return False
+    attempt = job.meta.get('llm_attempt', 0) + 1
+    if attempt > config.LLM_REQUEUE_MAX_ATTEMPTS:
+        return False
+
+    delay = min(config.LLM_REQUEUE_MAX_DELAY, config.LLM_REQUEUE_BASE_DELAY * 2 ** (attempt - 1))
+    if config.LLM_SCHEDULER_ENABLED and model:
+        model_scheduler.submit_later(model, model_scheduler.make_spec(
+            job.origin, func, kwargs, job_timeout=job.timeout, meta={'llm_attempt': attempt}), delay)
+    else:
+        Queue(job.origin, connection=redis_conn).enqueue_in(
+            timedelta(seconds=delay), func, kwargs=kwargs, job_timeout=job.timeout, meta={'llm_attempt': attempt}
+        )
+    print(f"⏳ {reason} — tâche remise en file dans {delay}s (tentative {attempt}/{config.LLM_REQUEUE_MAX_ATTEMPTS}).")
+    return True
+
+def dispatch_llm_jobs_task():
+    """Libère vers RQ le prochain lot de tâches LLM regroupées par modèle."""
+    summary = model_scheduler.dispatch()
+    if summary and summary['released']:
+        print(f"🗂️ Planificateur LLM: {summary['released']} tâche(s) libérée(s) pour {summary['model']} "
+              f"({'changement de modèle' if summary['switched'] else 'même modèle'}, {summary['remaining']} en attente)")
+    return summary
+
+def article_fingerprint(project_id: str, article: dict, profile: dict, analysis_mode: str, custom_grid_id: str = None,
+                        screening_cascade: bool = None, extraction_strategy: str = None, fields: list = None,
+                        prompt_name: str = 'screening_prompt') -> str:
+    """
+    Empreinte des entrées d'une analyse : texte source (contenu du PDF, sinon titre et résumé),
+    version du prompt, grille, stratégie et modèle(s). Une extraction enregistrée avec la même
+    empreinte n'a pas à être recalculée lors d'un lancement incrémental.
+    """
+    article_text = f"{article.get('title') or ''}\n{article.get('abstract') or ''}\n{article.get('database_source') or ''}"
+    if analysis_mode == 'screening':
+        source = hashlib.sha256(article_text.encode('utf-8')).hexdigest()
+        prompt_version = get_prompt_from_db(prompt_name)
+        models = get_screening_models(profile, screening_cascade)
+        strategy = None
+    else:
+        pdf_path = PROJECTS_DIR / project_id / f"{sanitize_filename(article['article_id'])}.pdf"
+        source = file_sha256(pdf_path) if pdf_path.exists() else hashlib.sha256(article_text.encode('utf-8')).hexdigest()
+        fields = fields if fields is not None else get_extraction_fields(custom_grid_id)
+        # Templates résolus tels qu'envoyés (texte complet : grille ou full_extraction_prompt ; RAG : groupes de champs)
+        prompt_version = (get_full_extraction_prompt('', custom_grid_id=custom_grid_id)
+                          + get_field_group_extraction_prompt('', fields))
+        models = (profile['extract_model'],)
+        strategy = extraction_strategy or config.EXTRACTION_STRATEGY
+    payload = json.dumps({
+        'mode': analysis_mode,
+        'source': source,
+        'prompt': hashlib.sha256((prompt_version or '').encode('utf-8')).hexdigest(),
+        'grid': custom_grid_id,
+        'strategy': strategy,
+        'models': list(models)
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def get_stored_fingerprints(session, project_id: str, article_ids: list) -> dict:
+    """Empreintes des extractions déjà enregistrées pour ces articles ({article_id: empreinte})."""
+    rows = session.execute(text("""
+        SELECT pmid, input_fingerprint FROM extractions
+        WHERE project_id = :project_id AND pmid = ANY(:ids) AND input_fingerprint IS NOT NULL
+    """), {'project_id': project_id, 'ids': list(article_ids)})
+    return {row.pmid: row.input_fingerprint for row in rows}
+
+def _analyze_article(project_id: str, article_dict: dict, profile: dict, analysis_mode: str, log,
+                     custom_grid_id: str = None, use_llm_cache: bool = True, screening_cascade: bool = None,
+                     extraction_strategy: str = None, fields: list = None) -> dict:
+    """
+    Analyse un article déjà lu depuis search_results et retourne la ligne à enregistrer dans
+    extractions. N'écrit rien en base : les événements passent par `log(statut, détails)`.
+    """
+    article_id = article_dict['article_id']
+    keep_alive = ollama_client.keep_alive_for(profile.get('id'))
+    api_result = None
+
+    # Sélection du prompt et du modèle en fonction du mode
+    if analysis_mode == 'screening':
+        prompt = get_screening_prompt(article_dict.get('title'), article_dict.get('abstract'), article_dict.get('database_source'))
+        model, escalation_model = get_screening_models(profile, screening_cascade)
+        schema = SCREENING_SCHEMA
+    else: # 'full_extraction'
+        model = profile['extract_model']
+        fields = fields if fields is not None else get_extraction_fields(custom_grid_id)
+        schema = schema_for_fields(fields) if fields else None
+        # En mode RAG, le texte complet n'est lu que si l'article n'est pas indexé
+        if (extraction_strategy or config.EXTRACTION_STRATEGY) == 'rag':
+            api_result = extract_fields_with_rag(project_id, article_id, fields, model,
+                                                 article_dict.get('database_source'), keep_alive, use_llm_cache)
+            if api_result is None:
+                log('rag_fallback', "Article non indexé, extraction sur le texte complet.")
+
+    if api_result is None:
+        content_to_analyze = ""
+        pdf_path = PROJECTS_DIR / project_id / f"{sanitize_filename(article_id)}.pdf"
+
+        if pdf_path.exists():
+            content_to_analyze = extract_text_from_pdf(str(pdf_path))
+            if not content_to_analyze or len(content_to_analyze.strip()) < MIN_CHUNK_LEN:
+                log('no_content', "PDF trouvé mais texte vide ou insuffisant")
+                content_to_analyze = "" # On continue avec le résumé
+        else:
+            log('no_pdf', "PDF non trouvé localement, utilisation du résumé.")
+
+        # Fallback sur le titre et le résumé si le contenu du PDF est manquant
+        if not content_to_analyze:
+            content_to_analyze = f"Titre: {article_dict.get('title', '')}\n\nRésumé: {article_dict.get('abstract', '')}"
+
+        if analysis_mode != 'screening':
+            prompt = get_full_extraction_prompt(content_to_analyze, article_dict.get('database_source'), custom_grid_id)
+
+        # Appel à l'API Ollama
+        api_result = call_ollama_api(prompt, model, output_format="json", keep_alive=keep_alive,
+                                     use_cache=use_llm_cache, schema=schema)
+
+    if not api_result or not isinstance(api_result, dict):
+         raise Exception(f"La réponse de l'API Ollama était vide ou mal formée.")
+
+    if analysis_mode == 'screening' and escalation_model:
+        # Un cas incertain est réévalué plus tard par une tâche du grand modèle (submit_screening_escalations)
+        api_result['relevance_score'] = float(api_result.get('relevance_score', 0))
+        api_result = _merge_screening_cascade({article_id: api_result}, {}, model, escalation_model,
+                                              pending=True)[article_id]
+        model = api_result['screening_model']
+
+    # Sauvegarde des résultats
+    if analysis_mode == 'screening':
+        new_extraction = {
+            'id': str(uuid.uuid4()), 'project_id': project_id, 'pmid': article_id,
+            'title': article_dict.get('title'), 'created_at': datetime.now(),
+            'relevance_score': float(api_result.get('relevance_score', 0)),
+            'relevance_justification': api_result.get('justification', ''),
+            'extracted_data': json.dumps(api_result),
+            'analysis_source': f"screening_{model}"
+        }
+    else: # 'full_extraction'
+        new_extraction = {
+            'id': str(uuid.uuid4()), 'project_id': project_id, 'pmid': article_id,
+            'title': article_dict.get('title'), 'created_at': datetime.now(),
+            'relevance_score': None, 'relevance_justification': None,
+            'extracted_data': json.dumps(api_result),
+            'analysis_source': f"extraction_{model}"
+        }
+
+    return new_extraction
+
+def process_single_article_task(project_id: str, article_id: str, profile: dict, analysis_mode: str, custom_grid_id: str = None,
+                                use_llm_cache: bool = True, screening_cascade: bool = None, extraction_strategy: str = None,
+                                incremental: bool = False):
     """
     Tâche complète et corrigée pour traiter un seul article.
     Gère la session de manière centralisée et logue correctement les erreurs.
+    En mode incrémental, l'article est ignoré si son extraction a déjà l'empreinte courante.
     """
     session = Session()
     start_time = time.time()
@@ -980,69 +1970,57 @@ def process_single_article_task(project_id: str, article_id: str, profile: dict,
         if not article:
              raise ValueError(f"Article {article_id} non trouvé dans le projet même après tentative d'ajout.")
         article_dict = dict(article._mapping)
-        content_to_analyze = ""
-        project_dir = PROJECTS_DIR / project_id
-        pdf_path = project_dir / f"{sanitize_filename(article_id)}.pdf"
-
-        if pdf_path.exists():
-            content_to_analyze = extract_text_from_pdf(str(pdf_path))
-            if not content_to_analyze or len(content_to_analyze.strip()) < MIN_CHUNK_LEN:
-                log_processing_status(session, project_id, article_id, 'no_content', "PDF trouvé mais texte vide ou insuffisant")
-                content_to_analyze = "" # On continue avec le résumé
-        else:
-            log_processing_status(session, project_id, article_id, 'no_pdf', "PDF non trouvé localement, utilisation du résumé.")
-
-        # Fallback sur le titre et le résumé si le contenu du PDF est manquant
-        if not content_to_analyze:
-            content_to_analyze = f"Titre: {article_dict.get('title', '')}\n\nRésumé: {article_dict.get('abstract', '')}"
-
-        # Sélection du prompt et du modèle en fonction du mode
-        if analysis_mode == 'screening':
-            prompt = get_screening_prompt(article_dict.get('title'), article_dict.get('abstract'), article_dict.get('database_source'))
-            model = profile['preprocess_model']
-        else: # 'full_extraction'
-            prompt = get_full_extraction_prompt(content_to_analyze, article_dict.get('database_source'), custom_grid_id)
-            model = profile['extract_model']
-
-        # Appel à l'API Ollama
-        api_result = call_ollama_api(prompt, model, output_format="json")
-
-        if not api_result or not isinstance(api_result, dict):
-             raise Exception(f"La réponse de l'API Ollama était vide ou mal formée.")
+        fingerprint = article_fingerprint(project_id, article_dict, profile, analysis_mode, custom_grid_id,
+                                          screening_cascade, extraction_strategy)
+        if incremental and get_stored_fingerprints(session, project_id, [article_id]).get(article_id) == fingerprint:
+            log_processing_status(session, project_id, article_id, 'skipped', "Extraction à jour (empreinte inchangée).")
+            increment_processed_count(session, project_id)
+            session.commit()
+            send_project_notification(project_id, 'article_processed', f"Article {article_id} déjà à jour.",
+                                      {'article_id': article_id, 'skipped': True})
+            return
 
-        # Sauvegarde des résultats
-        if analysis_mode == 'screening':
-            new_extraction = {
-                'id': str(uuid.uuid4()), 'project_id': project_id, 'pmid': article_id,
-                'title': article_dict.get('title'), 'created_at': datetime.now(),
-                'relevance_score': float(api_result.get('relevance_score', 0)),
-                'relevance_justification': api_result.get('justification', ''),
-                'extracted_data': json.dumps(api_result),
-                'analysis_source': f"screening_{model}"
-            }
-        else: # 'full_extraction'
-            new_extraction = {
-                'id': str(uuid.uuid4()), 'project_id': project_id, 'pmid': article_id,
-                'title': article_dict.get('title'), 'created_at': datetime.now(),
-                'extracted_data': json.dumps(api_result),
-                'analysis_source': f"extraction_{model}"
-            }
+        new_extraction = _analyze_article(
+            project_id, article_dict, profile, analysis_mode,
+            lambda status, details: log_processing_status(session, project_id, article_id, status, details),
+            custom_grid_id=custom_grid_id, use_llm_cache=use_llm_cache,
+            screening_cascade=screening_cascade, extraction_strategy=extraction_strategy
+        )
+        new_extraction['input_fingerprint'] = fingerprint
 
         session.execute(text("""
-            INSERT INTO extractions (id, project_id, pmid, title, created_at, relevance_score, relevance_justification, extracted_data, analysis_source)
-            VALUES (:id, :project_id, :pmid, :title, :created_at, :relevance_score, :relevance_justification, :extracted_data, :analysis_source)
+            INSERT INTO extractions (id, project_id, pmid, title, created_at, relevance_score, relevance_justification, extracted_data, analysis_source, input_fingerprint)
+            VALUES (:id, :project_id, :pmid, :title, :created_at, :relevance_score, :relevance_justification, :extracted_data, :analysis_source, :input_fingerprint)
             ON CONFLICT (project_id, pmid) DO UPDATE SET
                 title = EXCLUDED.title, extracted_data = EXCLUDED.extracted_data,
                 relevance_score = EXCLUDED.relevance_score, relevance_justification = EXCLUDED.relevance_justification,
-                analysis_source = EXCLUDED.analysis_source, created_at = EXCLUDED.created_at;
+                analysis_source = EXCLUDED.analysis_source, created_at = EXCLUDED.created_at,
+                input_fingerprint = EXCLUDED.input_fingerprint;
         """), new_extraction)
 
         log_processing_status(session, project_id, article_id, 'success', f"Traitement '{analysis_mode}' réussi.")
         increment_processed_count(session, project_id)
         session.commit()
+        if analysis_mode == 'screening':
+            submit_screening_escalations(project_id, [new_extraction], profile, use_llm_cache, screening_cascade)
 
         send_project_notification(project_id, 'article_processed', f"Article {article_id} traité.", {'article_id': article_id})
 
+    except CircuitOpenError as e:
+        session.rollback()
+        requeued = requeue_with_backoff(process_single_article_task, {
+            'project_id': project_id, 'article_id': article_id, 'profile': profile, 'analysis_mode': analysis_mode,
+            'custom_grid_id': custom_grid_id, 'use_llm_cache': use_llm_cache,
+            'screening_cascade': screening_cascade, 'extraction_strategy': extraction_strategy,
+            'incremental': incremental
+        }, str(e), get_task_model(profile, analysis_mode, screening_cascade))
+        log_session = Session()
+        try:
+            log_processing_status(log_session, project_id, article_id, 'requeued' if requeued else 'error', str(e))
+            log_session.commit()
+        finally:
+            log_session.close()
+
     except Exception as e:
         error_message = f"Erreur lors du traitement de l'article {article_id}: {str(e)}"
         print(f"❌ {error_message}")
@@ -1069,6 +2047,594 @@ def process_single_article_task(project_id: str, article_id: str, profile: dict,
         
         session.close()
 
+class ArticleTimeBudgetExceeded(BaseException):
+    """
+    Levée quand un article dépasse `ARTICLE_TIME_BUDGET` dans un micro-lot. Dérive de
+    BaseException pour traverser les `except Exception` (nouvel essai Ollama, repli PDF...).
+    """
+
+@contextlib.contextmanager
+def article_time_budget(seconds: int):
+    """
+    Limite la durée du bloc à `seconds` (SIGALRM, thread principal uniquement). Le délai de la
+    tâche RQ, qui utilise la même alarme, est suspendu pendant le bloc puis réarmé pour le temps restant.
+    """
+    if not seconds or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise ArticleTimeBudgetExceeded(f"budget de {seconds}s dépassé")
+
+    started = time.time()
+    job_remaining = signal.alarm(0)
+    previous_handler = signal.signal(signal.SIGALRM, expire)
+    signal.alarm(min(seconds, job_remaining) if job_remaining else seconds)
+    try:
+        yield
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous_handler)
+        if job_remaining:
+            signal.alarm(max(1, int(job_remaining - (time.time() - started))))
+
+def process_article_microbatch_task(project_id: str, article_ids: list, profile: dict, analysis_mode: str,
+                                    custom_grid_id: str = None, use_llm_cache: bool = True,
+                                    screening_cascade: bool = None, extraction_strategy: str = None,
+                                    incremental: bool = False):
+    """
+    Traite plusieurs articles dans une même tâche : leurs notices sont lues en une requête et
+    les extractions, journaux et compteurs du lot sont enregistrés en une seule transaction.
+    Chaque article garde son propre appel LLM ; les articles absents de la base passent par
+    le traitement unitaire. En mode incrémental, les articles dont l'extraction a déjà
+    l'empreinte courante sont ignorés.
+
+    Chaque article dispose de `ARTICLE_TIME_BUDGET` secondes ; quand le budget d'un article
+    de plus ne tient plus dans le délai de la tâche, les articles restants passent à une nouvelle tâche.
+    """
+    options = {'custom_grid_id': custom_grid_id, 'use_llm_cache': use_llm_cache,
+               'screening_cascade': screening_cascade, 'extraction_strategy': extraction_strategy}
+    start_time = task_started = time.time()
+    job = get_current_job()
+    extractions, logs = [], []
+    skipped = 0
+    remaining = list(article_ids)
+
+    def log_for(article_id):
+        def log(status, details):
+            logs.append({'project_id': project_id, 'pmid': article_id, 'status': status,
+                         'details': details, 'timestamp': datetime.now()})
+        return log
+
+    try:
+        session = Session()
+        try:
+            rows = session.execute(
+                text("SELECT * FROM search_results WHERE project_id = :pid AND article_id = ANY(:ids)"),
+                {'pid': project_id, 'ids': list(article_ids)}
+            ).fetchall()
+            stored_fingerprints = get_stored_fingerprints(session, project_id, article_ids) if incremental else {}
+        finally:
+            session.close()
+        articles = {row.article_id: dict(row._mapping) for row in rows}
+
+        for article_id in article_ids:
+            if article_id not in articles:
+                try:
+                    with article_time_budget(config.ARTICLE_TIME_BUDGET):
+                        process_single_article_task(project_id, article_id, profile, analysis_mode,
+                                                    incremental=incremental, **options)
+                except ArticleTimeBudgetExceeded as e:
+                    log_for(article_id)('error', f"Article {article_id} abandonné : {e}")
+        start_time = time.time()  # Le traitement unitaire comptabilise déjà son propre temps
+
+        remaining = [a for a in article_ids if a in articles]
+        fields = get_extraction_fields(custom_grid_id) if analysis_mode != 'screening' else None
+        while remaining:
+            article_id = remaining[0]
+            if job and job.timeout and time.time() - task_started + config.ARTICLE_TIME_BUDGET > job.timeout - 60:
+                submit_llm_job(job.origin, process_article_microbatch_task,
+                               get_task_model(profile, analysis_mode, screening_cascade), {
+                                   'project_id': project_id, 'article_ids': remaining, 'profile': profile,
+                                   'analysis_mode': analysis_mode, 'incremental': incremental, **options
+                               }, job_timeout=job.timeout, keep_alive=ollama_client.keep_alive_for(profile.get('id')))
+                for requeued_id in remaining:
+                    log_for(requeued_id)('requeued', "Délai du micro-lot bientôt atteint : article confié à une nouvelle tâche.")
+                remaining = []
+                break
+            log = log_for(article_id)
+            first_log = len(logs)
+            try:
+                fingerprint = article_fingerprint(project_id, articles[article_id], profile, analysis_mode,
+                                                  custom_grid_id, screening_cascade, extraction_strategy, fields)
+                if incremental and stored_fingerprints.get(article_id) == fingerprint:
+                    log('skipped', "Extraction à jour (empreinte inchangée).")
+                    skipped += 1
+                    remaining.pop(0)
+                    continue
+                log('starting', f"Analyse '{analysis_mode}' avec le modèle {profile.get('extract_model', 'inconnu')}")
+                with article_time_budget(config.ARTICLE_TIME_BUDGET):
+                    extraction = _analyze_article(project_id, articles[article_id], profile, analysis_mode, log,
+                                                  fields=fields, **options)
+                extraction['input_fingerprint'] = fingerprint
+                extractions.append(extraction)
+                log('success', f"Traitement '{analysis_mode}' réussi (micro-lot).")
+            except CircuitOpenError:
+                del logs[first_log:]  # l'article sera repris par la tâche remise en file
+                raise
+            except (Exception, ArticleTimeBudgetExceeded) as e:
+                error_message = f"Erreur lors du traitement de l'article {article_id}: {str(e)}"
+                print(f"❌ {error_message}")
+                log('error', error_message)
+            remaining.pop(0)
+
+    except CircuitOpenError as e:
+        # Les articles déjà traités sont enregistrés ; seuls les suivants sont remis en file
+        requeued = requeue_with_backoff(process_article_microbatch_task, {
+            'project_id': project_id, 'article_ids': remaining, 'profile': profile,
+            'analysis_mode': analysis_mode, 'incremental': incremental, **options
+        }, str(e), get_task_model(profile, analysis_mode, screening_cascade))
+        for article_id in remaining:
+            log_for(article_id)('requeued' if requeued else 'error', str(e))
+
+    except Exception as e:
+        error_message = f"Erreur lors du traitement du micro-lot ({len(remaining)} articles): {str(e)}"
+        print(f"❌ {error_message}")
+        for article_id in remaining:
+            log_for(article_id)('error', error_message)
+
+    finally:
+        session = Session()
+        try:
+            if extractions:
+                session.execute(text("""
+                    INSERT INTO extractions (id, project_id, pmid, title, created_at, relevance_score, relevance_justification, extracted_data, analysis_source, input_fingerprint)
+                    VALUES (:id, :project_id, :pmid, :title, :created_at, :relevance_score, :relevance_justification, :extracted_data, :analysis_source, :input_fingerprint)
+                    ON CONFLICT (project_id, pmid) DO UPDATE SET
+                        title = EXCLUDED.title, extracted_data = EXCLUDED.extracted_data,
+                        relevance_score = EXCLUDED.relevance_score, relevance_justification = EXCLUDED.relevance_justification,
+                        analysis_source = EXCLUDED.analysis_source, created_at = EXCLUDED.created_at,
+                        input_fingerprint = EXCLUDED.input_fingerprint;
+                """), extractions)
+            if extractions or skipped:
+                session.execute(text("""
+                    UPDATE projects SET processed_count = processed_count + :count
+                    WHERE id = :id
+                """), {'count': len(extractions) + skipped, 'id': project_id})
+            if logs:
+                session.execute(text("""
+                    INSERT INTO processing_log (project_id, pmid, status, details, timestamp)
+                    VALUES (:project_id, :pmid, :status, :details, :timestamp)
+                """), logs)
+            update_project_timing(session, project_id, time.time() - start_time)
+            session.commit()
+        except Exception as db_err:
+            session.rollback()
+            print(f"❌ Erreur lors de l'enregistrement du micro-lot: {db_err}")
+            extractions = []
+        finally:
+            session.close()
+        if analysis_mode == 'screening':
+            submit_screening_escalations(project_id, extractions, profile, use_llm_cache, screening_cascade)
+
+    processed_ids = [e['pmid'] for e in extractions]
+    if processed_ids or skipped:
+        send_project_notification(project_id, 'article_processed',
+                                  f"{len(processed_ids)} article(s) traité(s) en micro-lot, {skipped} déjà à jour.",
+                                  {'article_ids': processed_ids, 'article_id': processed_ids[-1] if processed_ids else None,
+                                   'skipped': skipped})
+
+def _parse_batch_screening_results(api_result, expected_ids: list) -> dict:
+    """Extrait les résultats par article d'une réponse de screening groupé ; ignore les entrées invalides."""
+    if isinstance(api_result, dict) and isinstance(api_result.get('results'), list):
+        items = api_result['results']
+    elif isinstance(api_result, list):
+        items = api_result
+    elif isinstance(api_result, dict):
+        items = [dict(value, article_id=key) for key, value in api_result.items() if isinstance(value, dict)]
+    else:
+        items = []
+
+    expected = {str(article_id) for article_id in expected_ids}
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        article_id = str(item.get('article_id', '')).strip().strip('[]')
+        if article_id not in expected:
+            continue
+        try:
+            score = float(item.get('relevance_score'))
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= score <= 10:
+            continue
+        item['article_id'] = article_id
+        item['relevance_score'] = score
+        results[article_id] = item
+    return results
+
+def _screen_articles_batched(articles: list, model: str, keep_alive: str = None, use_cache: bool = True) -> dict:
+    """
+    Évalue plusieurs articles en un seul appel LLM.
+    Les articles absents ou mal évalués dans la réponse sont réévalués en sous-lots
+    plus petits, jusqu'à l'appel unitaire avec le prompt de screening classique.
+    """
+    if not articles:
+        return {}
+
+    if len(articles) == 1:
+        article = articles[0]
+        prompt = get_screening_prompt(article.get('title'), article.get('abstract'), article.get('database_source'))
+        api_result = call_ollama_api(prompt, model, output_format="json", keep_alive=keep_alive, use_cache=use_cache,
+                                     schema=SCREENING_SCHEMA)
+        return _parse_batch_screening_results([dict(api_result, article_id=article['article_id'])]
+                                              if isinstance(api_result, dict) else [], [article['article_id']])
+
+    ids = [a['article_id'] for a in articles]
+    api_result = call_ollama_api(get_batch_screening_prompt(articles), model, output_format="json", retries=1,
+                                 keep_alive=keep_alive, use_cache=use_cache, schema=BATCH_SCREENING_SCHEMA,
+                                 validate=lambda r: set(_parse_batch_screening_results(r, ids)) == {str(i) for i in ids})
+    results = _parse_batch_screening_results(api_result, ids)
+
+    missing = [a for a in articles if a['article_id'] not in results]
+    if len(missing) == len(articles):
+        # Réponse inexploitable : on coupe le lot en deux pour limiter la taille du contexte
+        half = len(articles) // 2
+        results.update(_screen_articles_batched(articles[:half], model, keep_alive, use_cache))
+        results.update(_screen_articles_batched(articles[half:], model, keep_alive, use_cache))
+    elif missing:
+        print(f"⚠️ Screening groupé : {len(missing)} article(s) sans résultat valide, nouvel essai.")
+        results.update(_screen_articles_batched(missing, model, keep_alive, use_cache))
+    return results
+
+def get_screening_models(profile: dict, cascade: bool = None) -> tuple:
+    """
+    Retourne (modèle de premier niveau, modèle d'escalade ou None).
+    En cascade, le petit modèle évalue tous les articles et le modèle de pré-traitement
+    du profil (ou d'extraction s'il s'agit déjà du petit modèle) tranche les cas incertains.
+    """
+    if cascade is None:
+        cascade = config.SCREENING_CASCADE_ENABLED
+    if not cascade:
+        return profile['preprocess_model'], None
+
+    small_model = config.SCREENING_CASCADE_MODEL
+    large_model = profile['preprocess_model']
+    if large_model == small_model:
+        large_model = profile['extract_model']
+    return small_model, (large_model if large_model != small_model else None)
+
+def _merge_screening_cascade(results: dict, second: dict, small_model: str, large_model: str,
+                             pending: bool = False) -> dict:
+    """
+    Résultats de la cascade : évaluation de `small_model` (`results`), remplacée par celle de
+    `large_model` (`second`) pour les articles de la zone d'incertitude. Avec `pending`, la
+    réévaluation de ces articles est encore à faire (`cascade.pending`, voir submit_screening_escalations).
+    """
+    low, high = config.SCREENING_CASCADE_BAND
+    final = {}
+    for article_id, first in results.items():
+        score = first['relevance_score']
+        reason = None
+        borderline = low <= score <= high
+        if borderline:
+            reason = f"Score {score:g} dans la zone d'incertitude [{low:g} ; {high:g}]"
+            if pending:
+                reason += f" ; réévaluation par {large_model} en file"
+            elif article_id not in second:
+                reason += f" ; réévaluation par {large_model} échouée, score initial conservé"
+        tier2 = second.get(article_id)
+
+        merged = dict(tier2 or first)
+        merged['screening_model'] = large_model if tier2 else small_model
+        merged['cascade'] = {
+            'tier1': {'model': small_model, 'relevance_score': score, 'justification': first.get('justification', '')},
+            'tier2': {'model': large_model, 'relevance_score': tier2['relevance_score'],
+                      'justification': tier2.get('justification', '')} if tier2 else None,
+            'escalated': tier2 is not None,
+            'escalation_reason': reason,
+            'pending': pending and borderline
+        }
+        final[article_id] = merged
+    return final
+
+def submit_screening_escalations(project_id: str, extractions: list, profile: dict, use_llm_cache: bool = True,
+                                 screening_cascade: bool = None):
+    """
+    Confie les cas incertains de la cascade (extractions enregistrées avec `cascade.pending`) à une
+    tâche distincte, soumise au planificateur sous le grand modèle : elle est regroupée avec les autres
+    tâches de ce modèle au lieu de forcer un changement de modèle au milieu de chaque tâche de screening.
+    """
+    large_model = get_screening_models(profile, screening_cascade)[1]
+    article_ids = [e['pmid'] for e in extractions
+                   if (json.loads(e['extracted_data']).get('cascade') or {}).get('pending')]
+    if not large_model or not article_ids:
+        return
+    job = get_current_job()
+    submit_llm_job(job.origin if job else 'analylit_processing_v4', process_screening_escalation_task, large_model, {
+        'project_id': project_id, 'article_ids': article_ids, 'profile': profile,
+        'use_llm_cache': use_llm_cache, 'screening_cascade': screening_cascade
+    }, job_timeout=3600, keep_alive=ollama_client.keep_alive_for(profile.get('id')))
+    print(f"🔀 Cascade de screening : {len(article_ids)} article(s) confié(s) à {large_model}.")
+
+def process_screening_escalation_task(project_id: str, article_ids: list, profile: dict, use_llm_cache: bool = True,
+                                      screening_cascade: bool = None):
+    """
+    Second niveau de la cascade de screening : réévalue avec le grand modèle les articles restés
+    dans la zone d'incertitude et met à jour leurs extractions (le score du petit modèle est
+    conservé si la réévaluation échoue).
+    """
+    small_model, large_model = get_screening_models(profile, screening_cascade)
+    session = Session()
+    try:
+        rows = session.execute(text("""
+            SELECT s.*, e.extracted_data AS screening_result
+            FROM search_results s
+            JOIN extractions e ON e.project_id = s.project_id AND e.pmid = s.article_id
+            WHERE s.project_id = :pid AND s.article_id = ANY(:ids)
+        """), {'pid': project_id, 'ids': list(article_ids)}).fetchall()
+        session.close()
+
+        # Seuls les articles encore en attente (une tâche rejouée ne réévalue rien deux fois)
+        first, articles = {}, []
+        for row in rows:
+            result = json.loads(row.screening_result or '{}')
+            if (result.get('cascade') or {}).get('pending'):
+                first[row.article_id] = result
+                articles.append(dict(row._mapping))
+        if not articles or not large_model:
+            return
+
+        keep_alive = ollama_client.keep_alive_for(profile.get('id'))
+        second = _screen_articles_batched(articles, large_model, keep_alive, use_llm_cache)
+        final = _merge_screening_cascade(first, second, small_model, large_model)
+
+        session = Session()
+        now = datetime.now()
+        session.execute(text("""
+            UPDATE extractions SET
+                relevance_score = :relevance_score, relevance_justification = :relevance_justification,
+                extracted_data = :extracted_data, analysis_source = :analysis_source
+            WHERE project_id = :project_id AND pmid = :pmid
+        """), [{
+            'project_id': project_id, 'pmid': article_id,
+            'relevance_score': result['relevance_score'],
+            'relevance_justification': result.get('justification', ''),
+            'extracted_data': json.dumps(result),
+            'analysis_source': f"screening_{result['screening_model']}"
+        } for article_id, result in final.items()])
+        session.execute(text("""
+            INSERT INTO processing_log (project_id, pmid, status, details, timestamp)
+            VALUES (:project_id, :pmid, :status, :details, :timestamp)
+        """), [{'project_id': project_id, 'pmid': article_id, 'timestamp': now,
+                'status': 'success' if article_id in second else 'error',
+                'details': result['cascade']['escalation_reason']} for article_id, result in final.items()])
+        session.commit()
+
+        send_project_notification(project_id, 'article_processed',
+                                  f"{len(second)} cas incertain(s) réévalué(s) par {large_model}.",
+                                  {'article_ids': list(final), 'article_id': list(final)[-1]})
+
+    except CircuitOpenError as e:
+        session.rollback()
+        if not requeue_with_backoff(process_screening_escalation_task, {
+            'project_id': project_id, 'article_ids': article_ids, 'profile': profile,
+            'use_llm_cache': use_llm_cache, 'screening_cascade': screening_cascade
+        }, str(e), large_model):
+            print(f"❌ Cascade de screening abandonnée ({len(article_ids)} articles): {e}")
+
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Erreur lors de la réévaluation des cas incertains ({len(article_ids)} articles): {e}")
+
+    finally:
+        session.close()
+
+def process_screening_batch_task(project_id: str, article_ids: list, profile: dict, use_llm_cache: bool = True,
+                                 screening_cascade: bool = None, incremental: bool = False):
+    """
+    Pré-sélection d'un lot d'articles avec un seul prompt regroupant titres et résumés.
+    Les articles absents de la base passent par le traitement unitaire. En mode incrémental,
+    les articles dont l'extraction a déjà l'empreinte courante sont retirés du lot.
+    """
+    session = Session()
+    start_time = time.time()
+    model, escalation_model = get_screening_models(profile, screening_cascade)
+    try:
+        rows = session.execute(
+            text("SELECT * FROM search_results WHERE project_id = :pid AND article_id = ANY(:ids)"),
+            {'pid': project_id, 'ids': list(article_ids)}
+        ).fetchall()
+        articles = [dict(row._mapping) for row in rows]
+        found_ids = {a['article_id'] for a in articles}
+        stored_fingerprints = get_stored_fingerprints(session, project_id, article_ids) if incremental else {}
+        session.close()
+
+        for article_id in article_ids:
+            if article_id not in found_ids:
+                process_single_article_task(project_id, article_id, profile, 'screening', use_llm_cache=use_llm_cache,
+                                            screening_cascade=screening_cascade, incremental=incremental)
+        start_time = time.time()  # Le traitement unitaire comptabilise déjà son propre temps
+
+        fingerprints = {a['article_id']: article_fingerprint(project_id, a, profile, 'screening',
+                                                             screening_cascade=screening_cascade,
+                                                             prompt_name='batch_screening_prompt')
+                        for a in articles}
+        up_to_date = [a['article_id'] for a in articles if stored_fingerprints.get(a['article_id']) == fingerprints[a['article_id']]]
+        if up_to_date:
+            articles = [a for a in articles if a['article_id'] not in up_to_date]
+            session = Session()
+            for article_id in up_to_date:
+                log_processing_status(session, project_id, article_id, 'skipped', "Extraction à jour (empreinte inchangée).")
+            session.execute(text("""
+                UPDATE projects SET processed_count = processed_count + :count
+                WHERE id = :id
+            """), {'count': len(up_to_date), 'id': project_id})
+            session.commit()
+            session.close()
+
+        if not articles:
+            return
+
+        keep_alive = ollama_client.keep_alive_for(profile.get('id'))
+        results = _screen_articles_batched(articles, model, keep_alive, use_llm_cache)
+        if escalation_model:
+            results = _merge_screening_cascade(results, {}, model, escalation_model, pending=True)
+
+        session = Session()
+        now = datetime.now()
+        extractions, logs = [], []
+        for article in articles:
+            article_id = article['article_id']
+            result = results.get(article_id)
+            if result is None:
+                logs.append({'project_id': project_id, 'pmid': article_id, 'status': 'error', 'timestamp': now,
+                             'details': f"Erreur lors du traitement de l'article {article_id}: réponse LLM invalide."})
+                continue
+            extractions.append({
+                'id': str(uuid.uuid4()), 'project_id': project_id, 'pmid': article_id,
+                'title': article.get('title'), 'created_at': now,
+                'relevance_score': result['relevance_score'],
+                'relevance_justification': result.get('justification', ''),
+                'extracted_data': json.dumps(result),
+                'analysis_source': f"screening_{result.get('screening_model', model)}",
+                'input_fingerprint': fingerprints[article_id]
+            })
+            logs.append({'project_id': project_id, 'pmid': article_id, 'status': 'success', 'timestamp': now,
+                         'details': "Traitement 'screening' réussi (lot)."})
+
+        if extractions:
+            session.execute(text("""
+                INSERT INTO extractions (id, project_id, pmid, title, created_at, relevance_score, relevance_justification, extracted_data, analysis_source, input_fingerprint)
+                VALUES (:id, :project_id, :pmid, :title, :created_at, :relevance_score, :relevance_justification, :extracted_data, :analysis_source, :input_fingerprint)
+                ON CONFLICT (project_id, pmid) DO UPDATE SET
+                    title = EXCLUDED.title, extracted_data = EXCLUDED.extracted_data,
+                    relevance_score = EXCLUDED.relevance_score, relevance_justification = EXCLUDED.relevance_justification,
+                    analysis_source = EXCLUDED.analysis_source, created_at = EXCLUDED.created_at,
+                    input_fingerprint = EXCLUDED.input_fingerprint;
+            """), extractions)
+            session.execute(text("""
+                UPDATE projects SET processed_count = processed_count + :count
+                WHERE id = :id
+            """), {'count': len(extractions), 'id': project_id})
+        if logs:
+            session.execute(text("""
+                INSERT INTO processing_log (project_id, pmid, status, details, timestamp)
+                VALUES (:project_id, :pmid, :status, :details, :timestamp)
+            """), logs)
+        session.commit()
+        submit_screening_escalations(project_id, extractions, profile, use_llm_cache, screening_cascade)
+
+        processed_ids = [e['pmid'] for e in extractions]
+        send_project_notification(project_id, 'article_processed',
+                                  f"{len(processed_ids)} article(s) évalué(s) en lot.",
+                                  {'article_ids': processed_ids, 'article_id': processed_ids[-1] if processed_ids else None})
+
+    except CircuitOpenError as e:
+        session.rollback()
+        requeued = requeue_with_backoff(process_screening_batch_task, {
+            'project_id': project_id, 'article_ids': article_ids, 'profile': profile,
+            'use_llm_cache': use_llm_cache, 'screening_cascade': screening_cascade, 'incremental': incremental
+        }, str(e), model)
+        log_session = Session()
+        try:
+            for article_id in article_ids:
+                log_processing_status(log_session, project_id, article_id, 'requeued' if requeued else 'error', str(e))
+            log_session.commit()
+        finally:
+            log_session.close()
+
+    except Exception as e:
+        error_message = f"Erreur lors du screening groupé ({len(article_ids)} articles): {str(e)}"
+        print(f"❌ {error_message}")
+        session.rollback()
+        try:
+            error_session = Session()
+            for article_id in article_ids:
+                log_processing_status(error_session, project_id, article_id, 'error', error_message)
+            error_session.commit()
+            error_session.close()
+        except Exception as db_err:
+            print(f"❌ Impossible de logger l'erreur dans la BDD: {db_err}")
+
+    finally:
+        duration = time.time() - start_time
+        try:
+            timing_session = Session()
+            update_project_timing(timing_session, project_id, duration)
+            timing_session.commit()
+            timing_session.close()
+        except Exception as timing_err:
+            print(f"❌ Erreur lors de la mise à jour du temps de traitement : {timing_err}")
+
+        session.close()
+
+def enqueue_article_jobs(project_id: str, article_ids: list, profile: dict, analysis_mode: str, queue_name: str,
+                         custom_grid_id: str = None, use_llm_cache: bool = True, screening_batch_size: int = None,
+                         screening_cascade: bool = None, extraction_strategy: str = None, microbatch_size: int = None,
+                         incremental: bool = False):
+    """
+    Met en file les tâches d'analyse d'une liste d'articles : lots à prompt unique en screening si
+    `screening_batch_size` > 1, sinon micro-lots de `microbatch_size` articles (un appel LLM par
+    article, une transaction par lot). Les tâches passent par le planificateur par modèle s'il est
+    activé, sinon elles sont mises en file en un seul aller-retour Redis après le préchargement du modèle.
+    Avec `incremental`, les tâches ignorent les articles dont l'extraction est déjà à jour.
+    """
+    screening_batch_size = screening_batch_size or config.SCREENING_BATCH_SIZE
+    microbatch_size = microbatch_size or config.ARTICLE_MICROBATCH_SIZE
+    model = get_task_model(profile, analysis_mode, screening_cascade)
+    keep_alive = ollama_client.keep_alive_for(profile.get('id'))
+    if analysis_mode == 'screening' and screening_batch_size > 1:
+        # Screening groupé : plusieurs titres/résumés par prompt
+        jobs = [(process_screening_batch_task, 3600, {
+            'project_id': project_id,
+            'article_ids': article_ids[i:i + screening_batch_size],
+            'profile': profile,
+            'use_llm_cache': use_llm_cache,
+            'screening_cascade': screening_cascade,
+            'incremental': incremental
+        }) for i in range(0, len(article_ids), screening_batch_size)]
+    elif microbatch_size > 1:
+        jobs = [(process_article_microbatch_task, config.ARTICLE_MICROBATCH_JOB_TIMEOUT, {
+            'project_id': project_id,
+            'article_ids': article_ids[i:i + microbatch_size],
+            'profile': profile,
+            'analysis_mode': analysis_mode,
+            'custom_grid_id': custom_grid_id,
+            'use_llm_cache': use_llm_cache,
+            'screening_cascade': screening_cascade,
+            'extraction_strategy': extraction_strategy,
+            'incremental': incremental
+        }) for i in range(0, len(article_ids), microbatch_size)]
+    else:
+        jobs = [(process_single_article_task, 1800, {
+            'project_id': project_id,
+            'article_id': article_id,
+            'profile': profile,
+            'analysis_mode': analysis_mode,
+            'custom_grid_id': custom_grid_id,
+            'use_llm_cache': use_llm_cache,
+            'screening_cascade': screening_cascade,
+            'extraction_strategy': extraction_strategy,
+            'incremental': incremental
+        }) for article_id in article_ids]
+
+    if config.LLM_SCHEDULER_ENABLED:
+        # Le planificateur regroupe les articles par modèle et précharge le modèle au changement
+        model_scheduler.submit_many(model, [
+            model_scheduler.make_spec(queue_name, func, kwargs, job_timeout=job_timeout, keep_alive=keep_alive)
+            for func, job_timeout, kwargs in jobs
+        ])
+    else:
+        queue = Queue(queue_name, connection=redis_conn)
+        # Préchargement du modèle puis tâches des articles, en un seul pipeline Redis
+        queue.enqueue_many(
+            [Queue.prepare_data(warm_up_ollama_models_task, kwargs={'models': [model], 'keep_alive': keep_alive},
+                                timeout=config.REQUEST_TIMEOUT)] +
+            [Queue.prepare_data(func, kwargs=kwargs, timeout=job_timeout) for func, job_timeout, kwargs in jobs]
+        )
+
 def run_synthesis_task(project_id: str, profile: dict):
     """Génère une synthèse des articles pertinents d'un projet."""
     update_project_status(project_id, "synthesizing")
@@ -1115,7 +2681,8 @@ def run_synthesis_task(project_id: str, profile: dict):
             data_for_prompt=data_for_prompt
         )
 
-        synthesis_output = call_ollama_api(prompt, profile['synthesis_model'], output_format="json")
+        synthesis_output = call_ollama_api(prompt, profile['synthesis_model'], output_format="json",
+                                           keep_alive=ollama_client.keep_alive_for(profile.get('id')))
 
         if synthesis_output and isinstance(synthesis_output, dict):
             update_project_status(project_id, "completed", result=synthesis_output)
@@ -1151,11 +2718,9 @@ def run_discussion_generation_task(project_id: str):
         profile_name = project.profile_used or 'standard'
 
         # Récupérer le profil pour obtenir le modèle de synthèse
-        profile_row = session.execute(text("""
-            SELECT synthesis_model FROM analysis_profiles WHERE id = :id
-        """), {'id': profile_name}).fetchone()
+        profile_row = get_analysis_profile(profile_name)
 
-        model_name = profile_row.synthesis_model if profile_row else 'llama3.1:8b'
+        model_name = profile_row['synthesis_model'] if profile_row else 'llama3.1:8b'
 
         article_list = "\n".join([f"- {e.title} (ID: {e.pmid})" for e in extractions])
 
@@ -1173,7 +2738,7 @@ def run_discussion_generation_task(project_id: str):
 
 La discussion doit synthétiser les apports, analyser les perspectives, explorer les divergences et suggérer des pistes de recherche futures en citant les sources."""
 
-        discussion_text = call_ollama_api(prompt, model_name)
+        discussion_text = call_ollama_api(prompt, model_name, keep_alive=ollama_client.keep_alive_for(profile_name))
 
         if discussion_text:
             update_project_status(project_id, status="completed", discussion=discussion_text)
@@ -1203,11 +2768,9 @@ def run_knowledge_graph_task(project_id: str):
         profile_key = project.profile_used if project else 'standard'
 
         # Récupérer le modèle d'extraction du profil
-        profile_row = session.execute(text("""
-            SELECT extract_model FROM analysis_profiles WHERE id = :id
-        """), {'id': profile_key}).fetchone()
+        profile_row = get_analysis_profile(profile_key)
 
-        model_to_use = profile_row.extract_model if profile_row else 'llama3.1:8b'
+        model_to_use = profile_row['extract_model'] if profile_row else 'llama3.1:8b'
 
         titles = [f"{e.title} (ID: {e.pmid})" for e in extractions][:100]
 
@@ -1217,7 +2780,8 @@ Ta réponse doit être UNIQUEMENT un objet JSON avec "nodes" (id, label) et "edg
 
 Titres : {json.dumps(titles, indent=2)}"""
 
-        graph_data = call_ollama_api(prompt, model=model_to_use, output_format="json")
+        graph_data = call_ollama_api(prompt, model=model_to_use, output_format="json",
+                                     keep_alive=ollama_client.keep_alive_for(profile_key))
 
         if graph_data and "nodes" in graph_data and "edges" in graph_data:
             update_project_status(project_id, status="completed", graph=graph_data)
@@ -1236,11 +2800,17 @@ def run_prisma_flow_task(project_id: str):
     session = Session()
 
     try:
-        # Statistiques depuis search_results et extractions
-        total_found = session.execute(text("""
+        # Statistiques depuis search_results, search_result_duplicates et extractions :
+        # les doublons inter-sources sont écartés à l'ingestion et comptés à part
+        n_after_duplicates = session.execute(text("""
             SELECT COUNT(*) FROM search_results WHERE project_id = :id
         """), {'id': project_id}).scalar()
 
+        n_duplicates = session.execute(text("""
+            SELECT COUNT(*) FROM search_result_duplicates WHERE project_id = :id
+        """), {'id': project_id}).scalar()
+        total_found = n_after_duplicates + n_duplicates
+
         n_included = session.execute(text("""
             SELECT COUNT(*) FROM extractions WHERE project_id = :id
         """), {'id': project_id}).scalar()
@@ -1248,7 +2818,6 @@ def run_prisma_flow_task(project_id: str):
         if total_found == 0:
             return
 
-        n_after_duplicates = total_found
         n_excluded_screening = n_after_duplicates - n_included
 
         # Créer le diagramme
@@ -1259,6 +2828,7 @@ def run_prisma_flow_task(project_id: str):
         ax.text(0.5, 0.7, f'Articles après exclusion des doublons (n = {n_after_duplicates})', ha='center', va='center', bbox=box_style)
         ax.text(0.5, 0.5, f'Articles évalués (n = {n_after_duplicates})', ha='center', va='center', bbox=box_style)
         ax.text(0.5, 0.3, f'Études incluses (n = {n_included})', ha='center', va='center', bbox=box_style)
+        ax.text(1.0, 0.8, f'Doublons exclus (n = {n_duplicates})', ha='left', va='center', bbox=box_style)
         ax.text(1.0, 0.5, f'Exclus après criblage (n = {n_excluded_screening})', ha='left', va='center', bbox=box_style)
 
         ax.axis('off')
@@ -1491,6 +3061,7 @@ def import_pdfs_from_zotero_task(project_id: str, pmids: list, zotero_user_id: s
     for article_id in pmids:
         try:
             # Interroger directement l'API Zotero pour l'article spécifique
+            rate_limiter.wait('api.zotero.org')
             items = zot.items(q=article_id, limit=5)
             if not items:
                 print(f"⏩ Article {article_id} non trouvé dans Zotero.")
@@ -1498,10 +3069,12 @@ def import_pdfs_from_zotero_task(project_id: str, pmids: list, zotero_user_id: s
                 continue
 
             item = items[0] # On prend le premier résultat pertinent
+            rate_limiter.wait('api.zotero.org')
             attachments = zot.children(item['key'])
             pdf_found = False
             for attachment in attachments:
                 if attachment.get('data', {}).get('contentType') == 'application/pdf':
+                    rate_limiter.wait('api.zotero.org')
                     pdf_content = zot.file(attachment['key'])
                     safe_filename = sanitize_filename(article_id) + ".pdf"
                     pdf_path = project_dir / safe_filename
@@ -1518,8 +3091,6 @@ def import_pdfs_from_zotero_task(project_id: str, pmids: list, zotero_user_id: s
         except Exception as e:
             print(f"❌ Erreur de téléchargement pour {article_id}: {e}")
             failed_imports.append(article_id)
-        
-        time.sleep(0.3) # Politesse envers l'API
 
     message = f"Import Zotero terminé. {len(successful_imports)} PDF importés, {len(failed_imports)} échecs."
     print(f"📊 {message}")
@@ -1582,8 +3153,6 @@ def fetch_online_pdf_task(project_id, article_ids):
                 else:
                     print(f"⚠️ Statut HTTP {resp.status_code} pour article {article_id}")
 
-                time.sleep(0.4)  # politesse API
-
             except Exception as e:
                 print(f"❌ Erreur pour article {article_id}: {e}")
                 continue
@@ -1615,7 +3184,7 @@ def index_project_pdfs_task(project_id: str):
 
     try:
         project_dir = PROJECTS_DIR / project_id
-        chroma_client = chromadb.PersistentClient(path=str(project_dir / "chroma_db"))
+        chroma_client = get_chroma_client(str(project_dir / "chroma_db"))
         collection_name = f"project_{project_id}"
 
         try:
@@ -1648,13 +3217,13 @@ def index_project_pdfs_task(project_id: str):
 
         for pdf_file in pdf_files:
             try:
-                text = extract_text_from_pdf(str(pdf_file))
-                if not text or len(text.strip()) < MIN_CHUNK_LEN:
+                pdf_text = load_pdf_text(str(pdf_file))
+                if not pdf_text or len(pdf_text['text'].strip()) < MIN_CHUNK_LEN:
                     print(f"⚠️ PDF {pdf_file.name} ignoré (texte insuffisant)")
                     continue
 
-                # Normalisation et chunking
-                normalized_text = normalize_text(text)
+                # Normalisation page par page : les positions de page restent exactes dans le texte découpé
+                normalized_text, page_offsets = join_pages([normalize_text(page) for page in pdf_text['pages']])
                 chunks = text_splitter.split_text(normalized_text)
 
                 # Filtrage par taille minimale
@@ -1669,6 +3238,7 @@ def index_project_pdfs_task(project_id: str):
 
                 # Préparer les métadonnées et IDs
                 article_id = pdf_file.stem
+                cursor = 0
                 for i, chunk in enumerate(valid_chunks):
                     chunk_id = f"{article_id}_chunk_{i}"
                     metadata = {
@@ -1677,6 +3247,11 @@ def index_project_pdfs_task(project_id: str):
                         "chunk_index": i,
                         "chunk_length": len(chunk)
                     }
+                    # Page de début du chunk, d'après les positions de page du stock de textes
+                    position = normalized_text.find(chunk, cursor)
+                    if position != -1:
+                        cursor = position
+                        metadata["page"] = bisect.bisect_right(page_offsets, position)
 
                     all_documents.append(chunk)
                     all_metadatas.append(metadata)
@@ -1753,8 +3328,18 @@ def index_project_pdfs_task(project_id: str):
         print(f"❌ {error_msg}")
         send_project_notification(project_id, 'indexing_failed', error_msg)
 
-def answer_chat_question_task(project_id: str, question: str, profile: dict):
-    """Répond à une question de chat en utilisant le corpus indexé."""
+def answer_chat_question_task(project_id: str, question: str, profile: dict, message_id: str = None):
+    """
+    Répond à une question de chat en utilisant le corpus indexé.
+    La réponse est diffusée token par token (`chat_token`) puis finalisée (`chat_done`).
+    """
+    message_id = message_id or str(uuid.uuid4())
+    result = _answer_chat_question(project_id, question, profile, message_id)
+    emit_project_event(project_id, 'chat_done', {'message_id': message_id, **result})
+    return result
+
+def _answer_chat_question(project_id: str, question: str, profile: dict, message_id: str) -> dict:
+    """Recherche le contexte dans ChromaDB, génère la réponse en streaming et l'enregistre."""
     try:
         project_dir = PROJECTS_DIR / project_id
         chroma_path = project_dir / "chroma_db"
@@ -1766,7 +3351,7 @@ def answer_chat_question_task(project_id: str, question: str, profile: dict):
             }
 
         # Recherche dans ChromaDB
-        chroma_client = chromadb.PersistentClient(path=str(chroma_path))
+        chroma_client = get_chroma_client(str(chroma_path))
         collection_name = f"project_{project_id}"
 
         try:
@@ -1813,7 +3398,20 @@ QUESTION: {question}
 
 Fournissez une réponse détaillée et précise basée uniquement sur les informations du contexte. Si l'information n'est pas dans le contexte, dites-le clairement."""
 
-        answer = call_ollama_api(prompt, profile['synthesis_model'])
+        answer_parts, pending = [], []
+        last_flush = 0.0
+        for token in ollama_client.generate_stream(profile['synthesis_model'], prompt,
+                                                   keep_alive=ollama_client.keep_alive_for(profile.get('id'))):
+            answer_parts.append(token)
+            pending.append(token)
+            if time.time() - last_flush >= CHAT_STREAM_FLUSH_INTERVAL:
+                emit_project_event(project_id, 'chat_token', {'message_id': message_id, 'token': ''.join(pending)})
+                pending.clear()
+                last_flush = time.time()
+        if pending:
+            emit_project_event(project_id, 'chat_token', {'message_id': message_id, 'token': ''.join(pending)})
+
+        answer = ''.join(answer_parts)
 
         # Sauvegarder dans l'historique
         session = Session()
@@ -1836,7 +3434,7 @@ Fournissez une réponse détaillée et précise basée uniquement sur les inform
                 INSERT INTO chat_messages (id, project_id, role, content, sources, timestamp)
                 VALUES (:id, :project_id, :role, :content, :sources, :timestamp)
             """), {
-                'id': str(uuid.uuid4()),
+                'id': message_id,
                 'project_id': project_id,
                 'role': 'assistant',
                 'content': answer,
@@ -1894,6 +3492,7 @@ def import_pdfs_from_zotero_task(project_id: str, pmids: list, zotero_user_id: s
     for article_id in pmids:
         try:
             # Interroger directement l'API Zotero pour l'article spécifique
+            rate_limiter.wait('api.zotero.org')
             items = zot.items(q=article_id, limit=5)
             if not items:
                 print(f"⏩ Article {article_id} non trouvé dans Zotero.")
@@ -1901,10 +3500,12 @@ def import_pdfs_from_zotero_task(project_id: str, pmids: list, zotero_user_id: s
                 continue
 
             item = items[0] # On prend le premier résultat pertinent
+            rate_limiter.wait('api.zotero.org')
             attachments = zot.children(item['key'])
             pdf_found = False
             for attachment in attachments:
                 if attachment.get('data', {}).get('contentType') == 'application/pdf':
+                    rate_limiter.wait('api.zotero.org')
                     pdf_content = zot.file(attachment['key'])
                     safe_filename = sanitize_filename(article_id) + ".pdf"
                     pdf_path = project_dir / safe_filename
@@ -1922,8 +3523,6 @@ def import_pdfs_from_zotero_task(project_id: str, pmids: list, zotero_user_id: s
             print(f"❌ Erreur de téléchargement pour {article_id}: {e}")
             failed_imports.append(article_id)
 
-        time.sleep(0.3) # Politesse envers l'API
-
     message = f"Import Zotero terminé. {len(successful_imports)} PDF importés, {len(failed_imports)} échecs."
     print(f"📊 {message}")
     send_project_notification(
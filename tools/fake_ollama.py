@@ -0,0 +1,143 @@
+# Fichier : tools/fake_ollama.py
+#
+# Outil de développement (non copié dans les images Docker) : faux serveur Ollama (/api/ps,
+# /api/generate) et vérification de la répartition multi-hôtes.
+# Usage, depuis la racine du dépôt : python -m tools.fake_ollama
+# (nécessite le Redis de REDIS_URL ; les clés du test sont supprimées)
+
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import redis
+from config_v4 import get_config
+from utils.ollama_client import OllamaClient, normalize_model_name
+
+config = get_config()
+
+
+class FakeOllama:
+    """
+    Instance Ollama simulée sur un port local : `loaded` liste les modèles chargés,
+    `latency` retarde chaque génération, `down=True` fait répondre 503 à toutes les requêtes.
+    """
+
+    def __init__(self, loaded: list = None, latency: float = 0.0):
+        self.loaded = set(normalize_model_name(m) for m in loaded or [])
+        self.latency = latency
+        self.down = False
+        self.served = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Connexions keep-alive comme Ollama ; réponse écrite d'un bloc (pas d'attente de l'ACK retardé)
+            protocol_version = 'HTTP/1.1'
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if fake.down:
+                    return self._reply(503, {'error': 'unavailable'})
+                if self.path == '/api/ps':
+                    return self._reply(200, {'models': [{'name': m} for m in sorted(fake.loaded)]})
+                self._reply(404, {'error': 'not found'})
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if fake.down:
+                    return self._reply(503, {'error': 'unavailable'})
+                time.sleep(fake.latency)
+                with fake.lock:
+                    fake.served += 1
+                    fake.loaded.add(normalize_model_name(payload.get('model', '')))
+                self._reply(200, {'model': payload.get('model'), 'response': '{"decision": "include"}', 'done': True})
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def check_host_pool(redis_conn, model: str = 'fake-model', latency: float = 1.0) -> dict:
+    """
+    Vérifie sur deux faux hôtes : le routage vers l'hôte qui a le modèle chargé, le débit
+    quasi doublé avec un second hôte, puis l'éjection et la réadmission automatiques par la
+    sonde périodique. Retourne les mesures ; lève AssertionError en cas d'écart.
+    """
+    first, second = FakeOllama([model], latency).start(), FakeOllama([], latency).start()
+    interval = 0.2
+    client = OllamaClient([first.url, second.url], redis_conn, health_interval=interval)
+    hosts = client.pool.hosts
+    results = {}
+    try:
+        for host in hosts:
+            client.pool.probe(host, client.session)
+
+        # Routage : l'hôte qui a déjà le modèle chargé passe en premier
+        assert client.pool.ranked_hosts(model)[0] == first.url, "le modèle chargé n'est pas prioritaire"
+        client.generate(model, "ping", timeout=5)
+        assert first.served == 1 and second.served == 0, "requête non routée vers l'hôte chargé"
+
+        # Débit : mêmes appels simultanés avec un puis deux hôtes (un créneau par hôte et modèle)
+        def timed_batch(batch_client, calls: int = 4) -> float:
+            started = time.time()
+            with ThreadPoolExecutor(max_workers=calls) as executor:
+                list(executor.map(lambda _: batch_client.generate(model, "ping", timeout=5), range(calls)))
+            return time.time() - started
+
+        single_client = OllamaClient([first.url], redis_conn, health_interval=interval)
+        single = timed_batch(single_client)
+        single_client.pool.stop_monitor()
+        results['throughput_speedup'] = round(single / timed_batch(client), 2)
+        assert second.served > 0 and results['throughput_speedup'] > 1.5, f"débit non réparti ({results})"
+        assert normalize_model_name(model) in client.pool.state(second.url)['models'], "modèle chargé non mémorisé"
+
+        # Éjection : l'hôte en panne est écarté par la sonde périodique, sans trafic
+        first.down = True
+        deadline = time.time() + interval * (config.OLLAMA_HOST_MAX_FAILURES + 10)
+        while client.pool.state(first.url)['healthy'] and time.time() < deadline:
+            time.sleep(interval)
+        assert not client.pool.state(first.url)['healthy'], "hôte en panne non éjecté"
+        assert client.pool.ranked_hosts(model) == [second.url], "hôte éjecté encore proposé"
+
+        # Réadmission : dès que l'hôte répond de nouveau
+        first.down = False
+        deadline = time.time() + interval * 10
+        while not client.pool.state(first.url)['healthy'] and time.time() < deadline:
+            time.sleep(interval)
+        assert client.pool.state(first.url)['healthy'], "hôte rétabli non réadmis"
+        results['served'] = {first.url: first.served, second.url: second.served}
+        return results
+    finally:
+        client.pool.stop_monitor()
+        first.stop()
+        second.stop()
+        for host in hosts:
+            for key in redis_conn.scan_iter(match=f"*{host}*"):
+                redis_conn.delete(key)
+
+
+if __name__ == '__main__':
+    print(f"✅ Répartition multi-hôtes Ollama vérifiée: {check_host_pool(redis.from_url(config.REDIS_URL))}")
@@ -0,0 +1,161 @@
+# Fichier : utils/circuit_breaker.py
+
+import json
+import time
+import uuid
+from config_v4 import get_config
+
+config = get_config()
+
+# Compte un échec et ouvre le disjoncteur au seuil, en une seule opération
+RECORD_FAILURE_SCRIPT = """
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+redis.call('HSET', KEYS[1], 'host', ARGV[1], 'model', ARGV[2], 'last_error', ARGV[3])
+if failures >= tonumber(ARGV[4]) then
+    redis.call('HSET', KEYS[1], 'opened_at', ARGV[5])
+end
+return failures
+"""
+
+# Libère la sonde semi-ouverte seulement si elle appartient encore à l'appelant
+RELEASE_PROBE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation grossière du nombre de tokens (≈ 4 caractères par token)."""
+    return len(text or "") // 4 + 1
+
+
+class CircuitOpenError(Exception):
+    """Levée sans appel réseau quand aucun hôte d'un modèle n'est disponible (disjoncteur ouvert ou sonde en cours)."""
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"Disjoncteur ouvert pour {model} (nouvel essai possible dans {retry_after:.0f}s)")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur par couple (hôte, modèle), partagé entre workers via Redis.
+
+    - fermé : les appels passent ;
+    - ouvert : après `LLM_BREAKER_FAILURE_THRESHOLD` échecs consécutifs, les appels
+      échouent immédiatement pendant `LLM_BREAKER_COOLDOWN` secondes ;
+    - semi-ouvert : passé ce délai, un seul appel d'essai passe (jeton `SET NX` partagé entre
+      workers) ; un succès referme le disjoncteur, un échec le rouvre pour un nouveau délai.
+
+    Il conserve aussi les latences observées pour dériver un délai d'attente adaptatif.
+    """
+
+    PREFIX = 'ollama:breaker'
+
+    def __init__(self, redis_conn, host: str, model: str):
+        self.redis_conn = redis_conn
+        self.host = host
+        self.model = model
+        self.key = f"{self.PREFIX}:{host}:{model}"
+        self.latency_key = f"{self.key}:latency"
+        self.probe_key = f"{self.key}:probe"
+        self.probe_token = None
+
+    def _raw(self) -> dict:
+        if self.redis_conn is None:
+            return {}
+        return {k.decode(): v.decode() for k, v in self.redis_conn.hgetall(self.key).items()}
+
+    def state(self) -> dict:
+        raw = self._raw()
+        failures = int(raw.get('failures', 0))
+        opened_at = float(raw.get('opened_at', 0))
+        if failures < config.LLM_BREAKER_FAILURE_THRESHOLD:
+            status = 'closed'
+        elif time.time() - opened_at < config.LLM_BREAKER_COOLDOWN:
+            status = 'open'
+        else:
+            status = 'half_open'
+        retry_after = max(0.0, opened_at + config.LLM_BREAKER_COOLDOWN - time.time()) if status == 'open' else 0.0
+        # Semi-ouvert avec une sonde déjà en cours : pas de nouvel appel avant son issue
+        probe_ttl = self.redis_conn.pttl(self.probe_key) if status == 'half_open' and self.redis_conn is not None else -2
+        if probe_ttl > 0:
+            retry_after = probe_ttl / 1000
+        return {
+            'host': self.host,
+            'model': self.model,
+            'state': status,
+            'probing': probe_ttl > 0,
+            'failures': failures,
+            'opened_at': opened_at,
+            'retry_after': retry_after,
+            'last_error': raw.get('last_error', '')
+        }
+
+    def is_open(self) -> bool:
+        return self.state()['state'] == 'open'
+
+    def claim(self, lease_seconds: int) -> bool:
+        """
+        Autorise un appel : toujours si le disjoncteur est fermé, jamais s'il est ouvert ;
+        en semi-ouvert, seulement pour l'appelant qui obtient le jeton de sonde (expire après
+        `lease_seconds` si le worker disparaît). À libérer par `release()`.
+        """
+        status = self.state()['state']
+        if status != 'half_open' or self.redis_conn is None:
+            return status != 'open'
+        token = str(uuid.uuid4())
+        if self.redis_conn.set(self.probe_key, token, nx=True, ex=lease_seconds):
+            self.probe_token = token
+            return True
+        return False
+
+    def release(self):
+        if self.probe_token and self.redis_conn is not None:
+            self.redis_conn.register_script(RELEASE_PROBE_SCRIPT)(keys=[self.probe_key], args=[self.probe_token])
+        self.probe_token = None
+
+    def record_success(self, duration: float, prompt_tokens: int = None):
+        if self.redis_conn is None:
+            return
+        pipe = self.redis_conn.pipeline()
+        pipe.hset(self.key, mapping={'host': self.host, 'model': self.model, 'failures': 0, 'last_error': ''})
+        if prompt_tokens is not None:
+            pipe.lpush(self.latency_key, json.dumps([round(duration, 3), prompt_tokens]))
+            pipe.ltrim(self.latency_key, 0, config.LLM_LATENCY_SAMPLES - 1)
+        pipe.execute()
+
+    def record_failure(self, reason: str = ''):
+        if self.redis_conn is None:
+            return
+        failures = int(self.redis_conn.register_script(RECORD_FAILURE_SCRIPT)(keys=[self.key], args=[
+            self.host, self.model, reason[:200], config.LLM_BREAKER_FAILURE_THRESHOLD, time.time()]))
+        if failures >= config.LLM_BREAKER_FAILURE_THRESHOLD:
+            print(f"⛔ Disjoncteur ouvert pour {self.model} sur {self.host} ({failures} échecs): {reason}")
+
+    def timeout_for(self, prompt_tokens: int) -> int:
+        """
+        Délai d'attente adaptatif : percentile `LLM_TIMEOUT_PERCENTILE` des latences observées,
+        ramenées à la taille du prompt, multiplié par `LLM_TIMEOUT_MARGIN`.
+        Sans historique suffisant, on garde `REQUEST_TIMEOUT`.
+        """
+        if self.redis_conn is None:
+            return config.REQUEST_TIMEOUT
+        samples = [json.loads(s) for s in self.redis_conn.lrange(self.latency_key, 0, -1)]
+        if len(samples) < config.LLM_LATENCY_MIN_SAMPLES:
+            return config.REQUEST_TIMEOUT
+
+        # Latence normalisée par bloc de 1000 tokens de prompt (plus un coût fixe de génération)
+        normalized = sorted(duration / (1 + tokens / 1000) for duration, tokens in samples)
+        index = min(len(normalized) - 1, int(len(normalized) * config.LLM_TIMEOUT_PERCENTILE / 100))
+        estimate = normalized[index] * config.LLM_TIMEOUT_MARGIN * (1 + prompt_tokens / 1000)
+        return int(min(config.REQUEST_TIMEOUT, max(config.LLM_TIMEOUT_MIN, estimate)))
+
+    def snapshot(self) -> dict:
+        state = self.state()
+        state['adaptive_timeout_1k_tokens'] = self.timeout_for(1000)
+        state['latency_samples'] = self.redis_conn.llen(self.latency_key) if self.redis_conn is not None else 0
+        return state
@@ -0,0 +1,100 @@
+# Fichier : utils/config_cache.py
+
+import json
+import time
+import threading
+import redis
+from config_v4 import get_config
+
+config = get_config()
+
+INVALIDATION_CHANNEL = 'analylit:config:invalidate'
+
+
+def publish_invalidation(redis_conn, kind: str, key=None):
+    """
+    Signale aux workers qu'une donnée de configuration a changé : `kind` parmi
+    'prompt', 'grid', 'profile' ; `key=None` invalide toutes les entrées de ce type.
+    """
+    try:
+        redis_conn.publish(INVALIDATION_CHANNEL, json.dumps({'kind': kind, 'key': key}))
+    except redis.RedisError as e:
+        print(f"⚠️ Invalidation du cache de configuration non publiée ({kind}/{key}): {e}")
+
+
+class ConfigCache:
+    """
+    Cache en mémoire du worker pour les données de configuration lues à chaque article
+    (prompts, grilles d'extraction, profils d'analyse).
+
+    Les entrées sont invalidées par les messages publiés sur `INVALIDATION_CHANNEL`,
+    écoutés par un thread démon démarré au premier accès. Tant que l'abonnement n'est pas
+    actif (Redis indisponible), rien n'est mis en cache : chaque lecture va en base.
+    `CONFIG_CACHE_TTL` borne en plus l'âge des entrées, au cas où un message serait perdu.
+    """
+
+    def __init__(self, redis_conn, ttl: int = None):
+        self.redis_conn = redis_conn
+        self.ttl = ttl if ttl is not None else config.CONFIG_CACHE_TTL
+        self.entries = {}
+        self.generation = 0
+        self.subscribed = threading.Event()
+        self.lock = threading.Lock()
+        self._listener = None
+
+    def _ensure_listener(self):
+        if self.redis_conn is None or (self._listener is not None and self._listener.is_alive()):
+            return
+        with self.lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='config-cache', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            pubsub = self.redis_conn.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Les entrées lues avant l'abonnement ont pu manquer des invalidations
+                self.clear()
+                self.subscribed.set()
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        payload = json.loads(message['data'])
+                        self.invalidate(payload.get('kind'), payload.get('key'))
+            except (redis.RedisError, ValueError) as e:
+                print(f"⚠️ Cache de configuration : abonnement interrompu ({e}), nouvel essai dans 5s")
+            finally:
+                self.subscribed.clear()
+                self.clear()
+                pubsub.close()
+            time.sleep(5)
+
+    def get(self, kind: str, key, loader):
+        """
+        Retourne la valeur en cache pour (kind, key), sinon l'obtient via `loader()`.
+        `loader` doit lever une exception en cas d'erreur : seules les lectures réussies
+        (y compris « absent » = None) sont conservées.
+        """
+        self._ensure_listener()
+        entry = self.entries.get((kind, key))
+        if entry is not None and time.time() - entry[1] < self.ttl:
+            return entry[0]
+        generation = self.generation
+        value = loader()
+        with self.lock:
+            # Une invalidation reçue pendant la lecture rend la valeur potentiellement périmée
+            if self.subscribed.is_set() and generation == self.generation:
+                self.entries[(kind, key)] = (value, time.time())
+        return value
+
+    def invalidate(self, kind: str, key=None):
+        with self.lock:
+            self.generation += 1
+            for cached in [k for k in self.entries if k[0] == kind and (key is None or k[1] == key)]:
+                del self.entries[cached]
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
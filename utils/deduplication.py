@@ -0,0 +1,168 @@
+# Fichier : utils/deduplication.py
+
+import re
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+from config_v4 import get_config
+
+config = get_config()
+
+DOI_PATTERN = re.compile(r'10\.\d{4,9}/\S+')
+PMID_PATTERN = re.compile(r'^\d{1,9}$')
+YEAR_PATTERN = re.compile(r'\b(1[89]|20)\d{2}\b')
+
+
+def normalize_doi(value: str) -> str:
+    """DOI en minuscules, sans préfixe (https://doi.org/, doi:) ni ponctuation finale."""
+    match = DOI_PATTERN.search((value or '').strip().lower())
+    return match.group(0).rstrip('.,;') if match else ''
+
+
+def normalize_title(title: str) -> str:
+    """Titre sans accents, balises, ponctuation ni casse, espaces réduits."""
+    title = unicodedata.normalize('NFKD', re.sub(r'<[^>]+>', ' ', title or ''))
+    title = ''.join(ch for ch in title if not unicodedata.combining(ch)).lower()
+    return re.sub(r'\s+', ' ', re.sub(r'[^a-z0-9]+', ' ', title)).strip()
+
+
+def first_author_key(authors: str) -> str:
+    """Nom du premier auteur normalisé ("Nom, Prénom" ou "Prénom Nom")."""
+    first = (authors or '').split(';')[0].strip()
+    if not first:
+        return ''
+    surname = first.split(',')[0] if ',' in first else first.split()[-1]
+    return normalize_title(surname).replace(' ', '')
+
+
+def extract_year(publication_date) -> int:
+    match = YEAR_PATTERN.search(str(publication_date or ''))
+    return int(match.group(0)) if match else None
+
+
+class Deduplicator:
+    """
+    Dédoublonnage inter-sources des notices d'un projet, dans l'ordre d'arrivée :
+    la première notice d'un cluster devient la notice canonique, les suivantes sont des doublons.
+
+    Correspondances, de la plus sûre à la plus floue :
+    - `doi` : DOI normalisé identique (champ doi ou article_id de type DOI) ;
+    - `pmid` : même PMID (les notices PubMed renseignent la correspondance PMID↔DOI) ;
+    - `title` : titres normalisés similaires (≥ `DEDUP_TITLE_SIMILARITY`) dans un bloc
+      premier auteur + année (±1 an, pour les prépublications publiées l'année suivante).
+    """
+
+    def __init__(self, similarity: float = None):
+        self.similarity = similarity if similarity is not None else config.DEDUP_TITLE_SIMILARITY
+        self.known_ids = set()
+        self.by_doi = {}
+        self.by_pmid = {}
+        self.blocks = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _identifiers(record: dict):
+        article_id = str(record.get('article_id') or record.get('id') or '').strip()
+        doi = normalize_doi(record.get('doi')) or normalize_doi(article_id)
+        pmid = str(record.get('pmid') or '').strip()
+        if not pmid and record.get('database_source') == 'pubmed' and PMID_PATTERN.match(article_id):
+            pmid = article_id
+        return article_id, doi, pmid
+
+    def add(self, record: dict, canonical: bool = True, journal: list = None):
+        """
+        Indexe une notice déjà enregistrée : `canonical=False` pour un doublon connu,
+        dont seul l'identifiant est retenu (il ne sera ni réinséré ni compté de nouveau).
+        Les entrées créées sont notées dans `journal`, pour `undo`.
+        """
+        journal = journal if journal is not None else []
+        article_id, doi, pmid = self._identifiers(record)
+        if article_id not in self.known_ids:
+            self.known_ids.add(article_id)
+            journal.append(('id', article_id))
+        if not canonical:
+            return
+        if doi and doi not in self.by_doi:
+            self.by_doi[doi] = article_id
+            journal.append(('doi', doi))
+        if pmid and pmid not in self.by_pmid:
+            self.by_pmid[pmid] = article_id
+            journal.append(('pmid', pmid))
+        title = normalize_title(record.get('title'))
+        if title:
+            block = (first_author_key(record.get('authors')), extract_year(record.get('publication_date')))
+            self.blocks.setdefault(block, []).append((title, article_id))
+            journal.append(('block', (block, (title, article_id))))
+
+    def undo(self, journal: list):
+        """Retire de l'index les entrées notées par `split`/`add` (lot dont l'écriture a échoué)."""
+        with self.lock:
+            for kind, key in reversed(journal):
+                if kind == 'id':
+                    self.known_ids.discard(key)
+                elif kind == 'doi':
+                    self.by_doi.pop(key, None)
+                elif kind == 'pmid':
+                    self.by_pmid.pop(key, None)
+                else:
+                    block, entry = key
+                    if entry in self.blocks.get(block, []):
+                        self.blocks[block].remove(entry)
+            journal.clear()
+
+    def _match_title(self, record: dict):
+        title = normalize_title(record.get('title'))
+        if len(title) < 10:
+            return None
+        author = first_author_key(record.get('authors'))
+        year = extract_year(record.get('publication_date'))
+        years = (year - 1, year, year + 1) if year else (None,)
+        best = None
+        for block_year in years:
+            for candidate, article_id in self.blocks.get((author, block_year), []):
+                matcher = SequenceMatcher(None, title, candidate, autojunk=False)
+                if matcher.real_quick_ratio() < self.similarity or matcher.quick_ratio() < self.similarity:
+                    continue
+                score = matcher.ratio()
+                if score >= self.similarity and (best is None or score > best[1]):
+                    best = (article_id, score)
+        return best
+
+    def check(self, record: dict):
+        """
+        Cherche la notice canonique correspondant à `record`.
+        Retourne (article_id canonique, type de correspondance, score), ou None si la notice est nouvelle.
+        Une notice déjà connue sous le même identifiant retourne (article_id, 'same_id', 1.0).
+        """
+        article_id, doi, pmid = self._identifiers(record)
+        if article_id in self.known_ids:
+            return article_id, 'same_id', 1.0
+        if doi and doi in self.by_doi:
+            return self.by_doi[doi], 'doi', 1.0
+        if pmid and pmid in self.by_pmid:
+            return self.by_pmid[pmid], 'pmid', 1.0
+        match = self._match_title(record)
+        if match:
+            return match[0], 'title', round(match[1], 3)
+        return None
+
+    def split(self, records: list, journal: list = None):
+        """
+        Répartit un lot en notices nouvelles (indexées au passage, y compris entre elles)
+        et doublons [(notice, article_id canonique, type, score)] ; les notices déjà
+        enregistrées sous le même identifiant sont ignorées. Avec `journal`, les entrées
+        ajoutées à l'index y sont notées, pour les retirer (`undo`) si l'écriture du lot échoue.
+        """
+        unique, duplicates = [], []
+        with self.lock:
+            for record in records:
+                if not self._identifiers(record)[0]:
+                    continue
+                match = self.check(record)
+                if match is None:
+                    self.add(record, journal=journal)
+                    unique.append(record)
+                elif match[1] != 'same_id':
+                    self.add(record, canonical=False, journal=journal)
+                    duplicates.append((record, *match))
+        return unique, duplicates
@@ -0,0 +1,102 @@
+# Fichier : utils/llm_cache.py
+
+import json
+import random
+import hashlib
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from config_v4 import get_config
+
+config = get_config()
+
+
+def make_cache_key(model: str, prompt: str, output_format: str = "", options: dict = None) -> str:
+    """Clé adressée par contenu : SHA-256 de (modèle, prompt, format, options)."""
+    material = json.dumps({
+        'model': model,
+        'prompt': prompt,
+        'format': output_format or "",
+        'options': options or {}
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Cache PostgreSQL des réponses Ollama (table `llm_cache`).
+    L'éviction se fait par âge (dernier accès) et par taille totale, de façon
+    opportuniste lors des écritures.
+    """
+
+    def __init__(self, session_factory):
+        self.Session = session_factory
+
+    def get(self, key: str) -> str | None:
+        session = self.Session()
+        try:
+            row = session.execute(text("""
+                UPDATE llm_cache SET hits = hits + 1, last_hit_at = :now
+                WHERE key = :key
+                RETURNING response
+            """), {'key': key, 'now': datetime.now()}).fetchone()
+            session.commit()
+            return row.response if row else None
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Cache LLM indisponible (lecture): {e}")
+            return None
+        finally:
+            session.close()
+
+    def set(self, key: str, model: str, response: str):
+        session = self.Session()
+        try:
+            now = datetime.now()
+            session.execute(text("""
+                INSERT INTO llm_cache (key, model, response, size_bytes, hits, created_at, last_hit_at)
+                VALUES (:key, :model, :response, :size_bytes, 0, :now, :now)
+                ON CONFLICT (key) DO UPDATE SET
+                    response = EXCLUDED.response, size_bytes = EXCLUDED.size_bytes,
+                    last_hit_at = EXCLUDED.last_hit_at
+            """), {
+                'key': key, 'model': model, 'response': response,
+                'size_bytes': len(response.encode('utf-8')), 'now': now
+            })
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Cache LLM indisponible (écriture): {e}")
+        finally:
+            session.close()
+
+        if random.random() < config.LLM_CACHE_PRUNE_PROBABILITY:
+            self.prune()
+
+    def prune(self) -> int:
+        """Supprime les entrées trop anciennes puis les moins récemment utilisées au-delà de la taille max."""
+        session = self.Session()
+        try:
+            expired = session.execute(text("""
+                DELETE FROM llm_cache WHERE last_hit_at < :cutoff
+            """), {'cutoff': datetime.now() - timedelta(days=config.LLM_CACHE_MAX_AGE_DAYS)}).rowcount
+
+            oversized = session.execute(text("""
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size_bytes) OVER (ORDER BY last_hit_at DESC, key) AS cumulative
+                        FROM llm_cache
+                    ) ranked
+                    WHERE cumulative > :max_bytes
+                )
+            """), {'max_bytes': config.LLM_CACHE_MAX_SIZE_MB * 1024 * 1024}).rowcount
+
+            session.commit()
+            if expired or oversized:
+                print(f"🧹 Cache LLM: {expired} entrées expirées, {oversized} évincées (taille).")
+            return expired + oversized
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Erreur lors de la purge du cache LLM: {e}")
+            return 0
+        finally:
+            session.close()
@@ -0,0 +1,206 @@
+# Fichier : utils/model_scheduler.py
+
+import json
+import time
+import uuid
+from datetime import timedelta
+from rq import Callback, Queue, Worker
+from config_v4 import get_config
+
+config = get_config()
+
+DISPATCH_FUNC = 'tasks_v4_complete.dispatch_llm_jobs_task'
+SUBMIT_FUNC = 'tasks_v4_complete.submit_llm_jobs_task'
+WARM_UP_FUNC = 'tasks_v4_complete.warm_up_ollama_models_task'
+REDISPATCH_CALLBACK = Callback('utils.model_scheduler.redispatch_after_job')
+
+
+def redispatch_after_job(job, connection, *args, **kwargs):
+    """Rappel RQ (succès ou échec) d'une tâche libérée : remplit aussitôt la place qu'elle libère."""
+    try:
+        ModelAffinityScheduler(connection).dispatch(reschedule=False)
+    except Exception as e:
+        print(f"⚠️ Planificateur LLM : dispatch après la tâche {job.id} impossible: {e}")
+
+
+class ModelAffinityScheduler:
+    """
+    Regroupe les tâches LLM en attente par modèle cible et les libère vers les files RQ
+    par lots d'un même modèle, pour limiter les déchargements/rechargements dans Ollama.
+
+    Les tâches sont conservées dans Redis (une liste par modèle) jusqu'à leur libération.
+    Une tâche de dispatch, reprogrammée toutes les `LLM_SCHEDULER_DISPATCH_INTERVAL` secondes
+    tant qu'il reste des tâches en attente, choisit le lot suivant : on reste sur le modèle
+    courant tant qu'aucune tâche d'un autre modèle n'a dépassé son délai d'attente maximal
+    (`max_wait`), plus court pour les tâches interactives.
+
+    Seules `LLM_SCHEDULER_QUEUE_DEPTH` tâches par worker de la file sont laissées en attente
+    dans RQ : une tâche libérée plus tard (interactive notamment) ne patiente pas derrière un long
+    lot. Chaque tâche libérée relance un dispatch dès qu'elle se termine, sans attendre le prochain
+    passage programmé.
+
+    Chaque tâche reçoit à la soumission l'identifiant de la tâche RQ qui sera créée à sa libération.
+    """
+
+    PREFIX = 'llm_sched'
+
+    def __init__(self, redis_conn):
+        self.redis_conn = redis_conn
+
+    def _key(self, *parts) -> str:
+        return ':'.join((self.PREFIX,) + parts)
+
+    @staticmethod
+    def make_spec(queue_name: str, func, kwargs: dict, job_timeout=1800, interactive: bool = False,
+                  keep_alive: str = None, meta: dict = None) -> dict:
+        """Décrit une tâche en attente (sérialisable en JSON)."""
+        max_wait = config.LLM_SCHEDULER_INTERACTIVE_MAX_WAIT if interactive else config.LLM_SCHEDULER_MAX_WAIT
+        now = time.time()
+        return {
+            'job_id': str(uuid.uuid4()),
+            'queue': queue_name,
+            'func': func if isinstance(func, str) else f"{func.__module__}.{func.__name__}",
+            'kwargs': kwargs,
+            'job_timeout': job_timeout,
+            'keep_alive': keep_alive,
+            'interactive': interactive,
+            'meta': meta or {},
+            'submitted_at': now,
+            'deadline': now + max_wait
+        }
+
+    def submit(self, queue_name: str, func, model: str, kwargs: dict, job_timeout=1800,
+               interactive: bool = False, keep_alive: str = None) -> str:
+        """
+        Enregistre une tâche LLM en attente pour `model` et déclenche un dispatch si besoin.
+        Retourne l'identifiant de la future tâche RQ.
+        """
+        spec = self.make_spec(queue_name, func, kwargs, job_timeout, interactive, keep_alive)
+        self.submit_many(model, [spec])
+        return spec['job_id']
+
+    def submit_many(self, model: str, specs: list):
+        """Enregistre plusieurs tâches déjà décrites (un seul aller-retour Redis)."""
+        if not specs:
+            return
+        pipe = self.redis_conn.pipeline()
+        pipe.rpush(self._key('pending', model), *[json.dumps(spec) for spec in specs])
+        pipe.sadd(self._key('models'), model)
+        pipe.execute()
+        if any(spec.get('interactive') for spec in specs):
+            # Dispatch immédiat, en tête de file, sans attendre le prochain passage programmé
+            Queue(specs[0]['queue'], connection=self.redis_conn).enqueue(DISPATCH_FUNC, job_timeout=300, at_front=True)
+        else:
+            self.schedule_dispatch(specs[0]['queue'])
+
+    def submit_later(self, model: str, spec: dict, delay: float):
+        """Soumet une tâche déjà décrite après `delay` secondes (remise en file avec attente)."""
+        Queue(spec['queue'], connection=self.redis_conn).enqueue_in(
+            timedelta(seconds=delay), SUBMIT_FUNC, kwargs={'model': model, 'specs': [spec]}, job_timeout=60)
+
+    def schedule_dispatch(self, queue_name: str, delay: float = 0):
+        """
+        Programme une tâche de dispatch (en tête de file, après `delay` secondes), sauf si une autre
+        l'est déjà. Le verrou expire vite : une tâche de dispatch perdue ne bloque pas les modèles.
+        """
+        ttl = int(delay) + config.LLM_SCHEDULER_DISPATCH_TTL
+        if not self.redis_conn.set(self._key('dispatch_pending'), 1, nx=True, ex=ttl):
+            return
+        queue = Queue(queue_name, connection=self.redis_conn)
+        if delay:
+            queue.enqueue_in(timedelta(seconds=delay), DISPATCH_FUNC, job_timeout=300, at_front=True)
+        else:
+            queue.enqueue(DISPATCH_FUNC, job_timeout=300, at_front=True)
+
+    def _heads(self) -> dict:
+        heads = {}
+        for raw_model in self.redis_conn.smembers(self._key('models')):
+            model = raw_model.decode() if isinstance(raw_model, bytes) else raw_model
+            head = self.redis_conn.lindex(self._key('pending', model), 0)
+            if head is None:
+                self.redis_conn.srem(self._key('models'), model)
+                continue
+            heads[model] = json.loads(head)
+        return heads
+
+    def _choose_model(self, heads: dict, current: str | None) -> str:
+        now = time.time()
+        overdue = [m for m, spec in heads.items() if m != current and spec['deadline'] <= now]
+        if overdue:
+            return min(overdue, key=lambda m: heads[m]['deadline'])
+        if current in heads:
+            return current
+        return min(heads, key=lambda m: heads[m]['submitted_at'])
+
+    def _queue_depth(self, queue: Queue) -> int:
+        """Tâches à garder en attente dans RQ : `LLM_SCHEDULER_QUEUE_DEPTH` par worker de la file."""
+        return config.LLM_SCHEDULER_QUEUE_DEPTH * max(1, Worker.count(connection=self.redis_conn, queue=queue))
+
+    def dispatch(self, reschedule: bool = True) -> dict | None:
+        """
+        Libère le prochain lot vers RQ ; retourne un résumé ou None s'il n'y a rien à faire.
+        Sans `reschedule` (dispatch déclenché par la fin d'une tâche), le passage programmé
+        suivant est laissé à la tâche de dispatch en cours.
+        """
+        if reschedule:
+            self.redis_conn.delete(self._key('dispatch_pending'))
+
+        heads = self._heads()
+        if not heads:
+            self.redis_conn.delete(self._key('current_model'))
+            return None
+
+        current = self.redis_conn.get(self._key('current_model'))
+        current = current.decode() if isinstance(current, bytes) else current
+        model = self._choose_model(heads, current)
+        queue_name = heads[model]['queue']
+
+        # La file RQ est alimentée au fil de l'eau : seule la place libre est remplie
+        queue = Queue(queue_name, connection=self.redis_conn)
+        headroom = self._queue_depth(queue) - queue.count
+        raw_batch = []
+        if headroom > 0:
+            raw_batch = self.redis_conn.lpop(self._key('pending', model),
+                                             min(config.LLM_SCHEDULER_BATCH_SIZE, headroom)) or []
+        batch = [json.loads(raw) for raw in raw_batch]
+        if not batch:
+            if reschedule:
+                self.schedule_dispatch(queue_name, delay=config.LLM_SCHEDULER_DISPATCH_INTERVAL)
+            return {'model': model, 'released': 0, 'switched': False,
+                    'remaining': sum(self.pending_counts().values())}
+
+        # Préchargement éventuel puis tâches du lot, mis en file en un seul pipeline Redis
+        job_datas = {}
+        if model != current:
+            job_datas.setdefault(batch[0]['queue'], []).append(Queue.prepare_data(
+                WARM_UP_FUNC, kwargs={'models': [model], 'keep_alive': batch[0].get('keep_alive')},
+                timeout=config.REQUEST_TIMEOUT))
+
+        for spec in batch:
+            job_datas.setdefault(spec['queue'], []).append(Queue.prepare_data(
+                spec['func'], kwargs=spec['kwargs'], timeout=spec['job_timeout'], job_id=spec.get('job_id'),
+                meta=spec.get('meta') or None, on_success=REDISPATCH_CALLBACK, on_failure=REDISPATCH_CALLBACK))
+
+        pipe = self.redis_conn.pipeline()
+        for target_queue, datas in job_datas.items():
+            Queue(target_queue, connection=self.redis_conn).enqueue_many(datas, pipeline=pipe)
+        pipe.execute()
+
+        self.redis_conn.set(self._key('current_model'), model)
+        remaining = sum(self.pending_counts().values())
+        if remaining and reschedule:
+            self.schedule_dispatch(queue_name, delay=config.LLM_SCHEDULER_DISPATCH_INTERVAL)
+
+        return {'model': model, 'released': len(batch), 'switched': model != current, 'remaining': remaining}
+
+    def pending_counts(self) -> dict:
+        counts = {}
+        for raw_model in self.redis_conn.smembers(self._key('models')):
+            model = raw_model.decode() if isinstance(raw_model, bytes) else raw_model
+            counts[model] = self.redis_conn.llen(self._key('pending', model))
+        return counts
+
+    def clear(self):
+        for model in list(self.pending_counts()):
+            self.redis_conn.delete(self._key('pending', model))
+        self.redis_conn.delete(self._key('models'), self._key('current_model'), self._key('dispatch_pending'))
@@ -0,0 +1,412 @@
+# Fichier : utils/ollama_client.py
+
+import os
+import json
+import time
+import uuid
+import threading
+import requests
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+from config_v4 import get_config
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, estimate_tokens
+
+config = get_config()
+
+
+def normalize_model_name(model: str) -> str:
+    """Ollama ajoute le tag `:latest` quand aucun tag n'est précisé."""
+    return model if ':' in model else f"{model}:latest"
+
+
+class ModelSlot:
+    """
+    Sémaphore distribué (Redis) limitant le nombre d'appels simultanés vers un modèle.
+    Partagé par tous les workers ; chaque jeton expire après `lease_seconds` pour
+    qu'un worker tué ne bloque pas le modèle indéfiniment.
+    """
+
+    def __init__(self, redis_conn, model: str, limit: int, lease_seconds: int,
+                 wait_timeout: int = 1800, poll_interval: float = 0.5, host: str = None):
+        self.redis_conn = redis_conn
+        self.key = f"ollama:slots:{host}:{model}" if host else f"ollama:slots:{model}"
+        self.limit = max(1, limit)
+        self.lease_seconds = lease_seconds
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.token = None
+
+    def try_acquire(self) -> bool:
+        """Tente de prendre un créneau sans attendre."""
+        token = str(uuid.uuid4())
+        now = time.time()
+        pipe = self.redis_conn.pipeline(True)
+        pipe.zremrangebyscore(self.key, '-inf', now - self.lease_seconds)
+        pipe.zadd(self.key, {token: now})
+        pipe.zrank(self.key, token)
+        pipe.expire(self.key, self.lease_seconds)
+        _, _, rank, _ = pipe.execute()
+        if rank is not None and rank < self.limit:
+            self.token = token
+            return True
+        self.redis_conn.zrem(self.key, token)
+        return False
+
+    def acquire(self):
+        deadline = time.time() + self.wait_timeout
+        while not self.try_acquire():
+            if time.time() > deadline:
+                raise TimeoutError(f"Aucun créneau libre pour {self.key} après {self.wait_timeout}s")
+            time.sleep(self.poll_interval)
+
+    def release(self):
+        if self.token:
+            self.redis_conn.zrem(self.key, self.token)
+            self.token = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class OllamaHostPool:
+    """
+    Ensemble d'instances Ollama partagé par les workers via Redis.
+    Chaque hôte est sondé toutes les `health_interval` secondes sur /api/ps (santé + modèles
+    chargés) par un thread démon du processus ; il est éjecté après `OLLAMA_HOST_MAX_FAILURES`
+    échecs consécutifs et réadmis dès qu'une sonde réussit, même sans trafic.
+    """
+
+    PREFIX = 'ollama:hosts'
+
+    def __init__(self, hosts: list, redis_conn=None, health_interval: float = None):
+        self.hosts = [h.rstrip('/') for h in hosts]
+        self.redis_conn = redis_conn
+        self.health_interval = health_interval if health_interval is not None else config.OLLAMA_HEALTH_INTERVAL
+        self._monitor = None
+        self._monitor_pid = None
+        self._monitor_lock = threading.Lock()
+        self._monitor_stop = threading.Event()
+
+    def _key(self, host: str, *parts) -> str:
+        return ':'.join((self.PREFIX, host) + parts)
+
+    def state(self, host: str) -> dict:
+        if self.redis_conn is None:
+            return {'healthy': True, 'failures': 0, 'models': [], 'probed_at': 0.0, 'last_error': ''}
+        raw = {k.decode(): v.decode() for k, v in self.redis_conn.hgetall(self._key(host)).items()}
+        return {
+            'healthy': raw.get('healthy', '1') == '1',
+            'failures': int(raw.get('failures', 0)),
+            'models': sorted(m.decode() for m in self.redis_conn.smembers(self._key(host, 'models'))),
+            'probed_at': float(raw.get('probed_at', 0)),
+            'last_error': raw.get('last_error', '')
+        }
+
+    def probe(self, host: str, session: requests.Session) -> bool:
+        try:
+            response = session.get(f"{host}/api/ps", timeout=config.OLLAMA_HEALTH_TIMEOUT)
+            response.raise_for_status()
+            models = [m.get('name') or m.get('model') for m in response.json().get('models', [])]
+        except (requests.RequestException, ValueError) as e:
+            self.record_failure(host, str(e))
+            return False
+
+        if self.redis_conn is not None:
+            if not self.state(host)['healthy']:
+                print(f"✅ Hôte Ollama réadmis: {host}")
+            # Remplacement atomique de la liste des modèles chargés (MULTI/EXEC)
+            pipe = self.redis_conn.pipeline(True)
+            pipe.hset(self._key(host), mapping={'healthy': 1, 'failures': 0, 'probed_at': time.time(), 'last_error': ''})
+            pipe.delete(self._key(host, 'models'))
+            if models:
+                pipe.sadd(self._key(host, 'models'), *[normalize_model_name(m) for m in models if m])
+            pipe.execute()
+        return True
+
+    def record_failure(self, host: str, reason: str = ''):
+        if self.redis_conn is None:
+            return
+        failures = self.redis_conn.hincrby(self._key(host), 'failures', 1)
+        self.redis_conn.hset(self._key(host), mapping={'probed_at': time.time(), 'last_error': reason[:200]})
+        if failures >= config.OLLAMA_HOST_MAX_FAILURES and self.state(host)['healthy']:
+            self.redis_conn.hset(self._key(host), 'healthy', 0)
+            print(f"❌ Hôte Ollama éjecté après {failures} échecs: {host} ({reason})")
+
+    def refresh_if_due(self, session: requests.Session):
+        """Sonde les hôtes dont l'état date de plus de `health_interval` (un seul worker à la fois)."""
+        if self.redis_conn is None:
+            return
+        now = time.time()
+        for host in self.hosts:
+            if now - self.state(host)['probed_at'] < self.health_interval:
+                continue
+            if self.redis_conn.set(self._key(host, 'probe_lock'), 1, nx=True, px=max(1, int(self.health_interval * 1000))):
+                self.probe(host, session)
+
+    def start_monitor(self):
+        """Démarre (une fois par processus) le thread démon qui sonde les hôtes périodiquement."""
+        if self.redis_conn is None or (self._monitor_pid == os.getpid() and self._monitor.is_alive()):
+            return
+        with self._monitor_lock:
+            if self._monitor_pid != os.getpid() or not self._monitor.is_alive():
+                self._monitor = threading.Thread(target=self._monitor_loop, name='ollama-health', daemon=True)
+                self._monitor_pid = os.getpid()
+                self._monitor.start()
+
+    def _monitor_loop(self):
+        session = requests.Session()  # une session propre au thread : requests.Session n'est pas thread-safe
+        while not self._monitor_stop.is_set():
+            try:
+                self.refresh_if_due(session)
+            except Exception as e:
+                print(f"⚠️ Sonde des hôtes Ollama interrompue: {e}")
+            self._monitor_stop.wait(self.health_interval)
+
+    def stop_monitor(self):
+        self._monitor_stop.set()
+        if self._monitor is not None and self._monitor_pid == os.getpid():
+            self._monitor.join()
+
+    def mark_loaded(self, host: str, model: str):
+        """Mémorise qu'un hôte vient de servir un modèle (donc chargé) en attendant la prochaine sonde."""
+        if self.redis_conn is not None:
+            self.redis_conn.sadd(self._key(host, 'models'), normalize_model_name(model))
+
+    def inflight(self, host: str) -> int:
+        if self.redis_conn is None:
+            return 0
+        return self.redis_conn.zcount(self._key(host, 'inflight'), time.time(), '+inf')
+
+    def begin(self, host: str, lease_seconds: int) -> str | None:
+        if self.redis_conn is None:
+            return None
+        token = str(uuid.uuid4())
+        key = self._key(host, 'inflight')
+        pipe = self.redis_conn.pipeline(True)
+        pipe.zremrangebyscore(key, '-inf', time.time())
+        pipe.zadd(key, {token: time.time() + lease_seconds})
+        pipe.expire(key, lease_seconds)
+        pipe.execute()
+        return token
+
+    def end(self, host: str, token: str | None):
+        if token and self.redis_conn is not None:
+            self.redis_conn.zrem(self._key(host, 'inflight'), token)
+
+    def ranked_hosts(self, model: str) -> list:
+        """Hôtes sains, d'abord ceux qui ont déjà le modèle chargé, puis par nombre de requêtes en cours."""
+        states = {host: self.state(host) for host in self.hosts}
+        healthy = [h for h in self.hosts if states[h]['healthy']]
+        if not healthy:
+            # Tous les hôtes sont éjectés : on tente quand même plutôt que d'échouer sans essayer
+            healthy = list(self.hosts)
+        wanted = normalize_model_name(model)
+        return sorted(healthy, key=lambda h: (wanted not in states[h]['models'], self.inflight(h)))
+
+    def snapshot(self) -> list:
+        return [dict(self.state(host), host=host, inflight=self.inflight(host)) for host in self.hosts]
+
+
+class OllamaClient:
+    """
+    Client Ollama avec session HTTP persistante, répartition multi-hôtes, limitation de concurrence,
+    keep-alive et disjoncteur par (hôte, modèle).
+    """
+
+    def __init__(self, base_urls, redis_conn=None, health_interval: float = None):
+        if isinstance(base_urls, str):
+            base_urls = [base_urls]
+        self.redis_conn = redis_conn
+        self.pool = OllamaHostPool(base_urls, redis_conn, health_interval)
+        self._session = None
+        self._session_pid = None
+
+    @property
+    def base_url(self) -> str:
+        return self.pool.hosts[0]
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        Session keep-alive propre au processus (recréée après un fork). Les connexions ne sont
+        réutilisées d'une tâche à l'autre que si les tâches s'exécutent dans le processus du worker
+        (`rq.worker.SimpleWorker`, cf. docker-compose) : le Worker RQ par défaut forke à chaque tâche.
+        """
+        if self._session is None or self._session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=config.OLLAMA_POOL_SIZE,
+                                  pool_maxsize=config.OLLAMA_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+            self._session_pid = os.getpid()
+        return self._session
+
+    @staticmethod
+    def keep_alive_for(profile_id: str = None) -> str:
+        """Durée de maintien en mémoire du modèle selon le profil (fast/standard/deep)."""
+        return config.OLLAMA_KEEP_ALIVE.get(profile_id, config.OLLAMA_DEFAULT_KEEP_ALIVE)
+
+    @staticmethod
+    def concurrency_for(model: str) -> int:
+        return int(config.OLLAMA_MODEL_CONCURRENCY.get(model, config.OLLAMA_MAX_CONCURRENCY_PER_MODEL))
+
+    def breaker(self, host: str, model: str) -> CircuitBreaker:
+        return CircuitBreaker(self.redis_conn, host, model)
+
+    def breakers_snapshot(self) -> list:
+        """État des disjoncteurs connus (un par couple hôte/modèle déjà sollicité)."""
+        if self.redis_conn is None:
+            return []
+        snapshots = []
+        for key in self.redis_conn.scan_iter(match=f"{CircuitBreaker.PREFIX}:*"):
+            key = key.decode() if isinstance(key, bytes) else key
+            if key.endswith((':latency', ':probe')):
+                continue
+            host, model = self.redis_conn.hmget(key, 'host', 'model')
+            if host and model:
+                snapshots.append(self.breaker(host.decode(), model.decode()).snapshot())
+        return sorted(snapshots, key=lambda s: (s['model'], s['host']))
+
+    def _slot(self, host: str, model: str, timeout: int):
+        if self.redis_conn is None:
+            return _NullSlot()
+        return ModelSlot(self.redis_conn, model, self.concurrency_for(model), lease_seconds=timeout + 60,
+                         wait_timeout=config.OLLAMA_SLOT_WAIT_TIMEOUT, host=host)
+
+    @contextmanager
+    def _lease(self, model: str, timeout: int, prompt_tokens: int = None):
+        """
+        Réserve un hôte et un créneau pour `model` ; produit l'URL de l'hôte choisi.
+        Les hôtes dont le disjoncteur est ouvert pour ce modèle, ou semi-ouvert avec une sonde déjà
+        en cours, sont ignorés ; s'il n'en reste aucun, CircuitOpenError est levée immédiatement.
+        Seule l'attente d'un créneau libre boucle. La durée de l'appel est enregistrée
+        (si `prompt_tokens` est fourni) pour le calcul des délais adaptatifs.
+        """
+        self.pool.start_monitor()
+        deadline = time.time() + config.OLLAMA_SLOT_WAIT_TIMEOUT
+        host, slot = None, None
+        while slot is None:
+            breakers = {h: self.breaker(h, model) for h in self.pool.ranked_hosts(model)}
+            # En semi-ouvert, un seul appel d'essai à la fois par (hôte, modèle)
+            claimed = [h for h, b in breakers.items() if b.claim(timeout + 60)]
+            if not claimed:
+                raise CircuitOpenError(model, min(b.state()['retry_after'] for b in breakers.values()))
+            for candidate in claimed:
+                candidate_slot = self._slot(candidate, model, timeout)
+                if slot is None and candidate_slot.try_acquire():
+                    host, slot, breaker = candidate, candidate_slot, breakers[candidate]
+                else:
+                    breakers[candidate].release()
+            if slot is None:
+                if time.time() > deadline:
+                    raise TimeoutError(f"Aucun hôte Ollama disponible pour {model} après {config.OLLAMA_SLOT_WAIT_TIMEOUT}s")
+                time.sleep(0.5)
+
+        token = self.pool.begin(host, timeout + 60)
+        started = time.time()
+        try:
+            yield host
+            self.pool.mark_loaded(host, model)
+            breaker.record_success(time.time() - started, prompt_tokens)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self.pool.record_failure(host, str(e))
+            breaker.record_failure(str(e))
+            raise
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code >= 500:
+                breaker.record_failure(str(e))
+            raise
+        finally:
+            self.pool.end(host, token)
+            slot.release()
+            breaker.release()
+
+    def generate(self, model: str, prompt: str, output_format: str | dict = "", keep_alive: str = None,
+                 timeout: int = None, options: dict = None) -> dict:
+        """
+        Appel unique à /api/generate (sans retry) ; retourne la réponse JSON brute d'Ollama.
+        `output_format` vaut "json" ou un schéma JSON (sortie structurée).
+        Sans `timeout` explicite, le délai est adapté aux latences observées et à la taille du prompt.
+        """
+        prompt_tokens = estimate_tokens(prompt)
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": keep_alive or config.OLLAMA_DEFAULT_KEEP_ALIVE
+        }
+        if isinstance(output_format, dict) or output_format == "json":
+            payload["format"] = output_format
+        if options:
+            payload["options"] = options
+
+        with self._lease(model, timeout or config.REQUEST_TIMEOUT, prompt_tokens) as host:
+            request_timeout = timeout or self.breaker(host, model).timeout_for(prompt_tokens)
+            response = self.session.post(f"{host}/api/generate", json=payload, timeout=request_timeout)
+            response.raise_for_status()
+        return response.json()
+
+    def generate_stream(self, model: str, prompt: str, keep_alive: str = None, timeout: int = None,
+                        options: dict = None):
+        """Appel à /api/generate en mode `stream` ; produit les fragments de texte au fil de l'eau."""
+        prompt_tokens = estimate_tokens(prompt)
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": keep_alive or config.OLLAMA_DEFAULT_KEEP_ALIVE
+        }
+        if options:
+            payload["options"] = options
+
+        with self._lease(model, timeout or config.REQUEST_TIMEOUT, prompt_tokens) as host:
+            # En streaming, le délai s'applique entre deux fragments reçus
+            request_timeout = timeout or self.breaker(host, model).timeout_for(prompt_tokens)
+            with self.session.post(f"{host}/api/generate", json=payload,
+                                   stream=True, timeout=request_timeout) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('error'):
+                        raise requests.RequestException(chunk['error'])
+                    if chunk.get('response'):
+                        yield chunk['response']
+                    if chunk.get('done'):
+                        break
+
+    def warm_up(self, model: str, keep_alive: str = None) -> bool:
+        """Charge le modèle en mémoire (requête sans prompt) sur l'hôte qui le servira en priorité."""
+        payload = {"model": model, "keep_alive": keep_alive or config.OLLAMA_DEFAULT_KEEP_ALIVE}
+        try:
+            with self._lease(model, config.REQUEST_TIMEOUT) as host:
+                response = self.session.post(f"{host}/api/generate", json=payload,
+                                             timeout=config.REQUEST_TIMEOUT)
+                response.raise_for_status()
+            return True
+        except (requests.RequestException, TimeoutError, CircuitOpenError) as e:
+            print(f"⚠️ Préchargement du modèle {model} impossible: {e}")
+            return False
+
+
+class _NullSlot:
+    """Créneau sans limite, utilisé quand Redis n'est pas disponible."""
+
+    def try_acquire(self) -> bool:
+        return True
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
@@ -0,0 +1,179 @@
+# Fichier : utils/pdf_extraction.py
+
+import multiprocessing
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from config_v4 import get_config
+
+config = get_config()
+
+try:
+    import pymupdf
+except ImportError:
+    try:
+        import fitz as pymupdf  # PyMuPDF < 1.24
+    except ImportError:
+        pymupdf = None
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+# À incrémenter quand le format du texte produit change (invalide le stock pdf_texts)
+PDF_TEXT_FORMAT_VERSION = 2
+
+
+class PdfTextEngine(ABC):
+    """
+    Moteur d'extraction de texte PDF : `page_count(path)` et `extract_pages(path, start, stop)`
+    (texte brut des pages [start, stop[). Les moteurs sont déclarés dans `PDF_ENGINES` et essayés
+    dans l'ordre de `Config.PDF_TEXT_ENGINES`.
+    """
+
+    name = ''
+
+    @classmethod
+    def available(cls) -> bool:
+        return False
+
+    @classmethod
+    def version(cls) -> str:
+        return ''
+
+    @abstractmethod
+    def page_count(self, path: str) -> int:
+        ...
+
+    @abstractmethod
+    def extract_pages(self, path: str, start: int = 0, stop: int = None) -> list:
+        ...
+
+
+class PyMuPDFEngine(PdfTextEngine):
+    """Extraction rapide (MuPDF, en C)."""
+
+    name = 'pymupdf'
+
+    @classmethod
+    def available(cls) -> bool:
+        return pymupdf is not None
+
+    @classmethod
+    def version(cls) -> str:
+        return pymupdf.VersionBind
+
+    def page_count(self, path: str) -> int:
+        with pymupdf.open(path) as doc:
+            return doc.page_count
+
+    def extract_pages(self, path: str, start: int = 0, stop: int = None) -> list:
+        with pymupdf.open(path) as doc:
+            stop = doc.page_count if stop is None else min(stop, doc.page_count)
+            return [doc.load_page(i).get_text() or "" for i in range(start, stop)]
+
+
+class PyPDF2Engine(PdfTextEngine):
+    """Extraction en Python pur, plus lente mais tolérante ; sert de repli."""
+
+    name = 'pypdf2'
+
+    @classmethod
+    def available(cls) -> bool:
+        return PyPDF2 is not None
+
+    @classmethod
+    def version(cls) -> str:
+        return PyPDF2.__version__
+
+    def page_count(self, path: str) -> int:
+        with open(path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+
+    def extract_pages(self, path: str, start: int = 0, stop: int = None) -> list:
+        with open(path, 'rb') as file:
+            pages = PyPDF2.PdfReader(file).pages
+            stop = len(pages) if stop is None else min(stop, len(pages))
+            return [pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+PDF_ENGINES = {engine.name: engine for engine in (PyMuPDFEngine, PyPDF2Engine)}
+
+
+def get_engines(names: list = None) -> list:
+    """Moteurs configurés et installés, dans l'ordre de préférence."""
+    names = names if names is not None else config.PDF_TEXT_ENGINES
+    return [PDF_ENGINES[name]() for name in names if name in PDF_ENGINES and PDF_ENGINES[name].available()]
+
+
+def extractor_version(engine_name: str) -> str:
+    """Identifie le moteur qui a produit un texte, sa version et le format du texte, ex. 'pymupdf-1.24.10/v2'."""
+    return f"{engine_name}-{PDF_ENGINES[engine_name].version()}/v{PDF_TEXT_FORMAT_VERSION}"
+
+
+def accepted_extractor_versions(names: list = None) -> list:
+    """Versions d'extracteur acceptées dans le stock pdf_texts : celles des moteurs configurés et installés."""
+    return [extractor_version(engine.name) for engine in get_engines(names)]
+
+
+def _extract_range(engine_name: str, path: str, start: int, stop: int) -> list:
+    # Exécutée dans un processus du pool : les arguments et le résultat doivent être sérialisables
+    return PDF_ENGINES[engine_name]().extract_pages(path, start, stop)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Pool de processus partagé, créé au premier document volumineux (spawn : le worker a des threads)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=config.PDF_EXTRACTION_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _extract_with(engine: PdfTextEngine, path: str) -> list:
+    page_count = engine.page_count(path)
+    if page_count < config.PDF_PARALLEL_MIN_PAGES or config.PDF_EXTRACTION_WORKERS <= 1:
+        return engine.extract_pages(path)
+
+    # Document volumineux : plages de pages réparties entre les processus, résultats dans l'ordre
+    step = config.PDF_PAGES_PER_TASK
+    try:
+        futures = [_get_pool().submit(_extract_range, engine.name, path, start, min(start + step, page_count))
+                   for start in range(0, page_count, step)]
+        return [page for future in futures for page in future.result()]
+    except BrokenProcessPool:
+        _reset_pool()  # un processus a été tué (mémoire, PDF corrompu) : nouveau pool au prochain appel
+        raise
+
+
+def extract_pdf_pages(path: str, engines: list = None) -> tuple:
+    """
+    Texte brut de chaque page d'un PDF, avec le premier moteur qui réussit.
+    Retourne (pages, nom du moteur) ; lève la dernière erreur si aucun moteur n'aboutit.
+    """
+    engines = engines if engines is not None else get_engines()
+    if not engines:
+        raise RuntimeError("Aucun moteur d'extraction PDF disponible (PyMuPDF ou PyPDF2 requis)")
+    error = None
+    for engine in engines:
+        try:
+            return _extract_with(engine, str(path)), engine.name
+        except Exception as e:
+            print(f"⚠️ Extraction PDF avec {engine.name} impossible pour {path}: {e}")
+            error = e
+    raise error
@@ -0,0 +1,65 @@
+# Fichier : utils/rate_limiter.py
+
+import time
+from urllib.parse import urlparse
+import redis
+from config_v4 import get_config
+
+config = get_config()
+
+# Seau à jetons avec réservation : chaque appel prend un jeton, quitte à rendre le solde
+# négatif, et reçoit le délai à attendre avant d'émettre sa requête. Les appelants
+# concurrents sont ainsi servis dans l'ordre, au débit exact, sans boucle d'attente.
+# L'heure est celle du serveur Redis : un décalage d'horloge entre workers ne fausse pas le seau.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+
+class RateLimiter:
+    """
+    Limiteur de débit partagé par tous les workers (Redis), un seau par hôte d'API externe.
+    Les débits (requêtes/s) et les rafales autorisées viennent de `Config.RATE_LIMITS` ;
+    les hôtes absents de la configuration ne sont pas limités.
+    """
+
+    PREFIX = 'ratelimit'
+
+    def __init__(self, redis_conn, limits: dict = None):
+        self.redis_conn = redis_conn
+        self.limits = limits if limits is not None else config.RATE_LIMITS
+        self._script = redis_conn.register_script(TOKEN_BUCKET_SCRIPT) if redis_conn is not None else None
+
+    def reserve(self, host: str) -> float:
+        """Réserve un créneau pour `host` ; retourne le délai (s) à respecter avant la requête."""
+        limit = self.limits.get(host)
+        if not limit or self._script is None:
+            return 0.0
+        rate, burst = (limit, 1) if isinstance(limit, (int, float)) else (limit['rate'], limit.get('burst', 1))
+        try:
+            return float(self._script(keys=[f"{self.PREFIX}:{host}"], args=[rate, burst]))
+        except redis.RedisError as e:
+            print(f"⚠️ Limiteur de débit indisponible pour {host}: {e}")
+            return 0.0
+
+    def wait(self, host: str):
+        """Bloque jusqu'au créneau réservé pour `host`."""
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    def wait_for_url(self, url: str):
+        self.wait(urlparse(url).hostname or '')
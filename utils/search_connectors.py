@@ -0,0 +1,92 @@
+# Fichier : utils/search_connectors.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config_v4 import get_config
+
+config = get_config()
+
+
+class SearchCancelled(Exception):
+    """Levée par les rappels d'une source abandonnée (hors délai) pour interrompre son thread."""
+
+
+class SearchConnector:
+    """
+    Interface commune des sources de recherche bibliographique.
+    `search_func(query, max_results)` est l'implémentation (bloquante) de la source ;
+    `run` l'exécute dans un thread avec le délai maximal propre à la source.
+
+    Une source hors délai est annulée (`cancel`) : ses rappels enveloppés par `guard`
+    n'écrivent plus rien et lèvent SearchCancelled dans le thread abandonné.
+    `drained` est levé (via `mark_drained`) quand la source a remis toutes les notices
+    de la requête, sans que `max_results` ait tronqué la récolte.
+    """
+
+    def __init__(self, name: str, search_func=None, timeout: int = None):
+        self.name = name
+        self.search_func = search_func
+        self.timeout = timeout or config.SEARCH_SOURCE_TIMEOUTS.get(name, config.SEARCH_SOURCE_TIMEOUT)
+        self.cancelled = threading.Event()
+        self.drained = threading.Event()
+        self._lock = threading.Lock()
+
+    def guard(self, callback):
+        """Enveloppe un rappel de la source pour qu'il soit sans effet une fois la source annulée."""
+        if callback is None:
+            return None
+
+        def guarded(*args, **kwargs):
+            with self._lock:
+                if self.cancelled.is_set():
+                    raise SearchCancelled(f"source {self.name} abandonnée")
+                return callback(*args, **kwargs)
+        return guarded
+
+    def mark_drained(self):
+        self.drained.set()
+
+    def cancel(self):
+        """Annule la source ; attend la fin d'une écriture déjà commencée par un rappel."""
+        with self._lock:
+            self.cancelled.set()
+
+    async def run(self, query: str, max_results: int, executor=None) -> list:
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(loop.run_in_executor(executor, self.search_func, query, max_results),
+                                      self.timeout)
+
+
+async def run_search_connectors(connectors: list, query: str, max_results: int, on_source_done=None) -> dict:
+    """
+    Interroge toutes les sources en parallèle ; la durée totale est celle de la plus lente.
+    `on_source_done(name, results, error, duration)` est appelée dès qu'une source termine
+    (dans un thread, pour ne pas bloquer les autres sources pendant l'écriture en base).
+    Retourne {nom: résultats} (liste vide pour une source en échec ou hors délai).
+    Les threads des sources hors délai sont abandonnés sans être attendus, après annulation :
+    leurs rappels (`guard`) n'enregistrent plus rien.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=2 * max(1, len(connectors)), thread_name_prefix='search')
+
+    async def run_one(connector):
+        started = time.time()
+        try:
+            results, error = await connector.run(query, max_results, executor), None
+        except asyncio.TimeoutError:
+            await loop.run_in_executor(executor, connector.cancel)
+            results, error = [], f"délai de {connector.timeout}s dépassé"
+        except Exception as e:
+            results, error = [], str(e)
+        if on_source_done:
+            await loop.run_in_executor(executor, on_source_done, connector.name, results, error,
+                                       time.time() - started)
+        return connector.name, results
+
+    try:
+        outcomes = await asyncio.gather(*(run_one(connector) for connector in connectors))
+    finally:
+        executor.shutdown(wait=False)
+    return dict(outcomes)
@@ -0,0 +1,156 @@
+# Fichier : utils/structured_output.py
+
+import re
+import json
+
+SCREENING_PROPERTIES = {
+    "relevance_score": {"type": "number", "minimum": 0, "maximum": 10},
+    "decision": {"type": "string", "enum": ["À inclure", "À exclure"]},
+    "justification": {"type": "string"}
+}
+
+SCREENING_SCHEMA = {
+    "type": "object",
+    "properties": SCREENING_PROPERTIES,
+    "required": ["relevance_score", "decision", "justification"]
+}
+
+BATCH_SCREENING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"article_id": {"type": "string"}, **SCREENING_PROPERTIES},
+                "required": ["article_id", "relevance_score", "decision", "justification"]
+            }
+        }
+    },
+    "required": ["results"]
+}
+
+MAX_TRUNCATION_CANDIDATES = 20
+
+
+def schema_for_fields(fields: list) -> dict:
+    """Schéma JSON d'une grille d'extraction : un champ texte obligatoire par colonne."""
+    return {
+        "type": "object",
+        "properties": {field: {"type": "string"} for field in fields},
+        "required": list(fields)
+    }
+
+
+def fill_missing_fields(data, schema: dict):
+    """Complète avec "" les champs texte obligatoires absents d'un objet récupéré partiellement."""
+    if not isinstance(data, dict) or not schema:
+        return data
+    properties = schema.get("properties", {})
+    for field in schema.get("required", []):
+        if field not in data and properties.get(field, {}).get("type") == "string":
+            data[field] = ""
+    return data
+
+
+def _strip_fences(text: str) -> str:
+    return text.strip().replace("```json", "").replace("```", "").strip()
+
+
+def _fix_common_errors(text: str) -> str:
+    """Corrige les virgules finales et les virgules manquantes entre deux lignes."""
+    text = re.sub(r',\s*([}\]])', r'\1', text)
+    return re.sub(r'("|\d|true|false|null|[}\]])(\s*\n\s*)(["{\[])', r'\1,\2\3', text)
+
+
+def _truncation_candidates(text: str):
+    """
+    Propose des versions refermées d'un JSON tronqué : d'abord le texte complet,
+    puis des coupures aux dernières virgules hors chaînes (éléments incomplets abandonnés).
+    """
+    stack, commas = [], []
+    in_string = escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]':
+            if stack:
+                stack.pop()
+        elif ch == ',':
+            commas.append((i, ''.join(reversed(stack))))
+
+    tail = text[:-1] if escape else text
+    if in_string:
+        tail += '"'
+    tail = tail.rstrip().rstrip(',')
+    if tail.endswith(':'):
+        tail += ' ""'
+    yield tail + ''.join(reversed(stack))
+
+    for position, closers in reversed(commas[-MAX_TRUNCATION_CANDIDATES:]):
+        yield text[:position] + closers
+
+
+def repair_json(text: str):
+    """
+    Analyse tolérante d'une réponse JSON de LLM : ignore le texte autour de l'objet,
+    corrige les virgules et referme un objet tronqué. Lève json.JSONDecodeError si rien
+    n'est récupérable.
+    """
+    candidate = _strip_fences(text)
+    starts = [i for i in (candidate.find('{'), candidate.find('[')) if i != -1]
+    if not starts:
+        raise json.JSONDecodeError("Aucun objet JSON dans la réponse", text, 0)
+    candidate = candidate[min(starts):]
+
+    decoder = json.JSONDecoder()
+    fixed = _fix_common_errors(candidate)
+    for attempt in (candidate, fixed):
+        try:
+            return decoder.raw_decode(attempt)[0]
+        except json.JSONDecodeError:
+            pass
+
+    for attempt in _truncation_candidates(fixed):
+        try:
+            return json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+
+    raise json.JSONDecodeError("Réponse JSON irrécupérable", text, 0)
+
+
+def matches_schema(data, schema: dict) -> bool:
+    """
+    Vérification stricte (sous-ensemble de JSON Schema utilisé ici : type, properties,
+    required, items, enum, minimum, maximum). Sert à n'enregistrer en cache que des réponses complètes.
+    """
+    if not schema:
+        return True
+    if 'enum' in schema and data not in schema['enum']:
+        return False
+    expected = schema.get('type')
+    if expected == 'object':
+        if not isinstance(data, dict) or any(field not in data for field in schema.get('required', [])):
+            return False
+        return all(matches_schema(data[field], sub) for field, sub in schema.get('properties', {}).items()
+                   if field in data)
+    if expected == 'array':
+        return isinstance(data, list) and all(matches_schema(item, schema.get('items')) for item in data)
+    if expected == 'string':
+        return isinstance(data, str)
+    if expected == 'number':
+        if isinstance(data, bool) or not isinstance(data, (int, float)):
+            return False
+        return schema.get('minimum', data) <= data <= schema.get('maximum', data)
+    return True
@@ -0,0 +1,73 @@
+# Fichier : utils/text_store.py
+
+import json
+from datetime import datetime
+from sqlalchemy import text
+
+
+def join_pages(pages: list):
+    """Concatène les pages (séparées par une ligne vide) ; retourne (texte, position de début de chaque page)."""
+    offsets, position = [], 0
+    for page in pages:
+        offsets.append(position)
+        position += len(page) + 2
+    return "\n\n".join(pages), offsets
+
+
+def split_pages(full_text: str, offsets: list) -> list:
+    """Inverse de `join_pages`."""
+    bounds = list(offsets) + [len(full_text) + 2]
+    return [full_text[bounds[i]:bounds[i + 1] - 2] for i in range(len(offsets))]
+
+
+class PdfTextStore:
+    """
+    Texte extrait des PDF (table `pdf_texts`), adressé par le SHA-256 du fichier et partagé
+    entre projets et tâches : un PDF n'est analysé qu'une fois par version de l'extracteur.
+    Chaque entrée conserve le texte normalisé, la position de début de chaque page et la
+    version de l'extracteur qui l'a produite (moteur, version du moteur et format du texte) ;
+    une entrée produite par un moteur qui n'est plus accepté est ignorée puis remplacée.
+    """
+
+    def __init__(self, session_factory):
+        self.Session = session_factory
+
+    def get(self, sha256: str, extractor_versions: list) -> dict | None:
+        session = self.Session()
+        try:
+            row = session.execute(text("""
+                SELECT extractor_version, text, page_offsets FROM pdf_texts
+                WHERE sha256 = :sha256 AND extractor_version = ANY(:versions)
+            """), {'sha256': sha256, 'versions': list(extractor_versions)}).fetchone()
+            if not row:
+                return None
+            return {'sha256': sha256, 'text': row.text, 'page_offsets': json.loads(row.page_offsets),
+                    'extractor_version': row.extractor_version}
+        except Exception as e:
+            print(f"⚠️ Stock de textes PDF indisponible (lecture): {e}")
+            return None
+        finally:
+            session.close()
+
+    def put(self, sha256: str, full_text: str, page_offsets: list, extractor_version: str):
+        session = self.Session()
+        try:
+            session.execute(text("""
+                INSERT INTO pdf_texts (sha256, extractor_version, text, page_offsets, page_count, size_bytes, created_at)
+                VALUES (:sha256, :version, :text, :page_offsets, :page_count, :size_bytes, :now)
+                ON CONFLICT (sha256) DO UPDATE SET
+                    extractor_version = EXCLUDED.extractor_version, text = EXCLUDED.text,
+                    page_offsets = EXCLUDED.page_offsets, page_count = EXCLUDED.page_count,
+                    size_bytes = EXCLUDED.size_bytes, created_at = EXCLUDED.created_at
+                WHERE pdf_texts.extractor_version <> EXCLUDED.extractor_version
+            """), {
+                'sha256': sha256, 'version': extractor_version, 'text': full_text,
+                'page_offsets': json.dumps(page_offsets), 'page_count': len(page_offsets),
+                'size_bytes': len(full_text.encode('utf-8')), 'now': datetime.now()
+            })
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Stock de textes PDF indisponible (écriture): {e}")
+        finally:
+            session.close()
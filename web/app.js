@@ -281,6 +281,14 @@ function initializeWebSocket() {
             handleWebSocketNotification(data);
         });
 
+        appState.socket.on('chat_token', (data) => {
+            appendChatToken(data.message_id, data.token);
+        });
+
+        appState.socket.on('chat_done', (data) => {
+            finalizeChatMessage(data.message_id, data.answer, data.sources);
+        });
+
         appState.socket.on('room_joined', (data) => {
             console.log(`🏠 Rejoint la room du projet ${data.project_id}`);
         });
@@ -2616,26 +2624,74 @@ async function sendChatMessage() {
     textarea.value = '';
     textarea.disabled = true;
 
+    // La bulle de réponse existe avant l'envoi : un 'chat_token' ou 'chat_done' reçu
+    // avant la fin de la requête POST la trouve déjà
+    const messageId = generateMessageId();
+    const msgDiv = appendChatMessage('assistant', '…');
+    if (msgDiv) {
+        msgDiv.dataset.messageId = messageId;
+        msgDiv.dataset.streaming = 'pending';
+    }
+
     try {
-        const result = await fetchAPI(`/projects/${project.id}/chat`, {
+        // La réponse arrive ensuite token par token via les événements 'chat_token' / 'chat_done'
+        await fetchAPI(`/projects/${project.id}/chat`, {
             method: 'POST',
             body: { 
                 question, 
-                profile: project.profile_used || 'standard' 
+                profile: project.profile_used || 'standard',
+                message_id: messageId
             }
         });
         
-        appendChatMessage('assistant', result.answer, result.sources);
-        
     } catch (error) {
         console.error('Erreur chat:', error);
-        appendChatMessage('assistant', "Désolé, une erreur est survenue lors de la génération de la réponse.", []);
+        finalizeChatMessage(messageId, "Désolé, une erreur est survenue lors de la génération de la réponse.", []);
     } finally {
         textarea.disabled = false;
         textarea.focus();
     }
 }
 
+function generateMessageId() {
+    if (window.crypto?.randomUUID) return window.crypto.randomUUID();
+    return 'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, (c) => {
+        const r = Math.random() * 16 | 0;
+        return (c === 'x' ? r : (r & 0x3 | 0x8)).toString(16);
+    });
+}
+
+function findStreamingChatMessage(messageId) {
+    const container = document.getElementById('chatMessages');
+    if (!container || !messageId) return null;
+    return container.querySelector(`.chat-message[data-message-id="${CSS.escape(messageId)}"]`);
+}
+
+function appendChatToken(messageId, token) {
+    const msgDiv = findStreamingChatMessage(messageId);
+    if (!msgDiv || !token) return;
+
+    const contentDiv = msgDiv.querySelector('.chat-message__content');
+    if (msgDiv.dataset.streaming === 'pending') {
+        contentDiv.textContent = '';
+        msgDiv.dataset.streaming = 'active';
+    }
+    contentDiv.textContent += token;
+
+    const container = document.getElementById('chatMessages');
+    container.scrollTop = container.scrollHeight;
+}
+
+function finalizeChatMessage(messageId, answer, sources) {
+    const msgDiv = findStreamingChatMessage(messageId);
+    if (!msgDiv) return;
+
+    const finalDiv = appendChatMessage('assistant', answer || '', sources);
+    if (finalDiv) {
+        msgDiv.replaceWith(finalDiv);
+    }
+}
+
 function appendChatMessage(role, content, sources = null) {
     const container = document.getElementById('chatMessages');
     if (!container) return;
@@ -2664,6 +2720,7 @@ function appendChatMessage(role, content, sources = null) {
     
     container.appendChild(msgDiv);
     container.scrollTop = container.scrollHeight;
+    return msgDiv;
 }
 
 function clearChatHistory() {